@@ -0,0 +1,190 @@
+"""
+End-to-end ingestion benchmark for `BuyOrderCsvPipeline` and `CustomerCsvPipeline`.
+
+Each (report, size) case generates a synthetic export (see `synthetic.py`, cached under
+`benchmarks/.data/`) and imports it in a fresh worker process against a migrated
+SQLite database in a temporary file, with DEBUG off. Reported per case: wall time, SQL
+query count and SQL time per stage (extract, transform, load), rows/sec and the worker's
+peak RSS. A run holds one chunk (`--chunksize`) in memory at a time, so the peak RSS
+should stay flat across sizes once they span more than one chunk.
+
+With `--quarantine` rows that fail are written to a rejects file instead of failing
+the run (see `core.ingestion.rejects`); combined with `--bad-currency-rate` it measures
+what the bad rows cost.
+
+Results are compared with `benchmarks/baselines/ingestion.json`; `--save` rewrites that
+file so a regression shows up in `git diff`. The baseline is recorded at every default
+size, so smaller runs compare against their own entries.
+
+    uv run python benchmarks/ingestion.py --sizes 10000
+    uv run python benchmarks/ingestion.py --save
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+SRC_DIR = BENCHMARKS_DIR.parent / 'src'
+DATA_DIR = BENCHMARKS_DIR / '.data'
+BASELINE_FILE = BENCHMARKS_DIR / 'baselines' / 'ingestion.json'
+
+REPORTS = ('buy_orders', 'customers')
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+STAGES = ('extract', 'transform', 'load')
+# Metrics compared against the baseline; lower is better for all of them
+COMPARED_METRICS = ('seconds', 'queries', 'peak_rss_mb')
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss survives exec, so a worker would report the peak the parent reached
+    # generating a large dataset; VmHWM is the worker's own (both in KiB on Linux)
+    status = Path('/proc/self/status')
+    if status.exists():
+        for line in status.read_text(encoding='utf-8').splitlines():
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_case(
+    report: str, csv_path: Path, chunksize: int, engine: str, quarantine: bool = False
+) -> dict:
+    """Imports `csv_path` in this process and returns its metrics"""
+    sys.path.insert(0, str(SRC_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings_test')
+
+    import django  # noqa: PLC0415
+
+    django.setup()
+
+    from django.conf import settings  # noqa: PLC0415
+    from django.db import connection  # noqa: PLC0415
+
+    # As under the test runner and in production: with DEBUG every query's SQL is kept
+    # in `connection.queries_log` (up to 9000 of them), which grows with the input
+    settings.DEBUG = False
+
+    from core.ingestion.rejects import RejectWriter  # noqa: PLC0415
+    from reports.ingestion.mapping import REPORT_MAP  # noqa: PLC0415
+
+    # A file-backed database, so the pages SQLite keeps of an in-memory one are not
+    # counted in the worker's RSS as if the pipeline retained them
+    db_dir = tempfile.mkdtemp(prefix='ingestion-benchmark-')
+    connection.settings_dict['TEST']['NAME'] = str(Path(db_dir) / 'db.sqlite3')
+    connection.creation.create_test_db(verbosity=0)
+    rejects = None
+    if quarantine:
+        rejects = RejectWriter(csv_path.with_suffix('.rejects.csv'))
+        rejects.discard()
+    pipeline = REPORT_MAP[f'{report}_csv'](chunksize=chunksize, engine=engine, rejects=rejects)
+
+    rss_before = _peak_rss_mb()
+    try:
+        profile = pipeline.run(csv_path)
+    finally:
+        connection.creation.destroy_test_db(verbosity=0)
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+    total = profile['wall_seconds']
+    stages = profile['stages']
+    return {
+        'rows': profile['rows'],
+        'rows_rejected': rejects.count if rejects else 0,
+        'seconds': round(total, 3),
+        'rows_per_second': round(profile['rows'] / total) if total else None,
+        'queries': sum(stage.get('queries', 0) for stage in stages.values()),
+        'peak_rss_mb': round(_peak_rss_mb(), 1),
+        'peak_rss_delta_mb': round(_peak_rss_mb() - rss_before, 1),
+        'stages': {
+            name: {
+                'seconds': round(stages[name].get('wall_seconds', 0.0), 3),
+                'queries': stages[name].get('queries', 0),
+                'sql_seconds': round(stages[name].get('query_seconds', 0.0), 3),
+            }
+            for name in (*STAGES, 'quarantine')
+            if name in stages
+        },
+    }
+
+
+def dataset(report: str, rows: int, bad_currency_rate: float) -> Path:
+    """Generates (or reuses) the synthetic export for a case"""
+    sys.path.insert(0, str(BENCHMARKS_DIR))
+    import synthetic  # noqa: PLC0415
+
+    suffix = f'-bad{bad_currency_rate}' if bad_currency_rate else ''
+    path = DATA_DIR / f'{report}-{rows}{suffix}-v{synthetic.VERSION}.csv'
+    if not path.exists():
+        options = {'bad_currency_rate': bad_currency_rate} if report == 'buy_orders' else {}
+        synthetic.write(report, rows, path, **options)
+    return path
+
+
+def compare(results: dict, baseline: dict) -> None:
+    header = f'{"case":<24}{"metric":<14}{"baseline":>12}{"current":>12}{"change":>10}'
+    print(header)
+    print('-' * len(header))
+    for case, metrics in results.items():
+        for metric in ('rows_per_second', *COMPARED_METRICS):
+            current = metrics[metric]
+            previous = baseline.get(case, {}).get(metric)
+            change = f'{(current - previous) / previous:+.1%}' if previous else 'new'
+            print(f'{case:<24}{metric:<14}{previous or "-":>12}{current:>12}{change:>10}')
+        stages = ', '.join(
+            f'{name} {values["seconds"]}s/{values["queries"]}q'
+            for name, values in metrics['stages'].items()
+        )
+        print(f'{"":<24}{stages}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--reports', nargs='+', choices=REPORTS, default=list(REPORTS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES))
+    parser.add_argument('--chunksize', type=int, default=50_000)
+    parser.add_argument('--engine', choices=['c', 'pyarrow'], default='c')
+    parser.add_argument('--bad-currency-rate', type=float, default=0.0)
+    parser.add_argument('--quarantine', action='store_true', help='reject failing rows')
+    parser.add_argument('--save', action='store_true', help='overwrite the baseline file')
+    parser.add_argument('--worker', nargs=2, metavar=('REPORT', 'CSV'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        report, csv_path = args.worker
+        case = run_case(report, Path(csv_path), args.chunksize, args.engine, args.quarantine)
+        print(json.dumps(case))
+        return
+
+    results = {}
+    for report in args.reports:
+        for rows in args.sizes:
+            csv_path = dataset(report, rows, args.bad_currency_rate)
+            worker = subprocess.run(
+                [
+                    sys.executable, __file__, '--worker', report, str(csv_path),
+                    '--chunksize', str(args.chunksize), '--engine', args.engine,
+                    *(['--quarantine'] if args.quarantine else []),
+                ],
+                capture_output=True, text=True, check=True,
+            )  # fmt: skip
+            results[f'{report}@{rows}'] = json.loads(worker.stdout.splitlines()[-1])
+
+    baseline = json.loads(BASELINE_FILE.read_text()) if BASELINE_FILE.exists() else {}
+    compare(results, baseline)
+
+    if args.save:
+        BASELINE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_FILE.write_text(json.dumps(baseline | results, indent=2, sort_keys=True) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Per-row cost of building unsaved `Customer` instances from a transformed frame: the
+`iterrows` loop the loaders started from, the `itertuples` + `Model(**data)` loop and
+`ModelBuilder.instances`. No database is touched.
+
+Exits with an error when the builder is not faster than the `itertuples` loop, so a
+change sending it back through keyword arguments does not go unnoticed.
+
+    uv run python benchmarks/model_builder.py --rows 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings_test')
+
+import django  # noqa: E402
+
+django.setup()
+
+from core.ingestion.model_builder import ModelBuilder  # noqa: E402
+from customer.models import Customer  # noqa: E402
+from utils.dataframe_utils import DataFrameUtils as dfu, text_dtype  # noqa: E402
+
+FIELDS = [
+    'first_name',
+    'last_name',
+    'email',
+    'cpf',
+    'phone',
+    'postal_code',
+    'city',
+    'state',
+    'country',
+    'last_order',
+    'customer_group',
+]
+# Share of customers without a phone
+MISSING_PHONE_RATE = 0.2
+
+
+def synthetic_customers(rows: int, seed: int = 42) -> pd.DataFrame:
+    """Text columns with some nulls, an aware datetime and a group id, as loaded"""
+    rng = np.random.default_rng(seed)
+    numbers = pd.Series(rng.integers(0, 10**11, size=rows)).astype(str).str.zfill(11)
+    text = {
+        'first_name': 'nome' + numbers.str[:4],
+        'last_name': 'sobrenome' + numbers.str[4:8],
+        'email': 'cliente' + numbers + '@example.com',
+        'cpf': numbers,
+        'phone': numbers.where(rng.random(rows) >= MISSING_PHONE_RATE),
+        'postal_code': numbers.str[:8],
+        'city': pd.Series(rng.choice(['Sao Paulo', 'Curitiba', None], size=rows)),
+        'state': pd.Series(rng.choice(['SP', 'PR', None], size=rows)),
+        'country': 'BR',
+    }
+    df = pd.DataFrame(text).astype(text_dtype())
+    start = pd.Timestamp('2024-01-01', tz='UTC').value
+    df['last_order'] = pd.to_datetime(rng.integers(start, start + 10**16, size=rows), utc=True)
+    df['customer_group'] = rng.integers(1, 4, size=rows)
+    return df
+
+
+def iterrows(df: pd.DataFrame) -> list[Customer]:
+    df = dfu.replace_nulls_with_none(df)
+    return [
+        Customer(**{field: row[field] for field in FIELDS[:-1]}, customer_group_id=row.iloc[-1])
+        for _, row in df.iterrows()
+    ]
+
+
+def itertuples(df: pd.DataFrame) -> list[Customer]:
+    df = dfu.replace_nulls_with_none(df)
+    attnames = [*FIELDS[:-1], 'customer_group_id']
+    return [Customer(**dict(zip(attnames, row))) for row in df.itertuples(index=False)]
+
+
+def builder(df: pd.DataFrame) -> list[Customer]:
+    return ModelBuilder(Customer, FIELDS).instances(df)
+
+
+def timed(func, df: pd.DataFrame) -> float:
+    started = time.perf_counter()
+    func(df)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100_000)
+    args = parser.parse_args()
+
+    df = synthetic_customers(args.rows)
+    cases = [('iterrows', iterrows), ('itertuples', itertuples), ('builder', builder)]
+    results = {name: timed(func, df) for name, func in cases}
+
+    for name, seconds in results.items():
+        print(f'{name:<12}{seconds:>10.3f} s{seconds / args.rows * 1e9:>12.1f} ns/row')
+    print(f'speedup     {results["itertuples"] / results["builder"]:>10.1f} x (over itertuples)')
+    if results['builder'] >= results['itertuples']:
+        sys.exit('ModelBuilder is not faster than the itertuples + Model(**data) loop')
+
+
+if __name__ == '__main__':
+    main()
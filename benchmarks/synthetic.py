@@ -0,0 +1,257 @@
+"""
+Synthetic ERP exports shaped like the files `buy_orders_csv` and `customers_csv`
+receive, at any row count.
+
+The generated data keeps the awkward parts of the real exports: repeat customers,
+customers that show up with a second e-mail (same CPF) or a second CPF (same e-mail),
+orders carrying another customer's e-mail or CPF (shared by a household, mistyped),
+repeated order numbers carrying a status change, wall-clock times on the
+America/Sao_Paulo DST edges, the trailing "Totais" row and, optionally, unparseable
+currency cells.
+
+    uv run python benchmarks/synthetic.py buy_orders 100000 /tmp/buy_orders.csv
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+FIRST_NAMES = np.array([
+    'Ana', 'Bruna', 'Carlos', 'Daniela', 'Eduardo', 'Fernanda', 'Gabriel', 'Helena',
+    'Igor', 'Juliana', 'Lucas', 'Mariana', 'Nicolas', 'Olivia', 'Pedro', 'Rafaela',
+])  # fmt: skip
+LAST_NAMES = np.array([
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira',
+    'Lima', 'Gomes', 'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Monteiro',
+])  # fmt: skip
+CUSTOMER_GROUPS = np.array(['Comum', 'Comum', 'Comum', 'Influencer', 'VIP'])
+STATUSES = np.array(['Pendente', 'Processando', 'Enviado', 'Entregue', 'Cancelado'])
+PAYMENT_TYPES = np.array([
+    'Pix', 'Cartão de Crédito', 'Cartão de Crédito - 3x', 'Boleto Bancário',
+    'Saldo necessário',
+])  # fmt: skip
+STATES = np.array(['SP', 'RJ', 'MG', 'BA', 'PE', 'RS', 'PR', 'SC'])
+
+# Skipped (DST start) and repeated (DST end) wall-clock hours in America/Sao_Paulo
+DST_EDGES = np.array(['04/11/2018 00', '16/02/2019 23'])
+
+BUY_ORDER_HEADER = [
+    'Pedido #', 'ID do Pedido', 'Firstname', 'Lastname', 'Email', 'Grupo do Cliente',
+    'Número CPF/CNPJ', 'Comprado Em', 'Shipping Telephone', 'Status',
+    'Número do Rastreador', 'Qtd. Vendida', 'Frete', 'Desconto', 'Payment Type',
+    'Total da Venda',
+]  # fmt: skip
+CUSTOMER_HEADER = [
+    'Créditos / Vale Presentes', 'ID', 'Nome', 'E-mail', 'Grupo', 'Telefone', 'CEP', 'País',
+    'Estado', 'Cliente Desde',
+]  # fmt: skip
+
+# Bumped whenever the generated data changes, so cached exports are not reused
+VERSION = 2
+
+REPEAT_CUSTOMER_RATIO = 3  # orders per distinct customer
+SECOND_EMAIL_RATE = 0.02
+SECOND_CPF_RATE = 0.01
+SHARED_EMAIL_RATE = 0.002
+SHARED_CPF_RATE = 0.005
+STATUS_UPDATE_RATE = 0.01
+DST_EDGE_RATE = 0.001
+DISCOUNT_RATE = 0.1
+UPPERCASE_EMAIL_RATE = 0.05
+ADDRESS_RATE = 0.6
+PHONE_RATE = 0.8
+
+
+def _digits(values: np.ndarray, width: int) -> pd.Series:
+    return pd.Series(values).astype(str).str.zfill(width)
+
+
+def _format_cpf(numbers: pd.Series) -> pd.Series:
+    return (
+        numbers.str[:3] + '.' + numbers.str[3:6] + '.' + numbers.str[6:9] + '-' + numbers.str[9:]
+    )
+
+
+def _format_brl(centavos: np.ndarray) -> pd.Series:
+    units = pd.Series(centavos // 100).astype(str).str.replace(r'\B(?=(\d{3})+$)', '.', regex=True)
+    cents = pd.Series(centavos % 100).astype(str).str.zfill(2)
+    return 'R$' + units + ',' + cents
+
+
+def _wall_clock(rng: np.random.Generator, rows: int, start: str, days: int) -> pd.Series:
+    seconds = rng.integers(0, days * 24 * 3600, size=rows)
+    stamps = pd.Timestamp(start) + pd.to_timedelta(seconds, unit='s')
+    formatted = pd.Series(stamps.strftime('%d/%m/%Y %H:%M:%S'))
+
+    edges = rng.random(rows) < DST_EDGE_RATE
+    minutes = pd.Series(rng.integers(0, 60, size=rows)).astype(str).str.zfill(2)
+    edge_values = pd.Series(rng.choice(DST_EDGES, size=rows)) + ':' + minutes + ':00'
+    return formatted.where(~edges, edge_values)
+
+
+def _customers(rng: np.random.Generator, count: int) -> pd.DataFrame:
+    first = rng.choice(FIRST_NAMES, size=count)
+    last = rng.choice(LAST_NAMES, size=count)
+    ids = np.arange(count)
+    local_part = pd.Series(first).str.lower() + '.' + pd.Series(last).str.lower()
+    return pd.DataFrame({
+        'first_name': first,
+        'last_name': last,
+        'email': local_part + ids.astype(str) + '@example.com',
+        'second_email': local_part + ids.astype(str) + '@example.net',
+        'cpf': _format_cpf(_digits(10_000_000_000 + ids * 7, 11)),
+        'second_cpf': _format_cpf(_digits(50_000_000_000 + ids * 7, 11)),
+        'phone': '(11) 9' + _digits(rng.integers(0, 10**8, size=count), 8),
+        'group': rng.choice(CUSTOMER_GROUPS, size=count),
+        'variant': rng.choice(['email', 'cpf'], size=count),
+    })
+
+
+def _repeats(rng: np.random.Generator, rows: int, rate: float) -> np.ndarray:
+    """Positions (never the first) of rows that copy the row before them"""
+    repeated = np.flatnonzero(rng.random(rows) < rate)
+    return repeated[repeated > 0]
+
+
+def _identities(rng: np.random.Generator, picked: pd.DataFrame) -> tuple[pd.Series, pd.Series]:
+    """E-mail and CPF per order row, some switched to the customer's second one.
+
+    A customer either changes e-mail or CPF, never both. A few rows keep one of
+    their keys and borrow the other from another customer's row: they match two
+    stored customers, and the oldest one gets the order (see
+    `CustomerRepository.resolve_identities`).
+    """
+    rows = len(picked)
+    second_email = picked['variant'].eq('email') & (rng.random(rows) < SECOND_EMAIL_RATE)
+    second_cpf = picked['variant'].eq('cpf') & (rng.random(rows) < SECOND_CPF_RATE)
+    emails = picked['email'].where(~second_email, picked['second_email'])
+    cpfs = picked['cpf'].where(~second_cpf, picked['second_cpf'])
+
+    shared_email = rng.random(rows) < SHARED_EMAIL_RATE
+    shared_cpf = ~shared_email & (rng.random(rows) < SHARED_CPF_RATE)
+    others = rng.integers(0, rows, size=rows)
+    emails = emails.where(~shared_email, emails.to_numpy()[others])
+    cpfs = cpfs.where(~shared_cpf, cpfs.to_numpy()[others])
+    return emails, cpfs
+
+
+def _amounts(rng: np.random.Generator, rows: int) -> tuple[np.ndarray, ...]:
+    """Shipping, discount and total centavos per order"""
+    shipping = rng.integers(0, 3_000, size=rows)
+    discount = np.where(rng.random(rows) < DISCOUNT_RATE, rng.integers(0, 5_000, size=rows), 0)
+    total = rng.integers(1_000, 500_000, size=rows) + shipping - discount
+    return shipping, discount, total
+
+
+def _totals_row(
+    quantities: np.ndarray, shipping: np.ndarray, discount: np.ndarray, total: np.ndarray
+) -> dict:
+    """The "Totais" footer the ERP appends to buy order exports"""
+    row = dict.fromkeys(BUY_ORDER_HEADER, '')
+    return row | {
+        'Pedido #': 'Totais',
+        'Qtd. Vendida': str(quantities.sum()),
+        'Frete': _format_brl(np.array([shipping.sum()]))[0],
+        'Desconto': ' -' + _format_brl(np.array([discount.sum()]))[0],
+        'Total da Venda': _format_brl(np.array([total.sum()]))[0],
+    }
+
+
+def buy_orders(rows: int, seed: int = 42, bad_currency_rate: float = 0.0) -> pd.DataFrame:
+    """Builds a buy order export with `rows` data rows plus the totals row.
+
+    Args:
+        rows (int): number of data rows.
+        seed (int, optional): random seed, the output is deterministic. Defaults to 42.
+        bad_currency_rate (float, optional): share of rows whose total is not a valid
+            amount. Defaults to 0.0.
+    """
+    rng = np.random.default_rng(seed)
+    customers = _customers(rng, max(rows // REPEAT_CUSTOMER_RATIO, 1))
+    picked = customers.iloc[rng.integers(0, len(customers), size=rows)].reset_index(drop=True)
+
+    # A repeated order number re-sends the previous order with a newer status
+    order_ids = np.arange(rows) + 200_000
+    repeated = _repeats(rng, rows, STATUS_UPDATE_RATE)
+    order_ids[repeated] = order_ids[repeated - 1]
+    picked.iloc[repeated] = picked.iloc[repeated - 1].to_numpy()
+
+    emails, cpfs = _identities(rng, picked)
+    quantities = rng.integers(1, 6, size=rows)
+    shipping, discount, total = _amounts(rng, rows)
+    bad = rng.random(rows) < bad_currency_rate
+
+    df = pd.DataFrame({
+        'Pedido #': (order_ids + 100_000_000 - 200_000).astype(str),
+        'ID do Pedido': order_ids.astype(str),
+        'Firstname': picked['first_name'],
+        'Lastname': picked['last_name'],
+        'Email': emails.str.upper().where(rng.random(rows) < UPPERCASE_EMAIL_RATE, emails),
+        'Grupo do Cliente': picked['group'],
+        'Número CPF/CNPJ': cpfs,
+        'Comprado Em': _wall_clock(rng, rows, '2025-09-01', 30),
+        'Shipping Telephone': picked['phone'],
+        'Status': rng.choice(STATUSES, size=rows),
+        'Número do Rastreador': '',
+        'Qtd. Vendida': quantities.astype(str),
+        'Frete': _format_brl(shipping),
+        'Desconto': _format_brl(discount),
+        'Payment Type': rng.choice(PAYMENT_TYPES, size=rows),
+        'Total da Venda': _format_brl(total).where(~bad, 'R$ -'),
+    })[BUY_ORDER_HEADER]
+
+    totals_row = _totals_row(quantities, shipping, discount, total)
+    return pd.concat([df, pd.DataFrame([totals_row])], ignore_index=True)
+
+
+def customers(rows: int, seed: int = 42) -> pd.DataFrame:
+    """Builds a customer export with `rows` rows, a few re-sending a known e-mail."""
+    rng = np.random.default_rng(seed)
+    people = _customers(rng, rows)
+    repeated = _repeats(rng, rows, SECOND_EMAIL_RATE)
+    people.loc[repeated, 'email'] = people['email'].to_numpy()[repeated - 1]
+
+    has_address = rng.random(rows) < ADDRESS_RATE
+    postal_codes = _digits(rng.integers(0, 10**8, size=rows), 8)
+    return pd.DataFrame({
+        'Créditos / Vale Presentes': 'R$0,00',
+        'ID': (np.arange(rows) + 500_000).astype(str),
+        'Nome': people['first_name'] + ' ' + people['last_name'],
+        'E-mail': people['email'],
+        'Grupo': people['group'],
+        'Telefone': people['phone'].where(rng.random(rows) < PHONE_RATE, ' -'),
+        'CEP': (postal_codes.str[:5] + '-' + postal_codes.str[5:]).where(has_address, ''),
+        'País': pd.Series('Brasil', index=people.index).where(has_address, ''),
+        'Estado': pd.Series(rng.choice(STATES, size=rows)).where(has_address, ''),
+        'Cliente Desde': _wall_clock(rng, rows, '2018-01-01', 365 * 2),
+    })[CUSTOMER_HEADER]
+
+
+def write(report: str, rows: int, path: Path, **options) -> Path:
+    """Writes the `report` ('buy_orders' or 'customers') export to `path`."""
+    builders = {'buy_orders': buy_orders, 'customers': customers}
+    df = builders[report](rows, **options)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(path, index=False, encoding='utf-8')
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('report', choices=['buy_orders', 'customers'])
+    parser.add_argument('rows', type=int)
+    parser.add_argument('path', type=Path)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--bad-currency-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    options = {'seed': args.seed}
+    if args.report == 'buy_orders':
+        options['bad_currency_rate'] = args.bad_currency_rate
+    write(args.report, args.rows, args.path, **options)
+
+
+if __name__ == '__main__':
+    main()
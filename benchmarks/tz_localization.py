@@ -0,0 +1,62 @@
+"""
+Per-row cost of localizing naive America/Sao_Paulo timestamps: the legacy
+per-cell `local_to_aware` apply against the vectorized `localize_series`.
+
+    uv run python benchmarks/tz_localization.py --rows 1000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+from utils.datetime_utils import local_to_aware, localize_series  # noqa: E402
+
+
+def synthetic_timestamps(rows: int, seed: int = 42) -> pd.Series:
+    """Random wall-clock times over 2017-2019, when Sao Paulo still had DST"""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2017-01-01').value
+    end = pd.Timestamp('2019-12-31').value
+    values = rng.integers(start, end, size=rows, dtype=np.int64)
+    return pd.Series(pd.to_datetime(values).floor('s'))
+
+
+def legacy(series: pd.Series) -> pd.Series:
+    series = pd.to_datetime(series, errors='coerce')
+    return series.apply(local_to_aware)
+
+
+def vectorized(series: pd.Series) -> pd.Series:
+    return localize_series(series)
+
+
+def timed(func, series: pd.Series) -> float:
+    started = time.perf_counter()
+    func(series)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    series = synthetic_timestamps(args.rows)
+    results = {
+        name: timed(func, series)
+        for name, func in [('legacy', legacy), ('vectorized', vectorized)]
+    }
+
+    for name, seconds in results.items():
+        print(f'{name:<12}{seconds:>10.3f} s{seconds / args.rows * 1e9:>12.1f} ns/row')
+    print(f'speedup     {results["legacy"] / results["vectorized"]:>10.1f} x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+from django.urls import include, path
+
+urlpatterns = [
+    path('v1/buy-orders/', include('buy_order.api.v1.urls')),
+]
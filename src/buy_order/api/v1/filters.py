@@ -0,0 +1,18 @@
+import django_filters
+
+from buy_order.models import BuyOrder
+
+
+class BuyOrderFilter(django_filters.FilterSet):
+    """Only filters backed by an index: unique keys, foreign keys and `order_date`"""
+
+    order_number = django_filters.CharFilter()
+    customer = django_filters.NumberFilter(field_name='customer_id')
+    status = django_filters.CharFilter(field_name='status__name')
+    payment_type = django_filters.CharFilter(field_name='payment_type__name')
+    order_date_after = django_filters.IsoDateTimeFilter(field_name='order_date', lookup_expr='gte')
+    order_date_before = django_filters.IsoDateTimeFilter(field_name='order_date', lookup_expr='lt')
+
+    class Meta:
+        model = BuyOrder
+        fields = []
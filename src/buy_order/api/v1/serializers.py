@@ -0,0 +1,60 @@
+from rest_framework import serializers
+
+from buy_order.models import BuyOrder
+from customer.models import Customer
+
+
+class BuyOrderCustomerSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Customer
+        fields = ['id', 'first_name', 'last_name', 'email']
+
+
+class BuyOrderSerializer(serializers.ModelSerializer):
+    """Read-only view of a buy order, with lookups by name"""
+
+    customer = BuyOrderCustomerSerializer(read_only=True)
+    status = serializers.CharField(source='status.name', read_only=True)
+    payment_type = serializers.CharField(source='payment_type.name', read_only=True)
+
+    class Meta:
+        model = BuyOrder
+        fields = [
+            'id',
+            'order_number',
+            'order_id',
+            'order_date',
+            'customer',
+            'status',
+            'payment_type',
+            'sold_quantity',
+            'discount_amount',
+            'shipping_amount',
+            'total_amount',
+            'created_at',
+            'updated_at',
+        ]
+        read_only_fields = fields
+
+
+class SalesSummaryQuerySerializer(serializers.Serializer):
+    """Query parameters of the sales summary: local dates (inclusive), filters, grouping"""
+
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    status = serializers.ListField(child=serializers.CharField(), required=False)
+    payment_type = serializers.ListField(child=serializers.CharField(), required=False)
+    group_by = serializers.MultipleChoiceField(
+        choices=['date', 'status', 'payment_type'], required=False
+    )
+
+
+class SalesSummarySerializer(serializers.Serializer):
+    date = serializers.DateField(required=False)
+    status = serializers.CharField(source='status__name', required=False)
+    payment_type = serializers.CharField(source='payment_type__name', required=False)
+    order_count = serializers.IntegerField(source='sum_order_count')
+    items_sold = serializers.IntegerField(source='sum_items_sold')
+    total_amount = serializers.DecimalField(16, 2, source='sum_total_amount')
+    shipping_amount = serializers.DecimalField(16, 2, source='sum_shipping_amount')
+    discount_amount = serializers.DecimalField(16, 2, source='sum_discount_amount')
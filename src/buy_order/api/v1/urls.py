@@ -0,0 +1,11 @@
+from django.urls import path
+
+from .views import BuyOrderExportView, BuyOrderListView, SalesSummaryView
+
+app_name = 'buy_order_v1'
+
+urlpatterns = [
+    path('', BuyOrderListView.as_view(), name='api-buy-order-list'),
+    path('export/', BuyOrderExportView.as_view(), name='api-buy-order-export'),
+    path('sales/', SalesSummaryView.as_view(), name='api-sales-summary'),
+]
@@ -0,0 +1,87 @@
+from typing import cast
+
+from rest_framework import permissions
+from rest_framework.generics import ListAPIView
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from buy_order.api.v1.filters import BuyOrderFilter
+from buy_order.api.v1.serializers import (
+    BuyOrderSerializer,
+    SalesSummaryQuerySerializer,
+    SalesSummarySerializer,
+)
+from buy_order.repositories.buy_order_repository import BuyOrderRepository
+from buy_order.repositories.daily_sales_rollup_repository import (
+    GROUP_COLUMNS,
+    DailySalesRollupRepository,
+)
+from core.export import ExportView
+from core.pagination import KeysetPagination
+
+
+class BuyOrderPagination(KeysetPagination):
+    ordering = ('-order_date', '-id')
+
+
+class BuyOrderListView(ListAPIView):
+    """Buy orders, newest first, paged by keyset on (order_date, id)"""
+
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = BuyOrderSerializer
+    filterset_class = BuyOrderFilter
+    pagination_class = BuyOrderPagination
+
+    def get_queryset(self):
+        return BuyOrderRepository().find_all_with_relations()
+
+
+class BuyOrderExportView(ExportView):
+    """Filtered buy orders as a streamed CSV or Parquet file, see `core.export`"""
+
+    permission_classes = [permissions.IsAuthenticated]
+    filterset_class = BuyOrderFilter
+    file_name = 'buy-orders'
+    export_columns = [
+        ('id', 'id'),
+        ('order_number', 'order_number'),
+        ('order_id', 'order_id'),
+        ('order_date', 'order_date'),
+        ('customer_id', 'customer_id'),
+        ('customer_email', 'customer__email'),
+        ('status', 'status__name'),
+        ('payment_type', 'payment_type__name'),
+        ('sold_quantity', 'sold_quantity'),
+        ('discount_amount', 'discount_amount'),
+        ('shipping_amount', 'shipping_amount'),
+        ('total_amount', 'total_amount'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    ]
+
+    def get_queryset(self):
+        return BuyOrderRepository().find_all()
+
+
+class SalesSummaryView(APIView):
+    """
+    Order count, items sold and amounts per local day (and/or status, payment type),
+    read from the daily sales rollup rather than from the orders themselves
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        serializer = SalesSummaryQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = cast(dict, serializer.validated_data)
+
+        group_by = params.get('group_by') or {'date'}
+        rows = DailySalesRollupRepository().summarize(
+            [group for group in GROUP_COLUMNS if group in group_by],
+            date_from=params.get('date_from'),
+            date_to=params.get('date_to'),
+            statuses=params.get('status', []),
+            payment_types=params.get('payment_type', []),
+        )
+        return Response(SalesSummarySerializer(rows, many=True).data)
@@ -0,0 +1,28 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from buy_order.repositories.daily_sales_rollup_repository import DailySalesRollupRepository
+
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes the daily sales rollup from the stored buy orders, for backfills. '
+        'Run it while no buy order import is in flight.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', help='First local date (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', help='Last local date (YYYY-MM-DD)')
+
+    def handle(self, *args, date_from=None, date_to=None, **options):
+        try:
+            start = date.fromisoformat(date_from) if date_from else None
+            end = date.fromisoformat(date_to) if date_to else None
+        except ValueError as e:
+            raise CommandError(f'Invalid date: {e}')
+        if start and end and start > end:
+            raise CommandError('--from must not be after --to')
+
+        rows = DailySalesRollupRepository().rebuild(start, end)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} daily sales rollup rows'))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buy_order', '0002_alter_buyorder_customer_alter_buyorder_payment_type_and_more'),
+        ('customer', '0003_keyset_pagination_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='buyorder',
+            index=models.Index(fields=['order_date', 'id'], name='buy_order_b_order_d_7fab84_idx'),
+        ),
+    ]
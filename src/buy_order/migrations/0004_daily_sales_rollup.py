@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buy_order', '0003_keyset_pagination_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('items_sold', models.PositiveBigIntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('shipping_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('discount_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('payment_type', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='buy_order.paymenttype')),
+                ('status', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='buy_order.status')),
+            ],
+            options={
+                'verbose_name': 'Resumo Diário de Vendas',
+                'verbose_name_plural': 'Resumos Diários de Vendas',
+                'constraints': [models.UniqueConstraint(fields=('date', 'status', 'payment_type'), name='unique_daily_sales_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+BATCH_ROWS = 5000
+ROLLUP_SUMS = ['order_count', 'items_sold', 'total_amount', 'shipping_amount', 'discount_amount']
+
+
+def backfill_rollup(apps, schema_editor):
+    # Imports only apply deltas to the rollup: orders stored before it need rows to
+    # be counted out of when their status changes
+    BuyOrder = apps.get_model('buy_order', 'BuyOrder')
+    DailySalesRollup = apps.get_model('buy_order', 'DailySalesRollup')
+    DailySalesRollup.objects.all().delete()
+    sums = (
+        BuyOrder.objects
+        .annotate(day=TruncDate('order_date'))
+        .values('day', 'status_id', 'payment_type_id')
+        .annotate(
+            sum_order_count=Count('id'),
+            sum_items_sold=Sum('sold_quantity'),
+            sum_total_amount=Sum('total_amount'),
+            sum_shipping_amount=Sum('shipping_amount'),
+            sum_discount_amount=Sum('discount_amount'),
+        )
+        .order_by()
+    )
+    DailySalesRollup.objects.bulk_create(
+        [
+            DailySalesRollup(
+                date=row['day'],
+                status_id=row['status_id'],
+                payment_type_id=row['payment_type_id'],
+                **{field: row[f'sum_{field}'] for field in ROLLUP_SUMS},
+            )
+            for row in sums.iterator(chunk_size=BATCH_ROWS)
+        ],
+        batch_size=BATCH_ROWS,
+    )
+
+
+def clear_rollup(apps, schema_editor):
+    apps.get_model('buy_order', 'DailySalesRollup').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buy_order', '0004_daily_sales_rollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollup, clear_rollup),
+    ]
@@ -50,6 +50,37 @@ class BuyOrder(models.Model):
     class Meta:
         verbose_name = 'Ordem de Compra'
         verbose_name_plural = 'Ordens de Compra'
+        # Keyset pagination of the read API (see `core.pagination`)
+        indexes = [models.Index(fields=['order_date', 'id'])]
 
     def __str__(self):
         return f'Buy Order {self.order_number}'
+
+
+class DailySalesRollup(models.Model):
+    """
+    Orders aggregated per local day, status and payment type. Kept up to date by
+    the buy order ingestion (see `DailySalesRollupRepository.apply`) and rebuilt
+    from `BuyOrder` by the `rebuild_sales_rollup` command.
+    """
+
+    date = models.DateField()
+    status = models.ForeignKey(Status, models.PROTECT, related_name='+')
+    payment_type = models.ForeignKey(PaymentType, models.PROTECT, related_name='+')
+    order_count = models.PositiveIntegerField(default=0)
+    items_sold = models.PositiveBigIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    shipping_amount = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    discount_amount = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = 'Resumo Diário de Vendas'
+        verbose_name_plural = 'Resumos Diários de Vendas'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'status', 'payment_type'], name='unique_daily_sales_rollup'
+            )
+        ]
+
+    def __str__(self):
+        return f'Sales {self.date} ({self.status_id}, {self.payment_type_id})'
@@ -1,11 +1,24 @@
+from collections.abc import Iterable
 from datetime import datetime
 from decimal import Decimal
 from typing import Optional, TypedDict
 
 from django.db.models.query import QuerySet
+from django.utils import timezone
 
 from buy_order.models import BuyOrder, PaymentType, Status
 from customer.models import Customer
+from utils.query_utils import in_batches
+
+ROLLUP_FIELDS = [
+    'order_date',
+    'status',
+    'payment_type',
+    'sold_quantity',
+    'total_amount',
+    'shipping_amount',
+    'discount_amount',
+]
 
 
 class BuyOrderDataType(TypedDict):
@@ -28,15 +41,43 @@ class BuyOrderRepository:
     def find_all(self) -> QuerySet[BuyOrder]:
         return BuyOrder.objects.all()
 
+    def find_all_with_relations(self) -> QuerySet[BuyOrder]:
+        """Orders joined with their customer, status and payment type in the same query"""
+        return BuyOrder.objects.select_related('customer', 'status', 'payment_type')
+
     def find_by_order_number(self, order_number: str) -> Optional[BuyOrder]:
         try:
             return BuyOrder.objects.get(order_number=order_number)
         except BuyOrder.DoesNotExist:
             return None
 
+    def find_by_order_numbers(self, order_numbers: Iterable[str]) -> dict[str, BuyOrder]:
+        """
+        Stored orders by number, with only the fields the sales rollup reads, batched
+        to the backend's parameter limit
+        """
+        orders: dict[str, BuyOrder] = {}
+        fields = ['order_number', *ROLLUP_FIELDS]
+        for batch in in_batches(sorted(set(order_numbers))):
+            matches = BuyOrder.objects.filter(order_number__in=batch).only(*fields)
+            orders.update((order.order_number, order) for order in matches)
+        return orders
+
     def build(self, data: BuyOrderDataType) -> BuyOrder:
         return BuyOrder(**data)
 
+    def update_statuses(self, order_pks_by_status: dict[int, list[int]]) -> int:
+        """Moves the given orders to each status, one UPDATE per status and batch"""
+        updated = 0
+        # `update()` skips auto_now, so updated_at is set by hand
+        now = timezone.now()
+        for status_id, order_pks in order_pks_by_status.items():
+            for batch in in_batches(sorted(order_pks)):
+                updated += BuyOrder.objects.filter(pk__in=batch).update(
+                    status_id=status_id, updated_at=now
+                )
+        return updated
+
     def bulk_create(self, orders: list[BuyOrder]) -> list[BuyOrder]:
         return list(
             BuyOrder.objects.bulk_create(
@@ -0,0 +1,193 @@
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Literal, Optional
+
+from django.db import transaction
+from django.db.models import Count, Q, QuerySet, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from buy_order.models import BuyOrder, DailySalesRollup
+from utils.query_utils import in_batches
+
+SalesGroup = Literal['date', 'status', 'payment_type']
+RollupKey = tuple[date, int, int]  # local date, status_id, payment_type_id
+
+ROLLUP_SUMS = ['order_count', 'items_sold', 'total_amount', 'shipping_amount', 'discount_amount']
+GROUP_COLUMNS: dict[SalesGroup, str] = {
+    'date': 'date',
+    'status': 'status__name',
+    'payment_type': 'payment_type__name',
+}
+
+
+class SalesDelta:
+    """
+    Change to the rollup caused by a batch of order writes: each order counted in
+    (+1) or out (-1) of the bucket of its local date, status and payment type.
+    """
+
+    def __init__(self) -> None:
+        self.buckets: dict[RollupKey, list] = defaultdict(
+            lambda: [0, 0, Decimal(0), Decimal(0), Decimal(0)]
+        )
+
+    def __bool__(self) -> bool:
+        return any(any(values) for values in self.buckets.values())
+
+    def add(self, order: BuyOrder, sign: int = 1) -> None:
+        key = (timezone.localdate(order.order_date), order.status_id, order.payment_type_id)
+        bucket = self.buckets[key]
+        bucket[0] += sign
+        bucket[1] += sign * int(order.sold_quantity)
+        bucket[2] += sign * order.total_amount
+        bucket[3] += sign * order.shipping_amount
+        bucket[4] += sign * order.discount_amount
+
+    def move(self, order: BuyOrder, status_id: int) -> None:
+        """Counts a stored order out of its current status and into `status_id`"""
+        self.add(order, -1)
+        order.status_id = status_id
+        self.add(order)
+
+    def clear(self) -> None:
+        self.buckets.clear()
+
+    def copy(self) -> 'SalesDelta':
+        delta = SalesDelta()
+        delta.buckets.update({key: list(values) for key, values in self.buckets.items()})
+        return delta
+
+
+class DailySalesRollupRepository:
+    def apply(self, delta: SalesDelta) -> None:
+        """
+        Adds `delta` to the stored rollup rows. Missing rows are inserted as zeros
+        first (ignoring ones created concurrently), then all of them are locked in
+        pk order and updated, so concurrent imports add up instead of racing.
+        Buckets left without orders are kept (as zeros): deleting them could drop
+        the delta of an import waiting on the lock.
+        """
+        # In key order, so concurrent imports also insert missing rows in the same order
+        changed = {key: values for key, values in sorted(delta.buckets.items()) if any(values)}
+        if not changed:
+            return
+
+        DailySalesRollup.objects.bulk_create(
+            [
+                DailySalesRollup(date=day, status_id=status_id, payment_type_id=payment_type_id)
+                for day, status_id, payment_type_id in changed
+            ],
+            ignore_conflicts=True,
+        )
+        updated = []
+        for row in self._lock(list(changed)):
+            values = changed[(row.date, row.status_id, row.payment_type_id)]
+            for field, value in zip(ROLLUP_SUMS, values):
+                setattr(row, field, getattr(row, field) + value)
+            updated.append(row)
+
+        # An upsert on the pk sends plain values, where `bulk_update` would compile a
+        # CASE WHEN per row for each sum
+        DailySalesRollup.objects.bulk_create(
+            updated, update_conflicts=True, update_fields=ROLLUP_SUMS, unique_fields=['id']
+        )
+
+    def _lock(self, keys: list[RollupKey]) -> list[DailySalesRollup]:
+        """
+        Locks the rollup rows of exactly `keys`, in pk order. Their pks are read first
+        from the rows of their dates: an OR of one condition per key would be locked
+        just the same, but compiling it costs more than the rest of the update.
+        """
+        wanted = set(keys)
+        pks = []
+        for days in in_batches(sorted({day for day, _, _ in keys})):
+            candidates = DailySalesRollup.objects.filter(date__in=days).values_list(
+                'pk', 'date', 'status_id', 'payment_type_id'
+            )
+            pks.extend(pk for pk, *key in candidates if tuple(key) in wanted)
+
+        rows: list[DailySalesRollup] = []
+        for batch in in_batches(sorted(pks)):
+            rows.extend(
+                DailySalesRollup.objects.filter(pk__in=batch).order_by('pk').select_for_update()
+            )
+        return rows
+
+    def rebuild(self, date_from: Optional[date] = None, date_to: Optional[date] = None) -> int:
+        """
+        Recomputes the rollup rows of the given local dates (inclusive, all when
+        omitted) from `BuyOrder`. Returns the number of rows written.
+        """
+        with transaction.atomic():
+            rollups = DailySalesRollup.objects.all()
+            orders = BuyOrder.objects.all()
+            if date_from:
+                rollups = rollups.filter(date__gte=date_from)
+                orders = orders.filter(order_date__gte=_start_of(date_from))
+            if date_to:
+                rollups = rollups.filter(date__lte=date_to)
+                orders = orders.filter(order_date__lt=_start_of(date_to + timedelta(days=1)))
+            rollups.delete()
+
+            sums = (
+                orders.annotate(day=TruncDate('order_date'))
+                .values('day', 'status_id', 'payment_type_id')
+                .annotate(
+                    sum_order_count=Count('id'),
+                    sum_items_sold=Sum('sold_quantity'),
+                    sum_total_amount=Sum('total_amount'),
+                    sum_shipping_amount=Sum('shipping_amount'),
+                    sum_discount_amount=Sum('discount_amount'),
+                )
+                .order_by()
+            )
+            created = DailySalesRollup.objects.bulk_create(
+                [
+                    DailySalesRollup(
+                        date=row['day'],
+                        status_id=row['status_id'],
+                        payment_type_id=row['payment_type_id'],
+                        **{field: row[f'sum_{field}'] for field in ROLLUP_SUMS},
+                    )
+                    for row in sums.iterator(chunk_size=5000)
+                ],
+                batch_size=5000,
+            )
+            return len(created)
+
+    def summarize(
+        self,
+        group_by: Sequence[SalesGroup] = ('date',),
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        statuses: Iterable[str] = (),
+        payment_types: Iterable[str] = (),
+    ) -> QuerySet:
+        """
+        Sums of the rollup rows in range, one dict per `group_by` combination, keyed
+        by the group columns and `sum_<field>` for each of `ROLLUP_SUMS`
+        """
+        query = Q(order_count__gt=0)
+        if date_from:
+            query &= Q(date__gte=date_from)
+        if date_to:
+            query &= Q(date__lte=date_to)
+        if statuses:
+            query &= Q(status__name__in=statuses)
+        if payment_types:
+            query &= Q(payment_type__name__in=payment_types)
+
+        columns = [GROUP_COLUMNS[group] for group in group_by]
+        return (
+            DailySalesRollup.objects.filter(query)
+            .values(*columns)
+            .annotate(**{f'sum_{field}': Sum(field) for field in ROLLUP_SUMS})
+            .order_by(*columns)
+        )
+
+
+def _start_of(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
@@ -1,9 +1,15 @@
-from typing import Dict
+from typing import Dict, Iterable
 
+from core.lookup_cache import lookup_cache
 from buy_order.models import PaymentType
 
 
 class PaymentTypeRepository:
+    """Name lookups go through a process-wide cache, see `core.lookup_cache`"""
+
+    def __init__(self) -> None:
+        self.cache = lookup_cache(PaymentType)
+
     def find_all_as_dict(self) -> Dict[str, PaymentType]:
         return {p.name: p for p in PaymentType.objects.all()}
 
@@ -11,5 +17,11 @@ class PaymentTypeRepository:
         return list(PaymentType.objects.filter(name__in=names))
 
     def get_or_create(self, name: str) -> PaymentType:
-        payment_type, created = PaymentType.objects.get_or_create(name=name)
-        return payment_type
+        return self.cache.get(name)
+
+    def get_or_create_many(self, names: Iterable[str]) -> Dict[str, PaymentType]:
+        """
+        Returns a name -> instance map for every given name, creating the missing
+        ones in a single batch. Served from the process-wide lookup cache.
+        """
+        return self.cache.get_many(names)
@@ -1,9 +1,15 @@
-from typing import Dict
+from typing import Dict, Iterable
 
+from core.lookup_cache import lookup_cache
 from buy_order.models import Status
 
 
 class StatusRepository:
+    """Name lookups go through a process-wide cache, see `core.lookup_cache`"""
+
+    def __init__(self) -> None:
+        self.cache = lookup_cache(Status)
+
     def find_all_as_dict(self) -> Dict[str, Status]:
         return {s.name: s for s in Status.objects.all()}
 
@@ -11,5 +17,11 @@ class StatusRepository:
         return list(Status.objects.filter(name__in=names))
 
     def get_or_create(self, name: str) -> Status:
-        status, created = Status.objects.get_or_create(name=name)
-        return status
+        return self.cache.get(name)
+
+    def get_or_create_many(self, names: Iterable[str]) -> Dict[str, Status]:
+        """
+        Returns a name -> instance map for every given name, creating the missing
+        ones in a single batch. Served from the process-wide lookup cache.
+        """
+        return self.cache.get_many(names)
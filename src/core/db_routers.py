@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+class ImportProgressRouter:
+    """
+    Sends `ImportJobHeartbeat` to `REPORT_IMPORT_PROGRESS_DATABASE`, which holds
+    nothing else. Its table is created in the default database as well, for the alias
+    to name a second connection to it.
+    """
+
+    def db_for_read(self, model, **hints):
+        return self._route(model)
+
+    def db_for_write(self, model, **hints):
+        return self._route(model)
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label == 'reports' and model_name == 'importjobheartbeat':
+            return True
+        progress = settings.REPORT_IMPORT_PROGRESS_DATABASE
+        if progress != DEFAULT_DB_ALIAS and db == progress:
+            return False
+        return None
+
+    def _route(self, model):
+        if model._meta.label == 'reports.ImportJobHeartbeat':
+            return settings.REPORT_IMPORT_PROGRESS_DATABASE
+        return None
@@ -0,0 +1,112 @@
+"""
+CSV reading through pyarrow's multithreaded parser.
+
+pyarrow is an optional dependency (`erp-bridges-backend[arrow]`); it is imported
+lazily so the default C engine keeps working without it.
+"""
+
+from collections.abc import Iterator
+from typing import Any, Dict
+
+import pandas as pd
+
+from core.typings.file_types import CsvSource
+
+READ_BLOCK_SIZE = 16 * 1024 * 1024
+
+
+def _import_pyarrow() -> Any:
+    try:
+        import pyarrow  # noqa: PLC0415
+        import pyarrow.csv  # noqa: PLC0415, F401
+    except ImportError as e:
+        raise ImportError('The pyarrow CSV engine requires the "pyarrow" package') from e
+    return pyarrow
+
+
+def _csv_options(
+    column_types: Dict[str, str], sep: str, encoding: str, start: int = 0
+) -> Dict[str, Any]:
+    """
+    Builds the pyarrow read/parse/convert options: only the columns in
+    `column_types` are converted (the rest are pruned at parse time), each one with
+    its declared Arrow type, and empty cells become nulls like in the C engine.
+    The first `start` data rows are skipped unconverted.
+    """
+    pa = _import_pyarrow()
+    return {
+        'read_options': pa.csv.ReadOptions(
+            use_threads=True,
+            block_size=READ_BLOCK_SIZE,
+            encoding=encoding,
+            skip_rows_after_names=start,
+        ),
+        'parse_options': pa.csv.ParseOptions(delimiter=sep),
+        'convert_options': pa.csv.ConvertOptions(
+            include_columns=list(column_types),
+            column_types={col: pa.type_for_alias(t) for col, t in column_types.items()},
+            strings_can_be_null=True,
+        ),
+    }
+
+
+def _to_frame(table: Any, start: int = 0) -> pd.DataFrame:
+    df = table.to_pandas(types_mapper=pd.ArrowDtype)
+    df.index = pd.RangeIndex(start, start + len(df))
+    return df
+
+
+def read_csv_arrow(
+    source: CsvSource, column_types: Dict[str, str], sep: str = ',', encoding: str = 'utf-8'
+) -> pd.DataFrame:
+    """Reads a whole CSV into an Arrow-backed DataFrame.
+
+    Args:
+        source (CsvSource): path or binary buffer.
+        column_types (Dict[str, str]): CSV header -> Arrow type alias ('string',
+            'int64', ...) of every column to keep.
+        sep (str, optional): field delimiter. Defaults to ','.
+        encoding (str, optional): file encoding. Defaults to 'utf-8'.
+
+    Returns:
+        pd.DataFrame: DataFrame with `pd.ArrowDtype` columns.
+    """
+    pa = _import_pyarrow()
+    table = pa.csv.read_csv(source, **_csv_options(column_types, sep, encoding))
+    return _to_frame(table)
+
+
+def iter_csv_arrow(
+    source: CsvSource,
+    column_types: Dict[str, str],
+    chunksize: int,
+    start: int = 0,
+    **options: str,
+) -> Iterator[pd.DataFrame]:
+    """Streams a CSV as Arrow-backed DataFrames of at most `chunksize` rows.
+
+    pyarrow yields record batches sized in bytes, so they are re-sliced into
+    row chunks; the index keeps counting across chunks like `pd.read_csv`'s. With
+    `start` the stream begins at that data row, still indexed by its position.
+    `options` are `sep` and `encoding`, as in `read_csv_arrow`.
+    """
+    pa = _import_pyarrow()
+    sep, encoding = options.get('sep', ','), options.get('encoding', 'utf-8')
+    reader = pa.csv.open_csv(source, **_csv_options(column_types, sep, encoding, start))
+    pending = []
+    pending_rows = 0
+    offset = start
+
+    for batch in reader:
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        while pending_rows >= chunksize:
+            table = pa.Table.from_batches(pending, schema=reader.schema)
+            yield _to_frame(table.slice(0, chunksize), offset)
+            rest = table.slice(chunksize)
+            pending = rest.to_batches()
+            pending_rows = rest.num_rows
+            offset += chunksize
+
+    if pending_rows:
+        yield _to_frame(pa.Table.from_batches(pending, schema=reader.schema), offset)
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
 
 import pandas as pd
 
@@ -7,3 +8,6 @@ class BaseExtractor(ABC):
     @abstractmethod
     def extract(self) -> pd.DataFrame:
         raise NotImplementedError('extract method must be implemented')
+
+    def extract_chunks(self, chunksize: int, start: int = 0) -> Iterator[pd.DataFrame]:
+        raise NotImplementedError(f'{type(self).__name__} does not support chunked extraction')
@@ -1,7 +1,34 @@
 from abc import ABC, abstractmethod
+from typing import Any
+
+import pandas as pd
 
 
 class BaseLoader(ABC):
+    df: pd.DataFrame
+
     @abstractmethod
     def load(self) -> None:
         raise NotImplementedError('load method must be implemented')
+
+    def load_chunk(self, df: pd.DataFrame) -> None:
+        """
+        Loads the next chunk of a streamed run, reusing the state (lookup caches)
+        built while loading the previous ones.
+        """
+        self.df = df
+        self.load()
+
+    def finish(self) -> None:
+        """
+        Called once after the last chunk of a run, inside its transaction, for work
+        deferred across chunks.
+        """
+
+    def savepoint(self) -> Any:
+        """
+        State kept across chunks that `rollback_to` restores when the rows loaded
+        after this call are rolled back, e.g. ids of lookup rows created since
+        """
+
+    def rollback_to(self, state: Any) -> None: ...
@@ -1,21 +1,283 @@
+import json
+import logging
+import pickle
 from abc import ABC, abstractmethod
-from typing import Any, final
+from collections.abc import Iterator, Sequence
+from itertools import chain
+from pathlib import Path
+from typing import Any, Optional, cast, final
 
+import pandas as pd
+from django.db import transaction
 from pandas import DataFrame
 
+from core.ingestion.base_validator import (
+    VALIDATION_CHUNK_ROWS,
+    BaseValidator,
+    ValidationReport,
+)
+from core.ingestion.checkpoints import Checkpoint
+from core.ingestion.profiling import (
+    PipelineProfiler,
+    PipelineReport,
+    StageCollector,
+    default_collectors,
+)
+from core.ingestion.rejects import REJECTABLE_ERRORS, RejectWriter
+from core.ingestion.sharding import ShardSource, link_rows, write_shards
+
+logger = logging.getLogger(__name__)
+
 
 class BasePipeline(ABC):
+    """
+    Runs extract -> transform -> load over a report source.
+
+    With `chunksize` set the run streams: the extractor yields DataFrames of at most
+    `chunksize` rows and each one is transformed and loaded before the next is read,
+    so peak memory is bounded by the chunk size instead of the file size. The whole
+    run still commits or rolls back as a single transaction, and `_finish_load` runs
+    in it after the last chunk.
+
+    Every run is profiled per stage (see `core.ingestion.profiling`); `collectors`
+    are added to the default time, SQL and RSS collectors.
+
+    Pipelines that set `shard_key_columns` can also be split with `plan_shards` and
+    each shard run on its own (see `core.ingestion.sharding`); a `ShardSource` is
+    always streamed, one pickled part per chunk, and committed chunk by chunk, so
+    shards running in parallel hold their row locks for one chunk at a time.
+
+    With `rejects` every chunk is loaded in a savepoint, and the rows of a failing
+    chunk that fail on their own are quarantined while the others commit (see
+    `core.ingestion.rejects`); pipelines keeping load state across chunks restore
+    it through `_savepoint` and `_rollback_to`.
+
+    With `checkpoint` a streamed run commits chunk by chunk instead, recording how far
+    it got, and a later run with the same checkpoint resumes after the last committed
+    chunk (see `core.ingestion.checkpoints`). Shards are not checkpointed.
+
+    Pipelines implementing `_validator` can `validate` a source instead: a dry run
+    of extract and transform that never touches the database.
+    """
+
+    # Rows sharing a (transformed) value in any of these columns stay in one shard
+    shard_key_columns: tuple[str, ...] = ()
+    # Columns of values shared by all shards, handed to `_prepare_shards` up front
+    shard_lookup_columns: tuple[str, ...] = ()
+    # Source line of the first row, for rejects; None when rows are not lines
+    first_row_line: Optional[int] = None
+
+    def __init__(
+        self,
+        chunksize: Optional[int] = None,
+        collectors: Optional[Sequence[StageCollector]] = None,
+        rejects: Optional[RejectWriter] = None,
+        checkpoint: Optional[Checkpoint] = None,
+    ) -> None:
+        self.chunksize = chunksize
+        self.collectors = [*default_collectors(), *(collectors or [])]
+        self.rejects = rejects
+        self.checkpoint = checkpoint
+
+    @final
+    def run(self, source: Any) -> PipelineReport:
+        profiler = PipelineProfiler(self, self.collectors)
+        with profiler:
+            if not self.chunksize and not isinstance(source, ShardSource):
+                df = profiler.measure('extract', self._extract, source)
+                with transaction.atomic():
+                    self._process_chunk(profiler, df)
+                    self._finish_load()
+                profiler.report['chunks'] = 1
+            elif isinstance(source, ShardSource):
+                self._run_committing_chunks(profiler, source.chunks())
+            elif self.checkpoint is not None:
+                self._run_checkpointed(profiler, source, self.checkpoint)
+            else:
+                with transaction.atomic():
+                    chunks = self._extract_chunks(source, self.chunksize)
+                    for chunk in profiler.iterate('extract', chunks):
+                        self._process_chunk(profiler, chunk)
+                    # Not a load pass of its own: only counted in the run's wall time
+                    self._finish_load()
+
+        logger.info('Pipeline report: %s', json.dumps(profiler.report))
+        return profiler.report
+
+    def _run_checkpointed(
+        self, profiler: PipelineProfiler, source: Any, checkpoint: Checkpoint
+    ) -> None:
+        start = checkpoint.load()
+        if self.rejects is not None:
+            self.rejects.resume(start)
+        chunks = self._extract_chunks(source, cast(int, self.chunksize), start)
+        self._run_committing_chunks(profiler, chunks, checkpoint)
+
+    def _run_committing_chunks(
+        self,
+        profiler: PipelineProfiler,
+        chunks: Iterator[DataFrame],
+        checkpoint: Optional[Checkpoint] = None,
+    ) -> None:
+        """Each chunk's load and `_finish_load` (and checkpoint) in a transaction of its own"""
+        for chunk in profiler.iterate('extract', chunks):
+            if chunk.empty:
+                continue
+            with transaction.atomic():
+                self._process_chunk(profiler, chunk)
+                self._finish_load()
+                if checkpoint is not None:
+                    # Chunks are indexed by row position, whatever row the run started at
+                    checkpoint.save(int(chunk.index[-1]) + 1, profiler.report)
+
+    def _process_chunk(self, profiler: PipelineProfiler, chunk: DataFrame) -> None:
+        if self.rejects is None:
+            df = profiler.measure('transform', self._transform, chunk)
+            profiler.measure('load', self._load, df)
+            return
+
+        try:
+            # Transformers may work in place; the extracted rows are kept for rejects
+            df = profiler.measure('transform', self._transform, chunk.copy())
+        except REJECTABLE_ERRORS:
+            profiler.measure('quarantine', self._quarantine, chunk, None)
+            return
+
+        state = self._savepoint()
+        try:
+            with transaction.atomic():
+                profiler.measure('load', self._load, df)
+        except REJECTABLE_ERRORS:
+            self._rollback_to(state)
+            profiler.measure('quarantine', self._quarantine, chunk, df)
+
+    def _quarantine(self, chunk: DataFrame, df: Optional[DataFrame]) -> DataFrame:
+        """
+        Loads what it can of a chunk that failed to transform (`df` None) or to load
+        (`df` its transformed rows). The rows failing the transform are singled out
+        first, by bisecting the transform alone, and the others loaded in one
+        savepoint, bisected down to the rows failing the load on their own. Returns
+        the rejected rows.
+        """
+        rejected: list[DataFrame] = []
+        if df is None:
+            transformed = self._transform_apart(chunk, rejected)
+            if transformed:
+                self._load_apart(chunk, pd.concat(transformed), rejected)
+        else:
+            self._load_halves(chunk, df, rejected)
+        return pd.concat(rejected) if rejected else chunk.iloc[:0]
+
+    def _transform_apart(self, chunk: DataFrame, rejected: list[DataFrame]) -> list[DataFrame]:
+        try:
+            return [self._transform(chunk.copy())]
+        except REJECTABLE_ERRORS as error:
+            if len(chunk) == 1:
+                rejected.append(self._reject(chunk, error))
+                return []
+            # Errors naming their rows (e.g. `InvalidCurrencyError`) need no bisecting
+            named = chunk.index.isin([*chain(*getattr(error, 'invalid_rows', {}).values())])
+            if named.any():
+                rejected.append(self._reject(chunk[named], error))
+                return self._transform_apart(chunk[~named], rejected) if not named.all() else []
+            middle = len(chunk) // 2
+            return [
+                *self._transform_apart(chunk.iloc[:middle], rejected),
+                *self._transform_apart(chunk.iloc[middle:], rejected),
+            ]
+
+    def _load_apart(self, chunk: DataFrame, df: DataFrame, rejected: list[DataFrame]) -> None:
+        state = self._savepoint()
+        try:
+            with transaction.atomic():
+                self._load(df)
+        except REJECTABLE_ERRORS as error:
+            self._rollback_to(state)
+            if len(df) == 1:
+                # Transformed rows keep the index of the extracted ones
+                rejected.append(self._reject(chunk.loc[df.index], error))
+            else:
+                self._load_halves(chunk, df, rejected)
+
+    def _load_halves(self, chunk: DataFrame, df: DataFrame, rejected: list[DataFrame]) -> None:
+        middle = len(df) // 2
+        for part in (df.iloc[:middle], df.iloc[middle:]):
+            if not part.empty:
+                self._load_apart(chunk, part, rejected)
+
+    def _reject(self, rows: DataFrame, error: Exception) -> DataFrame:
+        cast(RejectWriter, self.rejects).write(rows, error, self.first_row_line)
+        return rows
+
+    @final
+    def plan_shards(self, source: Any, shard_rows: int, workdir: Path) -> list[ShardSource]:
+        """
+        Extracts `source` into shards of about `shard_rows` rows under `workdir` and
+        prepares the rows all shards share (see `_prepare_shards`). Extraction streams
+        in chunks of `chunksize` (or `shard_rows`) rows; only the key and lookup columns
+        of the whole file are held in memory.
+        """
+        if not self.shard_key_columns:
+            raise NotImplementedError(f'{type(self).__name__} does not support sharding')
+
+        key_columns = [*self.shard_key_columns, *self.shard_lookup_columns]
+        chunk_paths: list[Path] = []
+        keys: list[DataFrame] = []
+        for index, chunk in enumerate(self._extract_chunks(source, self.chunksize or shard_rows)):
+            chunk_path = workdir / f'chunk-{index}.pkl'
+            chunk.to_pickle(chunk_path, protocol=pickle.HIGHEST_PROTOCOL)
+            chunk_paths.append(chunk_path)
+            # Keys are compared as the loader sees them, e.g. e-mails lower-cased
+            keys.append(self._transform(chunk[key_columns].copy()))
+
+        all_keys = pd.concat(keys, ignore_index=True) if keys else DataFrame(columns=key_columns)
+        self._prepare_shards(all_keys[list(self.shard_lookup_columns)])
+        labels = link_rows(all_keys[list(self.shard_key_columns)])
+        return write_shards(chunk_paths, labels, shard_rows, workdir)
+
     @final
-    def run(self, source: Any):
-        df = self._extract(source)
-        df = self._transform(df)
-        self._load(df)
+    def validate(self, source: Any) -> ValidationReport:
+        """
+        Extracts and transforms `source` in chunks, coercing parse errors, and
+        reports the rows the load would reject or skip (see
+        `core.ingestion.base_validator`). Nothing is written.
+        """
+        validator = self._validator()
+        for chunk in self._extract_chunks(source, self.chunksize or VALIDATION_CHUNK_ROWS):
+            validator.validate(chunk)
+        return validator.report()
+
+    def _savepoint(self) -> Any:
+        """
+        In-memory load state (caches, pending totals...) to restore with
+        `_rollback_to` when the rows loaded after this call are rolled back
+        """
+
+    def _rollback_to(self, state: Any) -> None: ...
+
+    def _prepare_shards(self, lookups: DataFrame) -> None:
+        """
+        Creates the rows referenced by `shard_lookup_columns` (statuses, groups...)
+        before shards run, so parallel shards only read them and never race to insert
+        the same one.
+        """
+
+    def _finish_load(self) -> None:
+        """Runs after the last `_load` of a run, in the same transaction"""
 
     @abstractmethod
     def _extract(self, source: Any) -> DataFrame: ...
 
+    @abstractmethod
+    def _extract_chunks(self, source: Any, chunksize: int, start: int = 0) -> Iterator[DataFrame]:
+        """Chunks of `source` from its data row `start` on, indexed by row position"""
+
     @abstractmethod
     def _transform(self, df: DataFrame) -> DataFrame: ...
 
     @abstractmethod
     def _load(self, df: DataFrame) -> None: ...
+
+    @abstractmethod
+    def _validator(self) -> BaseValidator:
+        """Fresh validator of the transformed chunks, for `validate`"""
@@ -0,0 +1,173 @@
+"""
+Dry-run validation of a report: extract and transform it without touching the
+database and report every row that would fail or be skipped by the load.
+
+Chunks are transformed with parse errors coerced to nulls, then checked column by
+column with vectorized masks (no per-row models). Keys that must agree across the
+whole file (e.g. an `order_number` and its `order_id`) are collected per chunk and
+checked once at the end. Only the first `max_rows` row indexes of each issue are
+kept, so the report stays small for files of millions of rows.
+"""
+
+from collections.abc import Callable, Sequence
+from typing import Dict, Optional, TypedDict
+
+import numpy as np
+import pandas as pd
+from django.db.models import Model
+
+MAX_ISSUE_ROWS = 50
+VALIDATION_CHUNK_ROWS = 50_000
+EMAIL_PATTERN = r'^[^@\s]+@[^@\s]+\.[^@\s]+$'
+
+
+class ValidationIssue(TypedDict):
+    check: str
+    column: str
+    count: int
+    rows: list[int]
+
+
+class ValidationReport(TypedDict):
+    valid: bool
+    rows: int
+    issues: list[ValidationIssue]
+
+
+class BaseValidator:
+    """
+    Subclasses declare the checks of a report on its transformed columns:
+
+    - `required_columns`: must be present and non-null ('missing_column',
+      'missing_value');
+    - `parsed_columns`: null after the transform although set in the file, i.e.
+      unparseable ('invalid_<kind>', e.g. 'invalid_date');
+    - `integer_columns`: whole numbers within the model field's range;
+    - `model_fields`: column -> model field, whose `max_length` and decimal digits
+      bound the values ('too_long', 'out_of_range');
+    - `consistent_keys`: (key, value) pairs where rows repeating a key must repeat
+      its value ('conflicting_<key>'), checked over the whole file.
+
+    `check_chunk` adds the report-specific checks.
+    """
+
+    required_columns: Sequence[str] = ()
+    parsed_columns: Dict[str, str] = {}
+    integer_columns: Sequence[str] = ()
+    model_fields: Dict[str, tuple[type[Model], str]] = {}
+    consistent_keys: Sequence[tuple[str, str]] = ()
+
+    def __init__(
+        self,
+        transform: Callable[[pd.DataFrame], pd.DataFrame],
+        max_rows: int = MAX_ISSUE_ROWS,
+    ) -> None:
+        self.transform = transform
+        self.max_rows = max_rows
+        self.rows = 0
+        self.issues: Dict[tuple[str, str], ValidationIssue] = {}
+        self._keys: list[pd.DataFrame] = []
+
+    def validate(self, raw: pd.DataFrame) -> None:
+        """Checks one extracted chunk"""
+        self.rows += len(raw)
+        present = raw.notna()
+        df = self.transform(raw.copy())
+
+        missing = [column for column in self.required_columns if column not in df.columns]
+        for column in missing:
+            # Counted on every row, but no row is listed
+            self.add('missing_column', column, np.ones(len(df), dtype=bool), index=[])
+        for column in self.required_columns:
+            if column in missing:
+                continue
+            nulls = df[column].isna()
+            if column in self.parsed_columns and column in present.columns:
+                nulls &= ~present[column]  # reported as unparseable instead
+            self.add('missing_value', column, nulls)
+
+        for column, kind in self.parsed_columns.items():
+            if column in df.columns and column in present.columns:
+                self.add(f'invalid_{kind}', column, df[column].isna() & present[column])
+
+        for column in self.integer_columns:
+            if column in df.columns:
+                self._check_integer(df, column)
+        for column, (model, name) in self.model_fields.items():
+            if column in df.columns:
+                self._check_field_limits(df, column, model._meta.get_field(name))
+
+        self.check_chunk(df)
+
+        columns = {column for pair in self.consistent_keys for column in pair}
+        if columns <= set(df.columns):
+            self._keys.append(df[sorted(columns)])
+
+    def check_chunk(self, df: pd.DataFrame) -> None:
+        """Report-specific checks of a transformed chunk"""
+
+    def report(self) -> ValidationReport:
+        self._check_consistent_keys()
+        issues = list(self.issues.values())
+        return {'valid': not issues, 'rows': self.rows, 'issues': issues}
+
+    def add(
+        self,
+        check: str,
+        column: str,
+        mask: pd.Series | np.ndarray,
+        index: Optional[Sequence[int]] = None,
+    ) -> None:
+        """Records the rows flagged by `mask` (row indexes taken from `index` or the mask)"""
+        flags = np.asarray(mask, dtype=bool)
+        count = int(flags.sum())
+        if not count:
+            return
+
+        issue = self.issues.setdefault(
+            (check, column), {'check': check, 'column': column, 'count': 0, 'rows': []}
+        )
+        issue['count'] += count
+        room = self.max_rows - len(issue['rows'])
+        if room > 0:
+            rows = index if index is not None else mask.index[flags]  # type: ignore[union-attr]
+            issue['rows'].extend(int(row) for row in list(rows)[:room])
+
+    def email_check(self, df: pd.DataFrame, column: str = 'email') -> None:
+        if column in df.columns:
+            values = df[column].dropna().astype(str)
+            self.add('invalid_email', column, ~values.str.match(EMAIL_PATTERN))
+
+    def _check_integer(self, df: pd.DataFrame, column: str) -> None:
+        values = pd.to_numeric(df[column], errors='coerce')
+        present = df[column].notna()
+        invalid = present & (values.isna() | (values % 1 != 0))
+        self.add('invalid_integer', column, invalid)
+
+    def _check_field_limits(self, df: pd.DataFrame, column: str, field) -> None:
+        values = df[column].dropna()
+        max_length = getattr(field, 'max_length', None)
+        if max_length:
+            self.add('too_long', column, values.astype(str).str.len() > max_length)
+
+        internal_type = field.get_internal_type()
+        if internal_type == 'DecimalField':
+            # Amounts are integer centavos by now, i.e. already carry the 2 decimal places
+            numbers = pd.to_numeric(values, errors='coerce')
+            self.add('out_of_range', column, numbers.abs() >= 10**field.max_digits)
+        elif internal_type in {'IntegerField', 'PositiveIntegerField'}:
+            numbers = pd.to_numeric(values, errors='coerce')
+            low = 0 if internal_type == 'PositiveIntegerField' else -(2**31)
+            self.add('out_of_range', column, (numbers < low) | (numbers >= 2**31))
+
+    def _check_consistent_keys(self) -> None:
+        if not self._keys:
+            return
+
+        keys = pd.concat(self._keys)
+        self._keys = []
+        for key, value in self.consistent_keys:
+            rows = keys[keys[key].notna()]
+            first = rows.groupby(key, sort=False)[value].transform('first')
+            conflict = rows[value].astype(str) != first.astype(str)
+            self.add(f'conflicting_{key}', key, conflict)
@@ -0,0 +1,32 @@
+"""
+Resumable pipeline runs.
+
+A streamed run given a `Checkpoint` commits every chunk on its own: the chunk's load,
+`_finish_load` and `Checkpoint.save` of the rows read so far share one transaction,
+so the saved position never gets ahead of (or falls behind) the rows in the database.
+When the run is interrupted, a new run with the same checkpoint asks `Checkpoint.load`
+where to start and the extractor skips straight to that row: CSV and NDJSON rows
+before it are only tokenized, Parquet row groups before it are not read at all.
+
+Positions are data rows rather than byte offsets: compressed sources cannot seek and
+the parsers do not expose where a chunk ended, while a row count works for every
+format. The price is that an interrupted run gives up the all-or-nothing import; the
+chunks committed before a failure stay loaded.
+"""
+
+from abc import ABC, abstractmethod
+
+from core.ingestion.profiling import PipelineReport
+
+
+class Checkpoint(ABC):
+    @abstractmethod
+    def load(self) -> int:
+        """Data rows of the source already committed, where the run starts"""
+
+    @abstractmethod
+    def save(self, rows: int, report: PipelineReport) -> None:
+        """
+        Records that the first `rows` data rows are committed, with the report of the
+        run so far. Called in the transaction of the chunk that ends at `rows`.
+        """
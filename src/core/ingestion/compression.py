@@ -0,0 +1,95 @@
+"""
+Compressed report sources: gzip, zstd and single-entry zip files.
+
+The format is told by the file's magic bytes, not its name, so a report keeps
+working after being stored under a temporary name. `open_source` hands the CSV
+readers a stream that inflates the file as they consume it; the decompressed
+content never touches the disk.
+
+zstd support needs the optional `zstandard` package (`erp-bridges-backend[zstd]`),
+imported lazily like pyarrow.
+"""
+
+import gzip
+import zipfile
+from collections.abc import Iterator
+from contextlib import ExitStack, contextmanager
+from io import BytesIO, StringIO
+from typing import IO, Any, Literal, Optional
+
+from core.typings.file_types import CsvSource
+
+Compression = Literal['gzip', 'zstd', 'zip']
+
+MAGIC_NUMBERS: dict[bytes, Compression] = {
+    b'\x1f\x8b': 'gzip',
+    b'\x28\xb5\x2f\xfd': 'zstd',
+    b'PK\x03\x04': 'zip',
+}
+MAGIC_LENGTH = max(len(magic) for magic in MAGIC_NUMBERS)
+
+
+def _import_zstandard() -> Any:
+    try:
+        import zstandard  # noqa: PLC0415
+    except ImportError as e:
+        raise ImportError('Reading .zst reports requires the "zstandard" package') from e
+    return zstandard
+
+
+def detect_compression(source: CsvSource) -> Optional[Compression]:
+    """Tells the compression of a path or binary buffer from its first bytes.
+
+    Args:
+        source (CsvSource): path or buffer; text buffers are never compressed.
+            Buffers are read from their current position, without copying them.
+
+    Returns:
+        Optional[Compression]: 'gzip', 'zstd', 'zip' or None for plain files.
+    """
+    if isinstance(source, StringIO):
+        return None
+    if isinstance(source, BytesIO):
+        position = source.tell()
+        with source.getbuffer() as buffer:
+            head = bytes(buffer[position : position + MAGIC_LENGTH])
+    else:
+        with open(source, 'rb') as f:
+            head = f.read(MAGIC_LENGTH)
+
+    for magic, compression in MAGIC_NUMBERS.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+@contextmanager
+def open_source(source: CsvSource) -> Iterator[CsvSource]:
+    """
+    Yields `source` itself when it is not compressed, otherwise a binary stream of
+    its decompressed content. Zip archives must hold exactly one file.
+    """
+    compression = detect_compression(source)
+    if compression is None:
+        yield source
+        return
+
+    with ExitStack() as stack:
+        raw: IO[bytes] = (
+            source if isinstance(source, BytesIO) else stack.enter_context(open(source, 'rb'))
+        )
+        yield _decompress(compression, raw, stack)
+
+
+def _decompress(compression: Compression, raw: IO[bytes], stack: ExitStack) -> IO[bytes]:
+    if compression == 'gzip':
+        return stack.enter_context(gzip.GzipFile(fileobj=raw, mode='rb'))
+    if compression == 'zstd':
+        reader = _import_zstandard().ZstdDecompressor().stream_reader(raw, closefd=False)
+        return stack.enter_context(reader)
+
+    archive = stack.enter_context(zipfile.ZipFile(raw))
+    entries = [entry for entry in archive.infolist() if not entry.is_dir()]
+    if len(entries) != 1:
+        raise ValueError(f'Zip reports must hold exactly one file, found {len(entries)}')
+    return stack.enter_context(archive.open(entries[0]))
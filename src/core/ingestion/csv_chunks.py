@@ -0,0 +1,55 @@
+"""
+Chunked CSV reading through pandas' C engine, from any data row.
+
+Resuming at row `start` reads the header, then has the parser skip `start` records:
+the tokenizer still scans them (it has to, to honor quoted line breaks) but no field
+is converted or kept, so skipping costs a fraction of reading them.
+"""
+
+import csv
+import os
+from collections.abc import Iterator
+from contextlib import ExitStack
+
+import pandas as pd
+
+from core.ingestion.compression import open_source
+from core.typings.file_types import CsvSource
+
+
+def iter_csv_chunks(
+    source: CsvSource, chunksize: int, start: int = 0, **options
+) -> Iterator[pd.DataFrame]:
+    """Streams a (possibly compressed) CSV in DataFrames of at most `chunksize` rows.
+
+    Args:
+        source (CsvSource): path or buffer.
+        chunksize (int): rows per DataFrame.
+        start (int, optional): data row (header not counted) to start at. Defaults to 0.
+        **options: `pd.read_csv` options; `sep` and `encoding` also apply to the header.
+
+    Yields:
+        pd.DataFrame: chunks indexed by their row position in the file, as if it had
+            been read from the first row.
+    """
+    with open_source(source) as opened, ExitStack() as stack:
+        if not start:
+            yield from stack.enter_context(pd.read_csv(opened, chunksize=chunksize, **options))
+            return
+
+        stream = opened
+        if isinstance(opened, (str, os.PathLike)):
+            stream = stack.enter_context(open(opened, 'rb'))
+        header = stream.readline()
+        if isinstance(header, bytes):
+            header = header.decode(options.get('encoding', 'utf-8'))
+        names = next(csv.reader([header.lstrip('\ufeff')], delimiter=options.get('sep', ',')))
+
+        reader = stack.enter_context(
+            pd.read_csv(
+                stream, chunksize=chunksize, header=None, names=names, skiprows=start, **options
+            )
+        )
+        for chunk in reader:
+            chunk.index += start
+            yield chunk
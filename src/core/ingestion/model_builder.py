@@ -0,0 +1,92 @@
+"""
+Model instances built straight from DataFrame columns.
+
+Loaders used to walk their frames row by row (`iterrows` builds a Series per row)
+and put each row's values in a dict for `Model(**data)`. `ModelBuilder` converts
+each column to Python values once, with nulls as None, and passes each row to the
+model's constructor positionally, in `_meta.concrete_fields` order, with the
+fields it does not set filled from default columns: the argument path querysets
+build their rows through, which skips resolving keywords against the fields. The
+instances are still built by `Model.__init__`: defaults, init signals and `_state`
+included.
+"""
+
+from collections.abc import Iterable, Iterator, Sequence
+from itertools import repeat
+from typing import Any, Generic, TypeVar
+
+import numpy as np
+import pandas as pd
+from django.db.models import DEFERRED, Field, Model
+
+M = TypeVar('M', bound=Model)
+
+
+class ModelBuilder(Generic[M]):
+    """
+    Builds unsaved `model` instances, or tuples of their values, from the rows of a
+    DataFrame. Each of `fields` is read from the column of the same name, unless an
+    array for it is passed by keyword; foreign keys take the related pk (e.g.
+    `customer_group=group_ids`), never instances.
+    """
+
+    def __init__(self, model: type[M], fields: Sequence[str]) -> None:
+        self.model = model
+        self.fields = list(fields)
+        self.attnames = [model._meta.get_field(field).attname for field in fields]
+        # Positional arguments stop at the last of `fields`; `Model.__init__` gives the
+        # fields after it their defaults. Each one before it is either the index of
+        # one of `fields` or a field to fill with its default.
+        concrete = [field.attname for field in model._meta.concrete_fields]
+        width = max((concrete.index(attname) + 1 for attname in self.attnames), default=0)
+        self._arguments: list[int | Field] = [
+            self.attnames.index(field.attname) if field.attname in self.attnames else field
+            for field in model._meta.concrete_fields[:width]
+        ]
+
+    def rows(self, df: pd.DataFrame, **arrays: Any) -> Iterator[tuple]:
+        """Tuples of the values of `fields` (in that order) per row of `df`"""
+        return zip(*self._columns(df, **arrays))
+
+    def instances(self, df: pd.DataFrame, **arrays: Any) -> list[M]:
+        """One unsaved instance per row of `df`"""
+        if not self._arguments:
+            return [self.model() for _ in range(len(df))]
+
+        columns = self._columns(df, **arrays)
+        rows = len(columns[0])
+        arguments = [
+            columns[argument] if isinstance(argument, int) else _defaults(argument, rows)
+            for argument in self._arguments
+        ]
+        return list(map(self.model, *arguments))
+
+    def _columns(self, df: pd.DataFrame, **arrays: Any) -> list[list]:
+        return [python_values(arrays.get(field, df.get(field))) for field in self.fields]
+
+
+def _defaults(field: Field, rows: int) -> Iterable:
+    """The value `Model.__init__` gives `field` when it is not passed, for each row"""
+    if field.generated:
+        # Left unset, as computed by the database
+        return repeat(DEFERRED, rows)
+    if field.has_default() and callable(field.default):
+        # Evaluated for every instance (e.g. `default=uuid4`)
+        return [field.get_default() for _ in range(rows)]
+    return repeat(field.get_default(), rows)
+
+
+def python_values(values: Any) -> list:
+    """
+    The values of a column (Series, NumPy or Arrow array, list) as a list of Python
+    objects, with None for nulls (NA, NaN, NaT)
+    """
+    if values is None:
+        raise KeyError('ModelBuilder field missing from both the DataFrame and the arrays')
+    if isinstance(values, (pd.Series, pd.Index)):
+        return values.to_numpy(dtype=object, na_value=None).tolist()
+    if isinstance(values, np.ndarray):
+        return python_values(pd.Series(values, copy=False))
+    if hasattr(values, 'to_pylist'):
+        return values.to_pylist()
+    return list(values)
@@ -0,0 +1,234 @@
+"""
+Native bulk loading for PostgreSQL: rows are streamed with `COPY ... FROM STDIN` into a
+staging table and merged into the model table with one set-based statement.
+
+Staging tables are created as TEMPORARY ... ON COMMIT DROP: like UNLOGGED tables they
+skip the WAL, and being private to the session they never collide between workers
+loading in parallel. They only live inside a transaction, so callers must run within
+`transaction.atomic()`.
+
+Works with psycopg 3 (`cursor.copy`) and psycopg2 (`cursor.copy_expert`). Loaders only
+use it when `REPORT_INGESTION_LOADER_BACKEND` is 'copy' and the database is PostgreSQL,
+see `default_backend`.
+"""
+
+import io
+import zlib
+from collections.abc import Iterator, Sequence
+from typing import Literal, Optional
+
+import pandas as pd
+from django.conf import settings
+from django.db import connections
+from django.db.models import Field, Model
+
+LoaderBackend = Literal['orm', 'copy']
+
+# CSV null marker: keeps empty strings and NULLs apart
+COPY_NULL = r'\N'
+COPY_BATCH_ROWS = 50_000
+
+
+def default_backend(using: str = 'default') -> LoaderBackend:
+    """
+    `REPORT_INGESTION_LOADER_BACKEND`, 'orm' unless set to 'copy'; other vendors than
+    PostgreSQL (e.g. SQLite in tests) always get 'orm'
+    """
+    if settings.REPORT_INGESTION_LOADER_BACKEND != 'copy':
+        return 'orm'
+    return 'copy' if connections[using].vendor == 'postgresql' else 'orm'
+
+
+class CopyWriter:
+    """
+    COPY-based bulk writes for one model. DataFrame columns are the model's field
+    names or attnames (e.g. 'customer_id'), holding values in database representation.
+    """
+
+    def __init__(self, model: type[Model], using: str = 'default') -> None:
+        self.model = model
+        self.using = using
+        self.connection = connections[using]
+        self.qn = self.connection.ops.quote_name
+
+    def upsert(
+        self,
+        df: pd.DataFrame,
+        unique_fields: Optional[Sequence[str]],
+        update_fields: Sequence[str] = (),
+    ) -> None:
+        """Merges `df` with one INSERT ... ON CONFLICT.
+
+        Args:
+            df (pd.DataFrame): rows to merge.
+            unique_fields (Optional[Sequence[str]]): conflict target. None ignores a
+                conflict on any unique constraint (ON CONFLICT DO NOTHING).
+            update_fields (Sequence[str], optional): fields overwritten on conflict;
+                empty keeps the stored row. Defaults to ().
+        """
+        if df.empty:
+            return
+
+        staging = self._stage(df)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                self.upsert_sql(staging, list(df.columns), unique_fields, update_fields)
+            )
+
+    def update(self, df: pd.DataFrame, key_field: str, update_fields: Sequence[str]) -> None:
+        """Applies `df` to the rows matching on `key_field` with one UPDATE ... FROM"""
+        if df.empty:
+            return
+
+        staging = self._stage(df)
+        with self.connection.cursor() as cursor:
+            cursor.execute(self.update_from_sql(staging, key_field, update_fields))
+
+    def frame(self, instances: Sequence[Model], fields: Sequence[str]) -> pd.DataFrame:
+        """Collects the `fields` of model instances into a DataFrame keyed by attname"""
+        attnames = [field.attname for field in self._fields(fields)]
+        return pd.DataFrame.from_records(
+            [[getattr(instance, attname) for attname in attnames] for instance in instances],
+            columns=attnames,
+        )
+
+    def allocate_ids(self, count: int) -> list[int]:
+        """Reserves `count` primary keys from the model's id sequence"""
+        if not count:
+            return []
+
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)',
+                [self.model._meta.db_table, self.model._meta.pk.column, count],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def staging_table_sql(self, staging: str, columns: Sequence[str]) -> str:
+        definitions = ', '.join(
+            f'{self.qn(field.column)} {self._staging_type(field)}'
+            for field in self._fields(columns)
+        )
+        return (
+            f'CREATE TEMPORARY TABLE IF NOT EXISTS {self.qn(staging)} ({definitions}) '
+            'ON COMMIT DROP'
+        )
+
+    def copy_sql(self, staging: str, columns: Sequence[str]) -> str:
+        return (
+            f'COPY {self.qn(staging)} ({self._columns(columns)}) '
+            f"FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')"
+        )
+
+    def upsert_sql(
+        self,
+        staging: str,
+        columns: Sequence[str],
+        unique_fields: Optional[Sequence[str]],
+        update_fields: Sequence[str],
+    ) -> str:
+        fields = self._fields(columns)
+        # auto_now / auto_now_add are set in Python by the ORM, so they are filled here
+        timestamps = [
+            field
+            for field in self.model._meta.concrete_fields
+            if (getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False))
+            and field not in fields
+        ]
+        insert_columns = ', '.join(self.qn(field.column) for field in [*fields, *timestamps])
+        select_columns = ', '.join([
+            *(self.qn(field.column) for field in fields),
+            *['now()'] * len(timestamps),
+        ])
+        sql = (
+            f'INSERT INTO {self.qn(self.model._meta.db_table)} ({insert_columns}) '
+            f'SELECT {select_columns} FROM {self.qn(staging)}'
+        )
+
+        if unique_fields is None:
+            return f'{sql} ON CONFLICT DO NOTHING'
+        if not update_fields:
+            return f'{sql} ON CONFLICT ({self._columns(unique_fields)}) DO NOTHING'
+
+        # EXCLUDED only holds the staged columns: any other would be set to its default
+        unstaged = [
+            name
+            for name, field in zip(update_fields, self._fields(update_fields))
+            if field not in fields
+        ]
+        if unstaged:
+            raise ValueError(f'Update fields missing from the staged columns: {unstaged}')
+
+        assignments = ', '.join([
+            *(
+                f'{self.qn(field.column)} = EXCLUDED.{self.qn(field.column)}'
+                for field in self._fields(update_fields)
+            ),
+            *self._touch_assignments(update_fields),
+        ])
+        return f'{sql} ON CONFLICT ({self._columns(unique_fields)}) DO UPDATE SET {assignments}'
+
+    def update_from_sql(self, staging: str, key_field: str, update_fields: Sequence[str]) -> str:
+        table = self.qn(self.model._meta.db_table)
+        key = self.qn(self.model._meta.get_field(key_field).column)
+        assignments = ', '.join([
+            *(
+                f'{self.qn(field.column)} = staging.{self.qn(field.column)}'
+                for field in self._fields(update_fields)
+            ),
+            *self._touch_assignments(update_fields),
+        ])
+        return (
+            f'UPDATE {table} SET {assignments} FROM {self.qn(staging)} AS staging '
+            f'WHERE {table}.{key} = staging.{key}'
+        )
+
+    def _touch_assignments(self, update_fields: Sequence[str]) -> list[str]:
+        """`auto_now` columns set to now() on update, as `Model.save` does"""
+        updated = self._fields(update_fields)
+        return [
+            f'{self.qn(field.column)} = now()'
+            for field in self.model._meta.concrete_fields
+            if getattr(field, 'auto_now', False) and field not in updated
+        ]
+
+    def _stage(self, df: pd.DataFrame) -> str:
+        """Creates (or empties) a staging table for `df` columns and COPYs `df` into it"""
+        columns = list(df.columns)
+        # One staging table per column set, as it outlives the call until commit
+        suffix = zlib.crc32(','.join(columns).encode())
+        staging = f'staging_{self.model._meta.db_table}_{suffix}'
+        with self.connection.cursor() as cursor:
+            cursor.execute(self.staging_table_sql(staging, columns))
+            cursor.execute(f'TRUNCATE {self.qn(staging)}')
+
+            sql = self.copy_sql(staging, columns)
+            raw = cursor.cursor  # the DB-API cursor under Django's wrapper
+            if hasattr(raw, 'copy'):
+                with raw.copy(sql) as copy:
+                    for data in to_copy_csv(df):
+                        copy.write(data)
+            else:
+                for data in to_copy_csv(df):
+                    raw.copy_expert(sql, io.StringIO(data))
+        return staging
+
+    def _fields(self, names: Sequence[str]) -> list[Field]:
+        return [self.model._meta.get_field(name) for name in names]
+
+    def _columns(self, names: Sequence[str]) -> str:
+        return ', '.join(self.qn(field.column) for field in self._fields(names))
+
+    def _staging_type(self, field: Field) -> str:
+        # Identity/serial primary keys become plain integers in the staging table;
+        # relations already report the type of the column they point at
+        if field.primary_key:
+            return field.rel_db_type(self.connection)
+        return field.db_type(self.connection)
+
+
+def to_copy_csv(df: pd.DataFrame) -> Iterator[str]:
+    """Renders `df` as COPY csv text in batches of `COPY_BATCH_ROWS` rows"""
+    for start in range(0, len(df), COPY_BATCH_ROWS):
+        batch = df.iloc[start : start + COPY_BATCH_ROWS]
+        yield batch.to_csv(index=False, header=False, na_rep=COPY_NULL)
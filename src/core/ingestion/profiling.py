@@ -0,0 +1,265 @@
+"""
+Per-stage metrics for `BasePipeline.run`.
+
+A run goes through the extract, transform and load stages; in streaming mode each stage
+is entered once per chunk and its metrics add up over the run. The profiler itself
+records the rows in and out of every stage and the memory footprint of the DataFrames
+it produces; everything else comes from collectors. The defaults record wall and CPU
+time, SQL query count and time, and the growth of the process peak RSS. Extra
+`StageCollector` subclasses can be passed to a pipeline to add their own keys.
+"""
+
+import sys
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import AbstractContextManager, ExitStack
+from typing import Any, Dict, NotRequired, Optional, TypedDict, TypeVar
+
+from django.db import connection
+from pandas import DataFrame
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+STAGES = ('extract', 'transform', 'load')
+
+T = TypeVar('T')
+
+
+class StageMetrics(TypedDict, total=False):
+    calls: int
+    rows_in: int
+    rows_out: int
+    memory_bytes: int
+    wall_seconds: float
+    cpu_seconds: float
+    peak_rss_delta_kb: int
+    queries: int
+    query_seconds: float
+
+
+class PipelineReport(TypedDict):
+    pipeline: str
+    chunksize: Optional[int]
+    chunks: int
+    rows: int
+    wall_seconds: float
+    stages: Dict[str, StageMetrics]
+    # Set on reports merged from the shards of one run (see `merge_reports`)
+    shards: NotRequired[int]
+
+
+class StageCollector:
+    """
+    Hook interface for pipeline metrics. Every method is optional; `stage_finished`
+    receives the metrics of the stage accumulated so far (row counts already include
+    the pass that just finished) and adds its own to them.
+    A collector is reused across runs of the same pipeline, so `run_started` should
+    reset any per-run state.
+    """
+
+    def contexts(self) -> list[AbstractContextManager]:
+        """Context managers kept open for the whole run, e.g. DB execute wrappers"""
+        return []
+
+    def run_started(self, pipeline: Any) -> None: ...
+
+    def stage_started(self, stage: str) -> None: ...
+
+    def stage_finished(self, stage: str, metrics: StageMetrics) -> None: ...
+
+    def run_finished(self, report: PipelineReport) -> None: ...
+
+
+class TimeCollector(StageCollector):
+    """Wall-clock and process CPU time per stage"""
+
+    def stage_started(self, stage: str) -> None:
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+
+    def stage_finished(self, stage: str, metrics: StageMetrics) -> None:
+        metrics['wall_seconds'] = metrics.get('wall_seconds', 0.0) + (
+            time.perf_counter() - self._wall
+        )
+        metrics['cpu_seconds'] = metrics.get('cpu_seconds', 0.0) + (
+            time.process_time() - self._cpu
+        )
+
+
+class SqlCollector(StageCollector):
+    """Number and total time of the SQL queries run on the default connection per stage"""
+
+    def __init__(self) -> None:
+        self._stage: Optional[str] = None
+        self._queries = 0
+        self._seconds = 0.0
+
+    def contexts(self) -> list[AbstractContextManager]:
+        return [connection.execute_wrapper(self)]
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if self._stage:
+                self._queries += 1
+                self._seconds += time.perf_counter() - started
+
+    def stage_started(self, stage: str) -> None:
+        self._stage = stage
+        self._queries = 0
+        self._seconds = 0.0
+
+    def stage_finished(self, stage: str, metrics: StageMetrics) -> None:
+        self._stage = None
+        metrics['queries'] = metrics.get('queries', 0) + self._queries
+        metrics['query_seconds'] = metrics.get('query_seconds', 0.0) + self._seconds
+
+
+class RssCollector(StageCollector):
+    """
+    How much each stage raised the process peak RSS. The peak is a high-water mark, so
+    a stage that reuses memory freed by an earlier one reports no growth.
+    """
+
+    def stage_started(self, stage: str) -> None:
+        self._peak = _peak_rss_kb()
+
+    def stage_finished(self, stage: str, metrics: StageMetrics) -> None:
+        if self._peak is not None:
+            growth = _peak_rss_kb() - self._peak
+            metrics['peak_rss_delta_kb'] = metrics.get('peak_rss_delta_kb', 0) + growth
+
+
+def _peak_rss_kb() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def merge_reports(reports: list[PipelineReport], wall_seconds: float) -> PipelineReport:
+    """
+    Combines the reports of the shards of one run. Stage metrics are summed, so times
+    are worker time across shards, except `memory_bytes` which keeps the largest one;
+    `wall_seconds` is the elapsed time of the whole run, measured by the caller.
+    """
+    merged: PipelineReport = {
+        'pipeline': reports[0]['pipeline'] if reports else '',
+        'chunksize': reports[0]['chunksize'] if reports else None,
+        'chunks': sum(report['chunks'] for report in reports),
+        'rows': sum(report['rows'] for report in reports),
+        'wall_seconds': wall_seconds,
+        'stages': {stage: {} for stage in STAGES},
+        'shards': len(reports),
+    }
+    for report in reports:
+        for stage, metrics in report['stages'].items():
+            totals = merged['stages'].setdefault(stage, {})
+            for key, value in metrics.items():
+                if key == 'memory_bytes':
+                    totals[key] = max(totals.get(key, 0), value)
+                else:
+                    totals[key] = totals.get(key, 0) + value
+    return merged
+
+
+def default_collectors() -> list[StageCollector]:
+    return [TimeCollector(), SqlCollector(), RssCollector()]
+
+
+class PipelineProfiler:
+    """
+    Measures the stages of one pipeline run and builds its `PipelineReport`.
+
+    Usage:
+        with profiler:
+            df = profiler.measure('transform', transform, df)
+    """
+
+    def __init__(self, pipeline: Any, collectors: Iterable[StageCollector]) -> None:
+        self.pipeline = pipeline
+        self.collectors = list(collectors)
+        self.report: PipelineReport = {
+            'pipeline': type(pipeline).__name__,
+            'chunksize': getattr(pipeline, 'chunksize', None),
+            'chunks': 0,
+            'rows': 0,
+            'wall_seconds': 0.0,
+            'stages': {stage: {} for stage in STAGES},
+        }
+        self._stack = ExitStack()
+
+    def __enter__(self) -> 'PipelineProfiler':
+        for collector in self.collectors:
+            for context in collector.contexts():
+                self._stack.enter_context(context)
+        for collector in self.collectors:
+            collector.run_started(self.pipeline)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        try:
+            self.report['wall_seconds'] = time.perf_counter() - self._started
+            if exc_info[0] is None:
+                for collector in self.collectors:
+                    collector.run_finished(self.report)
+        finally:
+            self._stack.close()
+
+    def measure(self, stage: str, func: Callable[..., T], *args: Any) -> T:
+        """Calls `func(*args)` as one pass of `stage`; a DataFrame first arg is its input"""
+        df_in = args[0] if args and isinstance(args[0], DataFrame) else None
+        self._start(stage)
+        result = func(*args)
+        self._finish(stage, df_in, result)
+        return result
+
+    def iterate(self, stage: str, chunks: Iterable[DataFrame]) -> Iterator[DataFrame]:
+        """Yields from `chunks`, measuring the production of each one as a `stage` pass"""
+        chunks = iter(chunks)
+        while True:
+            self._start(stage)
+            chunk = next(chunks, None)
+            self._finish(stage, None, chunk)
+            if chunk is None:
+                return
+            self.report['chunks'] += 1
+            yield chunk
+
+    def _start(self, stage: str) -> None:
+        for collector in self.collectors:
+            collector.stage_started(stage)
+
+    def _finish(self, stage: str, df_in: Optional[DataFrame], df_out: Any) -> None:
+        metrics = self.report['stages'].setdefault(stage, {})
+        produced = isinstance(df_out, DataFrame)
+        if df_in is None and not produced:
+            # The extractor ran out of chunks: only the time spent finding out is counted
+            for collector in self.collectors:
+                collector.stage_finished(stage, metrics)
+            return
+
+        metrics['calls'] = metrics.get('calls', 0) + 1
+        if df_in is not None:
+            metrics['rows_in'] = metrics.get('rows_in', 0) + len(df_in)
+        if produced:
+            metrics['rows_out'] = metrics.get('rows_out', 0) + len(df_out)
+            if stage == 'extract':
+                self.report['rows'] += len(df_out)
+
+        for collector in self.collectors:
+            collector.stage_finished(stage, metrics)
+
+        if produced:
+            # Measured after the collectors, so the deep scan is not charged to the stage.
+            # Largest DataFrame the stage produced, i.e. its share of the peak memory
+            metrics['memory_bytes'] = max(
+                metrics.get('memory_bytes', 0), int(df_out.memory_usage(deep=True).sum())
+            )
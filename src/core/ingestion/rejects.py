@@ -0,0 +1,110 @@
+"""
+Row quarantine for pipeline runs.
+
+A pipeline given a `RejectWriter` loads every chunk in a savepoint of its own. When a
+chunk fails, the rows it cannot transform are found by bisecting the transform alone
+(no database work; errors naming their rows, like `InvalidCurrencyError`, reject
+those right away), and the rest is loaded again in a savepoint, split in halves
+that are retried on their own down to the single rows that still fail. Rejected rows
+are appended to the rejects file with the error and their position in the source,
+and every other row commits. A bad row costs a few extra transforms, or about twice
+its chunk's load when it fails in the database, instead of a rerun of the whole file.
+
+Only errors caused by the data are quarantined (`REJECTABLE_ERRORS`); anything else,
+like a lost connection, still fails the run. Past `max_rows` rejects the run fails as
+well, since a file where most rows break is better fixed than loaded in pieces.
+"""
+
+import shutil
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+from django.core.exceptions import ValidationError
+from django.db import DataError, IntegrityError
+
+from utils.monetary import InvalidCurrencyError
+
+# Unparseable cells, values a model field refuses and rows the database refuses; bugs
+# surfacing as other errors (KeyError, TypeError...) fail the run
+REJECTABLE_ERRORS = (
+    InvalidCurrencyError,
+    ValidationError,
+    DataError,
+    IntegrityError,
+)
+MAX_REASON_LENGTH = 500
+
+
+class TooManyRejectsError(Exception):
+    pass
+
+
+class RejectWriter:
+    """
+    Appends rejected rows, as extracted, to a CSV file at `path`, created on the first
+    reject. Each row is prefixed with its `row` (0-based, header not counted), its
+    `line` in the source when rows are lines (CSV, NDJSON) and the `reason`.
+    """
+
+    def __init__(self, path: Path, max_rows: Optional[int] = None) -> None:
+        self.path = Path(path)
+        self.max_rows = max_rows
+        self.count = 0
+        self._columns: Optional[list] = None
+
+    def write(self, rows: pd.DataFrame, error: Exception, first_line: Optional[int]) -> None:
+        """`first_line` is the source line of row 0, None when rows are not lines"""
+        self.count += len(rows)
+        if self.max_rows is not None and self.count > self.max_rows:
+            raise TooManyRejectsError(
+                f'More than {self.max_rows} rows rejected, the last one for: ' + _reason(error)
+            )
+
+        first = self._columns is None
+        if first:
+            self._columns = list(rows.columns)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        rejected = rows.reindex(columns=self._columns)
+        rejected.insert(0, 'row', rows.index)
+        lines = rows.index + first_line if first_line is not None else None
+        rejected.insert(1, 'line', lines)
+        rejected.insert(2, 'reason', _reason(error))
+        rejected.to_csv(self.path, mode='a', header=first, index=False)
+
+    def resume(self, rows: int) -> None:
+        """
+        Continues the rejects of an interrupted run that committed its first `rows`
+        data rows: the rejects past them were rolled back with their chunk and are
+        dropped, the others count again towards `max_rows`.
+        """
+        if not self.path.exists():
+            return
+        kept = pd.read_csv(self.path, dtype=str, keep_default_na=False)
+        kept = kept[kept['row'].astype(int) < rows]
+        if kept.empty:
+            self.discard()
+            return
+        kept.to_csv(self.path, index=False)
+        self.count = len(kept)
+        self._columns = list(kept.columns.drop(['row', 'line', 'reason']))
+
+    def discard(self) -> None:
+        """Removes the file, e.g. once the run it belongs to was rolled back"""
+        self.path.unlink(missing_ok=True)
+
+
+def merge_rejects(paths: list[Path], target: Path) -> None:
+    """Concatenates rejects files of the same report (e.g. its shards) into `target`"""
+    with open(target, 'wb') as merged:
+        for index, path in enumerate(paths):
+            with open(path, 'rb') as part:
+                header = part.readline()
+                if index == 0:
+                    merged.write(header)
+                shutil.copyfileobj(part, merged)
+            Path(path).unlink()
+
+
+def _reason(error: Exception) -> str:
+    return f'{type(error).__name__}: {error}'[:MAX_REASON_LENGTH]
@@ -0,0 +1,81 @@
+"""
+Row-range shards for running one report across several workers.
+
+`plan_shards` reads a source once and cuts it into shards of about `shard_rows` rows.
+Shards follow the row order of the file, except that rows sharing a value in any of
+the pipeline's `shard_key_columns` always land in the same shard (the one holding the
+first of them). Shards therefore never upsert the same customer or order, so they can
+be loaded in parallel without duplicate inserts or lost updates.
+
+Shard rows are kept as extracted (before the transform) in pickle files under a work
+directory, which workers read through a `ShardSource`.
+"""
+
+import pickle
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+class ShardSource:
+    """A shard as a pipeline source: the pickled parts of it, one DataFrame each"""
+
+    def __init__(self, parts: list[str]) -> None:
+        self.parts = parts
+
+    def chunks(self) -> Iterator[pd.DataFrame]:
+        for part in self.parts:
+            yield pd.read_pickle(part)
+
+
+def link_rows(keys: pd.DataFrame) -> np.ndarray:
+    """Labels rows transitively linked by a shared non-null value in any column.
+
+    Each row is labelled with the position of the first row of its group, e.g. rows
+    (a, x), (b, y), (a, y) all get 0. Labels are propagated as a groupby-min per
+    column until they settle, which takes a few vectorized passes for real data.
+
+    Args:
+        keys (pd.DataFrame): one column per identifying key.
+
+    Returns:
+        np.ndarray: int64 label per row.
+    """
+    codes = []
+    for col in keys.columns:
+        column_codes, _ = pd.factorize(keys[col], use_na_sentinel=True)
+        codes.append(column_codes)
+
+    labels = np.arange(len(keys), dtype=np.int64)
+    while True:
+        previous = labels.copy()
+        for column_codes in codes:
+            linked = column_codes >= 0
+            group_min = pd.Series(labels[linked]).groupby(column_codes[linked]).transform('min')
+            labels[linked] = group_min.to_numpy()
+        # Pointer jumping: a label may point at a row whose own label moved further down
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            return labels
+
+
+def write_shards(
+    chunk_paths: list[Path], labels: np.ndarray, shard_rows: int, workdir: Path
+) -> list[ShardSource]:
+    """Splits the pickled chunks into shards by the first row of each linked group"""
+    shard_ids = labels // shard_rows
+    parts: dict[int, list[str]] = {}
+    offset = 0
+    for index, chunk_path in enumerate(chunk_paths):
+        chunk = pd.read_pickle(chunk_path)
+        chunk_shards = shard_ids[offset : offset + len(chunk)]
+        offset += len(chunk)
+        for shard in np.unique(chunk_shards):
+            part = workdir / f'shard-{shard}-{index}.pkl'
+            chunk[chunk_shards == shard].to_pickle(part, protocol=pickle.HIGHEST_PROTOCOL)
+            parts.setdefault(int(shard), []).append(str(part))
+        chunk_path.unlink()
+
+    return [ShardSource(parts[shard]) for shard in sorted(parts)]
@@ -0,0 +1,170 @@
+"""
+Typed report sources: Parquet and newline-delimited JSON (NDJSON).
+
+Unlike CSV, these formats carry column types, so numbers, dates and text are read
+as such instead of as strings to be re-parsed by the transformers. Columns may be
+named after the report's CSV headers or after the canonical (loader) names.
+
+Parquet needs the optional `pyarrow` package (`erp-bridges-backend[arrow]`),
+imported lazily; it is read by row group batches, never decompressed as a whole.
+NDJSON is read by pandas, through `open_source` so it may be gzip, zstd or zip
+compressed.
+"""
+
+import os
+from collections import deque
+from collections.abc import Iterator, Sequence
+from contextlib import ExitStack
+from itertools import islice
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from core.ingestion.base_extractor import BaseExtractor
+from core.ingestion.compression import open_source
+from core.typings.file_types import CsvSource, TypedFormat
+from utils.dataframe_utils import DataFrameUtils as dfu
+
+
+def _import_pyarrow() -> Any:
+    try:
+        import pyarrow  # noqa: PLC0415
+        import pyarrow.parquet  # noqa: PLC0415, F401
+    except ImportError as e:
+        raise ImportError('Reading Parquet reports requires the "pyarrow" package') from e
+    return pyarrow
+
+
+def _parquet_file(source: CsvSource, columns: Optional[Sequence[str]]) -> tuple[Any, list]:
+    pa = _import_pyarrow()
+    parquet = pa.parquet.ParquetFile(source)
+    names = parquet.schema_arrow.names
+    return parquet, [name for name in names if columns is None or name in columns]
+
+
+def read_typed(
+    source: CsvSource, file_format: TypedFormat, columns: Optional[Sequence[str]] = None
+) -> pd.DataFrame:
+    """Reads a whole Parquet or NDJSON report.
+
+    Args:
+        source (CsvSource): path or binary buffer.
+        file_format (TypedFormat): 'parquet' or 'ndjson'.
+        columns (Optional[Sequence[str]], optional): names to keep, when present in
+            the file; Parquet prunes the others at read time. Defaults to all.
+
+    Returns:
+        pd.DataFrame: DataFrame with the file's types.
+    """
+    if file_format == 'parquet':
+        parquet, names = _parquet_file(source, columns)
+        return parquet.read(columns=names).to_pandas()
+
+    with open_source(source) as stream:
+        df = pd.read_json(stream, lines=True, dtype=False, convert_dates=False)
+    return _select(df, columns)
+
+
+def iter_typed(
+    source: CsvSource,
+    file_format: TypedFormat,
+    chunksize: int,
+    columns: Optional[Sequence[str]] = None,
+    start: int = 0,
+) -> Iterator[pd.DataFrame]:
+    """Streams a Parquet or NDJSON report in DataFrames of at most `chunksize` rows.
+
+    Chunks are indexed by their row position in the file, like the CSV readers. With
+    `start` reading begins at that row: Parquet seeks to the row group holding it,
+    NDJSON skips the lines before it without parsing them.
+    """
+    if file_format == 'parquet':
+        parquet, names = _parquet_file(source, columns)
+        metadata = parquet.metadata
+        first_group, group_start = 0, 0
+        while (
+            first_group < metadata.num_row_groups
+            and group_start + metadata.row_group(first_group).num_rows <= start
+        ):
+            group_start += metadata.row_group(first_group).num_rows
+            first_group += 1
+
+        batches = parquet.iter_batches(
+            batch_size=chunksize,
+            row_groups=range(first_group, metadata.num_row_groups),
+            columns=names,
+        )
+        position = group_start
+        for batch in batches:
+            skip = max(start - position, 0)
+            position += batch.num_rows
+            if skip >= batch.num_rows:
+                continue
+            df = batch.slice(skip).to_pandas()
+            df.index = pd.RangeIndex(position - len(df), position)
+            yield df
+        return
+
+    with open_source(source) as opened, ExitStack() as stack:
+        stream = opened
+        if start:
+            if isinstance(opened, (str, os.PathLike)):
+                stream = stack.enter_context(open(opened, 'rb'))
+            # Lines are consumed without being parsed
+            deque(islice(stream, start), maxlen=0)
+        reader = stack.enter_context(
+            pd.read_json(stream, lines=True, dtype=False, convert_dates=False, chunksize=chunksize)
+        )
+        for chunk in reader:
+            chunk.index += start
+            yield _select(chunk, columns)
+
+
+def _select(df: pd.DataFrame, columns: Optional[Sequence[str]]) -> pd.DataFrame:
+    if columns is None:
+        return df
+    return df[[name for name in df.columns if name in columns]]
+
+
+class TypedExtractor(BaseExtractor):
+    """
+    Extractor of a typed report. Subclasses set `column_aliases` (CSV header ->
+    canonical name, both accepted in the file) and `text_columns`, the canonical
+    columns read as str whatever their type in the file (identifiers such as CPFs),
+    and `digit_lengths`, the valid digit counts of those that lose leading zeros
+    when stored as numbers.
+    """
+
+    column_aliases: Dict[str, str] = {}
+    text_columns: Sequence[str] = ()
+    digit_lengths: Dict[str, Sequence[int]] = {}
+
+    def __init__(self, source: CsvSource, file_format: TypedFormat) -> None:
+        self.source: CsvSource = source
+        self.file_format: TypedFormat = file_format
+
+    def extract(self) -> pd.DataFrame:
+        try:
+            df = read_typed(self.source, self.file_format, self._columns())
+        except FileNotFoundError:
+            raise ValueError(f'File not found in the path: {self.source}')
+        except Exception as e:
+            raise ValueError(f'Error on read {self.file_format} file: {e}')
+        return self._normalize(df)
+
+    def extract_chunks(self, chunksize: int, start: int = 0) -> Iterator[pd.DataFrame]:
+        try:
+            chunks = iter_typed(self.source, self.file_format, chunksize, self._columns(), start)
+            for chunk in chunks:
+                yield self._normalize(chunk)
+        except FileNotFoundError:
+            raise ValueError(f'File not found in the path: {self.source}')
+        except Exception as e:
+            raise ValueError(f'Error on read {self.file_format} file: {e}')
+
+    def _columns(self) -> list[str]:
+        return [*self.column_aliases, *self.column_aliases.values()]
+
+    def _normalize(self, df: pd.DataFrame) -> pd.DataFrame:
+        df = df.rename(columns=self.column_aliases)
+        return dfu.values_to_text(df, list(self.text_columns), self.digit_lengths)
@@ -0,0 +1,161 @@
+"""
+Process-wide caches for small lookup tables (statuses, payment types, customer groups).
+
+Each lookup model gets one `LookupCache`, shared by every repository in the worker,
+mapping names to instances. Names missing from it are read and, if needed, created in
+one batch. Instances only enter the cache once the transaction that read or created
+them commits, so a rolled back import never leaves ids of rows that do not exist.
+
+Caches are validated against a version number kept in Django's cache framework:
+`invalidate()` (called on every save/delete of a lookup row through the ORM) bumps it
+and every cache seeing the new version drops its entries. With a shared CACHES backend
+(e.g. Redis) this spans all workers; with the default local-memory one, the process.
+"""
+
+import threading
+from collections.abc import Iterable
+from functools import partial
+from typing import Generic, Optional, TypedDict, TypeVar
+
+from django.core.cache import cache
+from django.db import IntegrityError, router, transaction
+from django.db.models import Model
+from django.db.models.signals import post_delete, post_save
+
+M = TypeVar('M', bound=Model)
+
+
+class LookupCacheStats(TypedDict):
+    hits: int
+    misses: int
+    size: int
+    version: int
+
+
+class LookupCache(Generic[M]):
+    """
+    name -> instance map of one lookup model. Cached instances are shared between
+    callers and must be treated as read-only.
+    """
+
+    def __init__(self, model: type[M], field: str = 'name') -> None:
+        self.model = model
+        self.field = field
+        self.version_key = f'lookup-cache:{model._meta.label_lower}:version'
+        self.hits = 0
+        self.misses = 0
+        self._instances: dict[str, M] = {}
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+
+        post_save.connect(self._on_change, sender=model, weak=False)
+        post_delete.connect(self._on_change, sender=model, weak=False)
+
+    def get(self, name: str) -> M:
+        return self.get_many([name])[name]
+
+    def get_many(self, names: Iterable[str]) -> dict[str, M]:
+        """
+        Returns a name -> instance map for every given name, creating the missing
+        ones in a single batch.
+        """
+        wanted = set(names)
+        version = self._current_version()
+        with self._lock:
+            found = {name: self._instances[name] for name in wanted if name in self._instances}
+            missing = wanted - found.keys()
+            self.hits += len(found)
+            self.misses += len(missing)
+
+        if missing:
+            loaded = self._get_or_create_many(missing)
+            found.update(loaded)
+            transaction.on_commit(
+                partial(self._store, loaded, version), using=router.db_for_write(self.model)
+            )
+        return found
+
+    def invalidate(self) -> None:
+        """Drops the entries of this model's caches in every process sharing the version"""
+        cache.add(self.version_key, 0, timeout=None)
+        cache.incr(self.version_key)
+
+    def clear(self) -> None:
+        """Drops this process' entries and counters"""
+        with self._lock:
+            self._instances.clear()
+            self._version = None
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> LookupCacheStats:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._instances),
+            'version': self._version or 0,
+        }
+
+    def _get_or_create_many(self, names: set[str]) -> dict[str, M]:
+        manager = self.model._default_manager
+        found = {
+            getattr(obj, self.field): obj for obj in manager.filter(**{f'{self.field}__in': names})
+        }
+        missing = names - found.keys()
+        if not missing:
+            return found
+
+        try:
+            # Savepoint, so a conflict does not break the caller's transaction
+            with transaction.atomic(using=router.db_for_write(self.model)):
+                created = manager.bulk_create([self.model(**{self.field: n}) for n in missing])
+        except IntegrityError:
+            # Another worker created some of them meanwhile: insert the rest, re-read all
+            manager.bulk_create(
+                [self.model(**{self.field: n}) for n in missing], ignore_conflicts=True
+            )
+            created = []
+        # Backends that cannot return ids from a bulk insert leave pk unset
+        if not created or any(obj.pk is None for obj in created):
+            created = list(manager.filter(**{f'{self.field}__in': missing}))
+        found.update({getattr(obj, self.field): obj for obj in created})
+        return found
+
+    def _current_version(self) -> int:
+        version = cache.get(self.version_key, 0)
+        with self._lock:
+            if version != self._version:
+                self._instances.clear()
+                self._version = version
+        return version
+
+    def _store(self, instances: dict[str, M], version: int) -> None:
+        with self._lock:
+            # Skipped when invalidated since the rows were read
+            if version == self._version:
+                self._instances.update(instances)
+
+    def _on_change(self, **kwargs) -> None:
+        self.invalidate()
+
+
+_registry: dict[type[Model], LookupCache] = {}
+_registry_lock = threading.Lock()
+
+
+def lookup_cache(model: type[M]) -> LookupCache[M]:
+    """The process-wide cache of `model`, created on first use"""
+    with _registry_lock:
+        if model not in _registry:
+            _registry[model] = LookupCache(model)
+        return _registry[model]
+
+
+def lookup_cache_stats() -> dict[str, LookupCacheStats]:
+    """Counters of every lookup cache in the process, by model label"""
+    return {model._meta.label: c.stats() for model, c in _registry.items()}
+
+
+def clear_lookup_caches() -> None:
+    for c in _registry.values():
+        c.clear()
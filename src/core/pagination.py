@@ -0,0 +1,142 @@
+"""
+Keyset (seek) pagination for large tables.
+
+Pages are cut by the values of the last row seen rather than by an OFFSET, and no
+total is counted, so every page costs one index range scan of `page_size` rows no
+matter how deep it is. The ordering must be unique (end it with the primary key)
+and have an index over the same columns.
+
+DRF's `CursorPagination` only seeks on the first ordering field and falls back to
+offsets within ties; this one seeks on the whole tuple.
+"""
+
+import base64
+import json
+from typing import Any, Optional
+
+from django.db.models import Model, Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginates over `ordering`, e.g. ('-order_date', '-id'): every field in the same
+    direction. The opaque `cursor` query parameter holds the ordering values of the
+    row a page starts after (or, going back, before).
+    """
+
+    ordering: tuple[str, ...] = ('-id',)
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering: Optional[tuple[str, ...]] = None) -> None:
+        if ordering is not None:
+            self.ordering = ordering
+        directions = {name.startswith('-') for name in self.ordering}
+        if len(directions) != 1:
+            raise ValueError('Keyset ordering fields must all share one direction')
+        self.descending = directions.pop()
+        self.fields = [name.lstrip('-') for name in self.ordering]
+
+    def paginate_queryset(
+        self, queryset: QuerySet, request: Request, view: Any = None
+    ) -> list[Model]:
+        self.request = request
+        self.model = queryset.model
+        self.size = self.get_page_size(request)
+        position, backwards = self.decode_cursor(request)
+
+        ordering = self.ordering if not backwards else self._reversed(self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self._seek(position, self.descending != backwards))
+
+        rows = list(queryset.order_by(*ordering)[: self.size + 1])
+        has_more = len(rows) > self.size
+        rows = rows[: self.size]
+        if backwards:
+            rows.reverse()
+
+        self.next_position = self.previous_position = None
+        if rows and (has_more or backwards):
+            self.next_position = self._position(rows[-1])
+        if rows and position is not None and (has_more or not backwards):
+            self.previous_position = self._position(rows[0])
+        return rows
+
+    def get_paginated_response(self, data: Any) -> Response:
+        return Response({
+            'next': self._link(self.next_position, backwards=False),
+            'previous': self._link(self.previous_position, backwards=True),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema: dict) -> dict:
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request: Request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, request: Request) -> tuple[Optional[list], bool]:
+        """Returns the ordering values in the cursor, if any, and its direction"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            values = [
+                self.model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.fields, cursor['p'], strict=True)
+            ]
+            return values, bool(cursor['b'])
+        except Exception as e:
+            raise NotFound(self.invalid_cursor_message) from e
+
+    def encode_cursor(self, position: list, backwards: bool) -> str:
+        cursor = json.dumps({'p': position, 'b': int(backwards)}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(cursor.encode()).decode()
+
+    def _seek(self, position: list, descending: bool) -> Q:
+        """
+        Rows strictly past `position`, e.g. for (a, b) descending:
+        a <= x AND (a < x OR (a = x AND b < y)). The leading bound on `a` alone lets the
+        database start the index scan right at the position.
+        """
+        op = 'lt' if descending else 'gt'
+        past = Q()
+        for depth, field in enumerate(self.fields):
+            equal = dict(zip(self.fields[:depth], position[:depth]))
+            past |= Q(**equal, **{f'{field}__{op}': position[depth]})
+        return Q(**{f'{self.fields[0]}__{op}e': position[0]}) & past
+
+    def _position(self, row: Model) -> list:
+        return [self.model._meta.get_field(field).value_to_string(row) for field in self.fields]
+
+    def _link(self, position: Optional[list], backwards: bool) -> Optional[str]:
+        if position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(position, backwards)
+        )
+
+    def _reversed(self, ordering: tuple[str, ...]) -> tuple[str, ...]:
+        return tuple(name[1:] if name.startswith('-') else f'-{name}' for name in ordering)
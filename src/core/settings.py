@@ -87,9 +87,26 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'OPTIONS': {
+            # The sqlite3 module keeps up to 128 prepared statements per connection by
+            # default. Bulk writes each leave a new one with thousands of placeholders
+            # (a batch size not seen before), so an import's RSS grew with its row count
+            'cached_statements': 0,
+        },
+    },
+    # Import job heartbeats (progress and lease renewals of running imports, see
+    # `core.db_routers`), on a connection of their own so they commit while an import's
+    # transaction is open.
+    # SQLite allows a single writer, so here they get a file of their own (created by
+    # `migrate --database progress`); on PostgreSQL point it at the default database
+    'progress': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'progress.sqlite3',
+    },
 }
 
+DATABASE_ROUTERS = ['core.db_routers.ImportProgressRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -162,3 +179,52 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+
+# Rows per chunk when a report is streamed through its pipeline; None loads it at once
+REPORT_INGESTION_CHUNKSIZE = 50_000
+# CSV parser used by the report extractors: 'c' (pandas) or 'pyarrow' (needs pyarrow)
+REPORT_INGESTION_CSV_ENGINE = 'c'
+# Rows per shard when a report is fanned out across workers, each shard committed chunk
+# by chunk; None processes it in a single task
+REPORT_INGESTION_SHARD_ROWS = None
+# Directory for shard files, shared by all workers; None uses the system temp dir
+REPORT_INGESTION_SHARD_DIR = None
+# Directory for the rows an import quarantines instead of failing on them (see
+# `core.ingestion.rejects`); None makes every import all-or-nothing. They hold customer
+# data as uploaded, so keep it out of MEDIA_ROOT: they are only served by the
+# authenticated rejects endpoint of their job
+REPORT_INGESTION_REJECTS_DIR = BASE_DIR.parent / 'private' / 'rejects'
+# Rejected rows past which an import fails (and rolls back, but for the chunks a
+# checkpointed import already committed) anyway; None for no limit
+REPORT_INGESTION_MAX_REJECTS = 1000
+# Commit streamed imports chunk by chunk, so a task retried after its worker was lost
+# resumes after the last committed chunk (see `core.ingestion.checkpoints`), at the
+# price of the chunks committed before a failure staying loaded; False keeps every
+# import in a single transaction
+REPORT_INGESTION_CHECKPOINTS = False
+# Loader write path: 'orm', or 'copy' for COPY into staging tables merged with INSERT
+# ... ON CONFLICT (PostgreSQL only, other databases keep the ORM; see
+# `core.ingestion.postgres_copy`)
+REPORT_INGESTION_LOADER_BACKEND = 'orm'
+# Seconds a run holds its import job: a task redelivered meanwhile (e.g. after the
+# broker's consumer timeout) waits for the lease to expire before taking the job over.
+# Renewed as the import runs (through `REPORT_IMPORT_PROGRESS_DATABASE`), once a stage
+# finishes past a third of it, so it must outlast the slowest stage of a chunk (the
+# whole load when the report is not streamed)
+REPORT_IMPORT_LEASE_SECONDS = 900
+# Runs an import job gets before it is failed, e.g. when its file keeps killing the
+# worker loading it
+REPORT_IMPORT_MAX_ATTEMPTS = 3
+# Minimum seconds between two progress writes of a running import job
+REPORT_IMPORT_PROGRESS_INTERVAL = 5
+# Alias import job heartbeats are written through; 'default' leaves them in the
+# import's transaction, so progress and lease renewals are only seen once it commits
+REPORT_IMPORT_PROGRESS_DATABASE = 'progress'
+# Running import jobs no run renews the lease of any more (e.g. a fanned-out import
+# whose shards were all lost) are failed by this task, run by `celery -A core beat`
+CELERY_BEAT_SCHEDULE = {
+    'expire-import-jobs': {
+        'task': 'reports.tasks.expire_import_jobs_task',
+        'schedule': REPORT_IMPORT_LEASE_SECONDS,
+    },
+}
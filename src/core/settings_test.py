@@ -6,3 +6,7 @@ CELERY_TASK_EAGER_PROPAGATES = True
 PASSWORD_HASHERS = [
     'django.contrib.auth.hashers.MD5PasswordHasher',
 ]
+
+# Test cases run in a transaction of the default database; tests asking for the
+# 'progress' alias switch to it
+REPORT_IMPORT_PROGRESS_DATABASE = 'default'
@@ -1,7 +1,9 @@
 from io import BytesIO, StringIO
 from pathlib import Path
-from typing import Union
+from typing import Literal, Union
 
 FilePathLike = Union[str, Path]
 ReadCsvBuffer = Union[BytesIO, StringIO]
 CsvSource = Union[FilePathLike, ReadCsvBuffer, str]
+CsvEngine = Literal['c', 'pyarrow']
+TypedFormat = Literal['parquet', 'ndjson']
@@ -7,6 +7,8 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/', include('auth.api.urls')),
     path('api/', include('reports.api.urls')),
+    path('api/', include('buy_order.api.urls')),
+    path('api/', include('customer.api.urls')),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,22 @@
+import django_filters
+
+from customer.models import Customer
+
+
+class CustomerFilter(django_filters.FilterSet):
+    """Only filters backed by an index: unique keys, foreign keys and `created_at`"""
+
+    email = django_filters.CharFilter(method='filter_email')
+    cpf = django_filters.CharFilter()
+    external_id = django_filters.CharFilter()
+    customer_group = django_filters.CharFilter(field_name='customer_group__name')
+    created_after = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='gte')
+    created_before = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='lt')
+
+    class Meta:
+        model = Customer
+        fields = []
+
+    def filter_email(self, queryset, name, value):
+        # Case-insensitive through the normalized column's index
+        return queryset.filter(email_normalized=value.lower())
@@ -0,0 +1,31 @@
+from rest_framework import serializers
+
+from customer.models import Customer
+
+
+class CustomerSerializer(serializers.ModelSerializer):
+    """Read-only view of a customer, with its group by name"""
+
+    customer_group = serializers.CharField(source='customer_group.name', read_only=True)
+
+    class Meta:
+        model = Customer
+        fields = [
+            'id',
+            'external_id',
+            'first_name',
+            'last_name',
+            'email',
+            'cpf',
+            'phone',
+            'customer_group',
+            'customer_since',
+            'postal_code',
+            'city',
+            'state',
+            'country',
+            'last_order',
+            'created_at',
+            'updated_at',
+        ]
+        read_only_fields = fields
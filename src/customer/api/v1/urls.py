@@ -0,0 +1,10 @@
+from django.urls import path
+
+from .views import CustomerExportView, CustomerListView
+
+app_name = 'customer_v1'
+
+urlpatterns = [
+    path('', CustomerListView.as_view(), name='api-customer-list'),
+    path('export/', CustomerExportView.as_view(), name='api-customer-export'),
+]
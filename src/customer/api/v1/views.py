@@ -0,0 +1,53 @@
+from rest_framework import permissions
+from rest_framework.generics import ListAPIView
+
+from core.export import ExportView
+from core.pagination import KeysetPagination
+from customer.api.v1.filters import CustomerFilter
+from customer.api.v1.serializers import CustomerSerializer
+from customer.repositories.customer_repository import CustomerRepository
+
+
+class CustomerPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
+
+
+class CustomerListView(ListAPIView):
+    """Customers, newest first, paged by keyset on (created_at, id)"""
+
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = CustomerSerializer
+    filterset_class = CustomerFilter
+    pagination_class = CustomerPagination
+
+    def get_queryset(self):
+        return CustomerRepository().find_all_with_group()
+
+
+class CustomerExportView(ExportView):
+    """Filtered customers as a streamed CSV or Parquet file, see `core.export`"""
+
+    permission_classes = [permissions.IsAuthenticated]
+    filterset_class = CustomerFilter
+    file_name = 'customers'
+    export_columns = [
+        ('id', 'id'),
+        ('external_id', 'external_id'),
+        ('first_name', 'first_name'),
+        ('last_name', 'last_name'),
+        ('email', 'email'),
+        ('cpf', 'cpf'),
+        ('phone', 'phone'),
+        ('customer_group', 'customer_group__name'),
+        ('customer_since', 'customer_since'),
+        ('postal_code', 'postal_code'),
+        ('city', 'city'),
+        ('state', 'state'),
+        ('country', 'country'),
+        ('last_order', 'last_order'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    ]
+
+    def get_queryset(self):
+        return CustomerRepository().find_all()
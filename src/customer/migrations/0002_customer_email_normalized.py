@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:20
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='email_normalized',
+            field=models.GeneratedField(db_index=True, db_persist=True, expression=django.db.models.functions.text.Lower('email'), output_field=models.CharField(max_length=255)),
+        ),
+    ]
@@ -2,6 +2,7 @@ from typing import TYPE_CHECKING
 
 from django.db import models
 from django.db.models import QuerySet
+from django.db.models.functions import Lower
 
 if TYPE_CHECKING:
     from buy_order.models import BuyOrder
@@ -26,6 +27,14 @@ class Customer(models.Model):
     first_name = models.CharField(max_length=255)
     last_name = models.CharField(max_length=255)
     email = models.EmailField(max_length=255, unique=True)
+    # Kept by the database, so identity lookups can match emails case-insensitively
+    # through an index (see `CustomerRepository.resolve_identities`)
+    email_normalized = models.GeneratedField(
+        expression=Lower('email'),
+        output_field=models.CharField(max_length=255),
+        db_persist=True,
+        db_index=True,
+    )
     cpf = models.CharField(max_length=20, unique=True, blank=True, null=True)
     phone = models.CharField(max_length=20, blank=True, null=True)
     customer_group = models.ForeignKey(
@@ -46,6 +55,8 @@ class Customer(models.Model):
 
         indexes = [
             models.Index(fields=['cpf', 'email']),
+            # Keyset pagination of the read API (see `core.pagination`)
+            models.Index(fields=['created_at', 'id']),
         ]
 
     def __str__(self):
@@ -1,15 +1,27 @@
-from typing import Dict
+from typing import Dict, Iterable
 
+from core.lookup_cache import lookup_cache
 from customer.models import CustomerGroup
 
 
 class CustomerGroupRepository:
+    """Name lookups go through a process-wide cache, see `core.lookup_cache`"""
+
+    def __init__(self) -> None:
+        self.cache = lookup_cache(CustomerGroup)
+
     def get_or_create(self, name: str) -> CustomerGroup:
-        customer_group, created = CustomerGroup.objects.get_or_create(name=name)
-        return customer_group
+        return self.cache.get(name)
 
     def find_all_as_dict(self) -> Dict[str, CustomerGroup]:
         return {g.name: g for g in CustomerGroup.objects.all()}
 
     def filter_by_names(self, names: list[str]) -> list[CustomerGroup]:
         return list(CustomerGroup.objects.filter(name__in=names))
+
+    def get_or_create_many(self, names: Iterable[str]) -> Dict[str, CustomerGroup]:
+        """
+        Returns a name -> instance map for every given name, creating the missing
+        ones in a single batch. Served from the process-wide lookup cache.
+        """
+        return self.cache.get_many(names)
@@ -1,10 +1,12 @@
-from collections.abc import Sequence
+from collections.abc import Iterable, Sequence
 from datetime import datetime
 from typing import Optional, Literal, TypedDict
 
-from django.db.models import Q, QuerySet
+from django.db.models import QuerySet
+from django.utils import timezone
 
 from customer.models import Customer, CustomerGroup
+from utils.query_utils import in_batches
 
 
 class GetByEmailOrCpfType(TypedDict):
@@ -46,6 +48,9 @@ class CustomerRepository:
     def find_all(self) -> QuerySet[Customer]:
         return Customer.objects.all()
 
+    def find_all_with_group(self) -> QuerySet[Customer]:
+        return Customer.objects.select_related('customer_group')
+
     def build(self, data: CustomerDataType) -> Customer:
         return Customer(**data)
 
@@ -53,19 +58,81 @@ class CustomerRepository:
         self, email: Optional[str] = None, cpf: Optional[str] = None
     ) -> Optional[Customer]:
         """
-        Finds a single customer by their email OR their CPF using a Q object.
-        Returns the customer instance or None if not found.
+        Finds a single customer by their email (case-insensitive) OR their CPF.
+        Returns the customer instance or None if not found; see `resolve_identities`
+        for which one wins when both match.
+        """
+        return self.resolve_identities([(email, cpf)])[0]
+
+    def resolve_identities(
+        self, identities: Iterable[tuple[Optional[str], Optional[str]]], for_update: bool = False
+    ) -> list[Optional[Customer]]:
         """
-        query = Q()
-        if email:
-            query |= Q(email__iexact=email)
-        if cpf:
-            query |= Q(cpf=cpf)
+        Resolves many (email, cpf) pairs at once, with the queries of
+        `find_by_emails_or_cpfs`. For each pair, in order:
 
-        if not query:
-            return None
+        1. customers are matched by email, case-insensitively, and by exact cpf;
+           an empty email or cpf never matches;
+        2. when both match the same customer, or only one of them matches, that
+           customer is returned;
+        3. when they match different customers, the oldest one (lowest pk) wins;
+        4. otherwise the result is None.
 
-        return Customer.objects.filter(query).first()
+        Returns one entry per pair, in the order given.
+        """
+        pairs = [(email.lower() if email else None, cpf or None) for email, cpf in identities]
+        customers = self.find_by_emails_or_cpfs(
+            [email for email, _ in pairs if email],
+            [cpf for _, cpf in pairs if cpf],
+            for_update=for_update,
+        )
+        # Customers come in pk order: the oldest one wins an email differing only in case
+        by_email: dict[str, Customer] = {}
+        for customer in customers:
+            by_email.setdefault(customer.email.lower(), customer)
+        by_cpf = {c.cpf: c for c in customers if c.cpf}
+
+        resolved: list[Optional[Customer]] = []
+        for email, cpf in pairs:
+            matches = [c for c in (by_email.get(email), by_cpf.get(cpf)) if c is not None]
+            resolved.append(min(matches, key=lambda c: c.pk) if matches else None)
+        return resolved
+
+    def find_by_emails_or_cpfs(
+        self, emails: Iterable[str], cpfs: Iterable[str], for_update: bool = False
+    ) -> list[Customer]:
+        """
+        Set-based counterpart of `find_by_email_or_cpf`: returns every customer whose
+        email (case-insensitive) OR cpf is in the given collections, ordered by primary
+        key so callers can reproduce its match priority in memory.
+
+        Emails and cpfs are looked up in separate queries, each served by its own index
+        (`email_normalized`, `cpf`), batched to the backend's parameter limit. With
+        `for_update` the matches are then locked in pk order, so concurrent callers
+        wait instead of deadlocking.
+        """
+        customers: dict[int, Customer] = {}
+        pks: set[int] = set()
+        lookups = [
+            ('email_normalized__in', {email.lower() for email in emails if email}),
+            ('cpf__in', {cpf for cpf in cpfs if cpf}),
+        ]
+        for lookup, values in lookups:
+            for batch in in_batches(sorted(values)):
+                matches = Customer.objects.filter(**{lookup: batch})
+                if for_update:
+                    # Only built once, when locked
+                    pks.update(matches.values_list('pk', flat=True))
+                else:
+                    customers.update((c.pk, c) for c in matches)
+
+        if not for_update:
+            return [customers[pk] for pk in sorted(customers)]
+
+        locked: list[Customer] = []
+        for batch in in_batches(sorted(pks)):
+            locked.extend(Customer.objects.filter(pk__in=batch).order_by('pk').select_for_update())
+        return locked
 
     def create(self, customer_data: CustomerDataType) -> Customer:
         return Customer.objects.create(**customer_data)
@@ -87,13 +154,32 @@ class CustomerRepository:
         return customer
 
     def bulk_create(self, customers: list[Customer], ignore_conflicts: bool) -> list[Customer]:
-        return Customer.objects.bulk_create(customers, ignore_conflicts=True)
+        return Customer.objects.bulk_create(customers, ignore_conflicts=ignore_conflicts)
 
     def bulk_update(
         self, customers: list[Customer], fields: Sequence[CustomerUpdateFields]
     ) -> None:
         Customer.objects.bulk_update(customers, fields)
 
+    def bulk_update_changed(
+        self, customers: list[Customer], fields: Sequence[CustomerUpdateFields]
+    ) -> None:
+        """
+        Writes `fields` of stored, fully loaded `customers` as an upsert on the primary
+        key. Unlike `bulk_update`, which compiles a CASE WHEN per row for every field,
+        it sends plain values, so its cost stays linear in the rows written.
+        `updated_at` is refreshed as well, like `save()` does.
+        """
+        now = timezone.now()
+        for customer in customers:
+            customer.updated_at = now
+        Customer.objects.bulk_create(
+            customers,
+            update_conflicts=True,
+            update_fields=[*fields, 'updated_at'],
+            unique_fields=['id'],
+        )
+
     def bulk_upsert(self, customers: list[Customer]) -> None:
         Customer.objects.bulk_create(
             customers,
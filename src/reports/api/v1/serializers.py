@@ -1,13 +1,69 @@
+from typing import Optional
+
+from django.urls import reverse
 from rest_framework import serializers
 
 from reports.ingestion.mapping import REPORT_MAP
+from reports.models import ImportJob
+from reports.repositories.import_job_repository import ImportJobRepository
 
 
 class ReportUploadSerializer(serializers.Serializer):
     """
     Handles a validation for the report upload endpoint
     Ensures a valid report_type is selected and a file is provided
+    `force` processes the file even if the same content was already imported (not
+    while it is still being imported)
+    `validate_only` checks the file without importing it (a dry run)
     """
 
     report_type = serializers.ChoiceField(choices=list(REPORT_MAP.keys()))
     report_file = serializers.FileField()
+    force = serializers.BooleanField(default=False)
+    validate_only = serializers.BooleanField(default=False)
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    """
+    Read-only view of an import job's state and progress, as a running import
+    reports it. `rejects_url` downloads the rows the import quarantined, when there
+    are any.
+    """
+
+    rejects_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id',
+            'report_type',
+            'file_name',
+            'content_hash',
+            'state',
+            'rows_read',
+            'rows_loaded',
+            'rows_rejected',
+            'rejects_url',
+            'chunks_processed',
+            'committed_rows',
+            'stage_timings',
+            'errors',
+            'profile',
+            'started_at',
+            'finished_at',
+            'created_at',
+            'updated_at',
+        ]
+        read_only_fields = fields
+
+    def to_representation(self, job: ImportJob) -> dict:
+        data = super().to_representation(job)
+        data.update(ImportJobRepository().progress(job))
+        return data
+
+    def get_rejects_url(self, job: ImportJob) -> Optional[str]:
+        if not job.rejects_file:
+            return None
+        url = reverse('v1:api-import-job-rejects', kwargs={'pk': job.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
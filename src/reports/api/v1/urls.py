@@ -1,7 +1,17 @@
 from django.urls import path
 
-from .views import ReportUploadView
+from .views import (
+    ImportJobDetailView,
+    ImportJobRejectsView,
+    ImportJobRetryView,
+    ReportUploadView,
+)
 
 app_name = 'v1'
 
-urlpatterns = [path('upload/', ReportUploadView.as_view(), name='api-upload-report')]
+urlpatterns = [
+    path('upload/', ReportUploadView.as_view(), name='api-upload-report'),
+    path('jobs/<int:pk>/', ImportJobDetailView.as_view(), name='api-import-job-detail'),
+    path('jobs/<int:pk>/rejects/', ImportJobRejectsView.as_view(), name='api-import-job-rejects'),
+    path('jobs/<int:pk>/retry/', ImportJobRetryView.as_view(), name='api-import-job-retry'),
+]
@@ -1,23 +1,46 @@
+import hashlib
 import os
 import tempfile
 import logging
-from typing import cast
+from typing import Optional, cast
 
 from celery import Task
+from django.conf import settings
+from django.db import IntegrityError
+from django.http import FileResponse
+from django.urls import reverse
+from rest_framework.exceptions import NotFound
+from rest_framework.generics import RetrieveAPIView
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import permissions, status
 
+from reports.ingestion.mapping import REPORT_MAP
 from reports.api.v1.serializers import (
+    ImportJobSerializer,
     ReportUploadSerializer,
 )
+from reports.models import ImportJob
+from reports.repositories.import_job_repository import ImportJobRepository
 from reports.tasks import process_report_task
 
 logger = logging.getLogger(__name__)
 
 
 class ReportUploadView(APIView):
+    """
+    Stores the upload and queues its processing. The file is hashed while it is
+    written, and a file already imported (or being imported) for the same report
+    type returns the original job instead of queueing it again, unless `force`; a
+    file still being imported always does, which the database enforces for
+    concurrent uploads as well.
+
+    With `validate_only` the file is only extracted and transformed, right away and
+    without touching the database, and the rows the import would reject are
+    reported (see `BasePipeline.validate`).
+    """
+
     parser_classes = (MultiPartParser, FormParser)
 
     def post(self, request, *args, **kwargs):
@@ -28,26 +51,191 @@ class ReportUploadView(APIView):
         report_type = validated_data['report_type']
         uploaded_file = validated_data['report_file']
 
-        suffix = os.path.splitext(getattr(uploaded_file, 'name', ''))[1]
-        tmp_path = None
+        file_name = getattr(uploaded_file, 'name', '') or ''
+        suffix = os.path.splitext(file_name)[1]
+        job_repo = ImportJobRepository()
         try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                for chunk in uploaded_file.chunks():
-                    tmp.write(chunk)
-                tmp_path = tmp.name
+            tmp_path, content_hash = self._store(uploaded_file, suffix)
+        except Exception as exc:
+            return self._failed(report_type, exc)
 
-            task = cast(Task, process_report_task)
-            task.delay(report_type, tmp_path)
+        if validated_data['validate_only']:
+            return self._validate(report_type, tmp_path)
 
+        try:
+            job, duplicate = self._find_or_create_job(
+                report_type, file_name, content_hash, tmp_path, validated_data['force']
+            )
+        except IntegrityError as exc:
+            os.remove(tmp_path)
+            return self._failed(report_type, exc)
+        if duplicate:
+            os.remove(tmp_path)
             return Response(
-                {'detail': 'Report processing started.', 'report_type': report_type},
-                status=status.HTTP_202_ACCEPTED,
+                {
+                    'detail': 'Report already imported.',
+                    'report_type': report_type,
+                    'job_id': job.pk,
+                    'status_url': self._status_url(request, job.pk),
+                    'duplicate': True,
+                },
+                status=status.HTTP_200_OK,
             )
+
+        try:
+            result = cast(Task, process_report_task).delay(report_type, tmp_path, job.pk)
+            job_repo.set_task_id(job.pk, result.id)
         except Exception as exc:
-            logger.exception('Failed to start report ingestion for report_type=%s', report_type)
-            if tmp_path and os.path.exists(tmp_path):
+            # Kept when the task failed after committing chunks, for the job to resume
+            stored = job_repo.find_by_id(job.pk)
+            if os.path.exists(tmp_path) and not (stored and stored.committed_rows):
                 os.remove(tmp_path)
+            # A no-op when the task already recorded why it failed
+            job_repo.mark_failed(job.pk, [{'type': type(exc).__name__, 'message': str(exc)}])
+            return self._failed(report_type, exc, job.pk)
+
+        return Response(
+            {
+                'detail': 'Report processing started.',
+                'report_type': report_type,
+                'job_id': job.pk,
+                'status_url': self._status_url(request, job.pk),
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    def _find_or_create_job(
+        self, report_type: str, file_name: str, content_hash: str, tmp_path: str, force: bool
+    ) -> tuple[ImportJob, bool]:
+        """The job of the upload, and whether it is an earlier one for the same file"""
+        job_repo = ImportJobRepository()
+        original = None if force else job_repo.find_by_content_hash(report_type, content_hash)
+        if original is not None:
+            return original, True
+        try:
+            return job_repo.create(report_type, file_name, content_hash, tmp_path), False
+        except IntegrityError:
+            # A concurrent upload of the same file queued it first
+            original = job_repo.find_by_content_hash(report_type, content_hash)
+            if original is None:
+                raise
+            return original, True
+
+    def _store(self, uploaded_file, suffix: str) -> tuple[str, str]:
+        """Writes the upload to a tempfile, hashing it on the way; returns (path, sha256)"""
+        content_hash = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+            try:
+                for chunk in uploaded_file.chunks():
+                    content_hash.update(chunk)
+                    tmp.write(chunk)
+            except Exception:
+                tmp.close()
+                os.remove(tmp.name)
+                raise
+        return tmp.name, content_hash.hexdigest()
+
+    def _validate(self, report_type: str, tmp_path: str) -> Response:
+        try:
+            pipeline = REPORT_MAP[report_type](chunksize=settings.REPORT_INGESTION_CHUNKSIZE)
+            report = pipeline.validate(tmp_path)
+        except Exception as exc:
+            logger.info('Report validation failed for report_type=%s: %s', report_type, exc)
             return Response(
-                {'detail': 'Failed to start report ingestion.', 'error': str(exc)},
+                {
+                    'detail': 'Report could not be read.',
+                    'report_type': report_type,
+                    'valid': False,
+                    'error': str(exc),
+                },
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        finally:
+            os.remove(tmp_path)
+
+        return Response(
+            {'detail': 'Report validated.', 'report_type': report_type, **report},
+            status=status.HTTP_200_OK,
+        )
+
+    def _failed(self, report_type: str, exc: Exception, job_id: Optional[int] = None):
+        logger.exception('Failed to start report ingestion for report_type=%s', report_type)
+        return Response(
+            {
+                'detail': 'Failed to start report ingestion.',
+                'error': str(exc),
+                'job_id': job_id,
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    def _status_url(self, request, job_id: int) -> str:
+        return request.build_absolute_uri(
+            reverse('v1:api-import-job-detail', kwargs={'pk': job_id})
+        )
+
+
+class ImportJobDetailView(RetrieveAPIView):
+    """State, row counts, stage timings and errors of one report import"""
+
+    permission_classes = [permissions.IsAuthenticated]
+    queryset = ImportJob.objects.all()
+    serializer_class = ImportJobSerializer
+
+
+class ImportJobRetryView(APIView):
+    """
+    Resumes a failed import after the chunks it committed before failing (see
+    `core.ingestion.checkpoints`), from the upload kept for it
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk: int, *args, **kwargs):
+        job_repo = ImportJobRepository()
+        job = job_repo.find_by_id(pk)
+        if job is None:
+            raise NotFound()
+        if not job.source_file or not os.path.exists(job.source_file):
+            return self._conflict(job.pk)
+        if not job_repo.reopen(job.pk):
+            return self._conflict(job.pk)
+
+        result = cast(Task, process_report_task).delay(job.report_type, job.source_file, job.pk)
+        job_repo.set_task_id(job.pk, result.id)
+        return Response(
+            {
+                'detail': 'Report processing resumed.',
+                'report_type': job.report_type,
+                'job_id': job.pk,
+                'status_url': request.build_absolute_uri(
+                    reverse('v1:api-import-job-detail', kwargs={'pk': job.pk})
+                ),
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    def _conflict(self, job_id: int) -> Response:
+        return Response(
+            {'detail': 'This import cannot be resumed.', 'job_id': job_id},
+            status=status.HTTP_409_CONFLICT,
+        )
+
+
+class ImportJobRejectsView(RetrieveAPIView):
+    """Downloads the CSV of the rows an import quarantined (see `core.ingestion.rejects`)"""
+
+    # The rows are kept as extracted, customer emails, cpfs and phones included
+    permission_classes = [permissions.IsAuthenticated]
+    queryset = ImportJob.objects.all()
+
+    def retrieve(self, request, *args, **kwargs) -> FileResponse:
+        job = self.get_object()
+        if not job.rejects_file or not os.path.exists(job.rejects_file):
+            raise NotFound('This import has no rejected rows.')
+        return FileResponse(
+            open(job.rejects_file, 'rb'),
+            as_attachment=True,
+            filename=f'import-{job.pk}-rejects.csv',
+            content_type='text/csv',
+        )
@@ -1,14 +1,27 @@
+from collections.abc import Iterator
+from typing import Optional
+
 import pandas as pd
 
+from core.ingestion.arrow_csv import iter_csv_arrow, read_csv_arrow
 from core.ingestion.base_extractor import BaseExtractor
-from core.typings.file_types import CsvSource
+from core.ingestion.compression import open_source
+from core.ingestion.csv_chunks import iter_csv_chunks
+from core.typings.file_types import CsvEngine, CsvSource
+from utils.dataframe_utils import text_dtype
 
-from .schemas import COLUMN_ALIASES
+from .schemas import COLUMN_ALIASES, COLUMN_TYPES
 
 
 class BuyOrderCsvExtractor(BaseExtractor):
-    def __init__(self, csv_file: CsvSource) -> None:
+    def __init__(self, csv_file: CsvSource, engine: CsvEngine = 'c') -> None:
+        """
+        `engine='pyarrow'` parses with pyarrow's multithreaded reader into Arrow
+        dtypes, typed and pruned by `COLUMN_TYPES`; the default uses pandas' C engine.
+        gzip, zstd and single-entry zip files are decompressed while they are read.
+        """
         self.csv_file: CsvSource = csv_file
+        self.engine: CsvEngine = engine
 
     def extract(self) -> pd.DataFrame:
         df = self._load_csv()
@@ -16,21 +29,57 @@ class BuyOrderCsvExtractor(BaseExtractor):
         df = self._remove_totals_row(df)
         return df
 
+    def extract_chunks(self, chunksize: int, start: int = 0) -> Iterator[pd.DataFrame]:
+        """
+        Yields the report in DataFrames of at most `chunksize` rows, from data row
+        `start` on (see `core.ingestion.csv_chunks`).
+
+        Each chunk is held back until the next one is read, so the totals row is
+        only looked for in the chunk that really ends the file.
+        """
+        previous: Optional[pd.DataFrame] = None
+        for chunk in self._load_csv_chunks(chunksize, start):
+            if previous is not None:
+                yield previous
+            previous = chunk.rename(columns=COLUMN_ALIASES)
+
+        if previous is not None:
+            previous = self._remove_totals_row(previous)
+            if not previous.empty:
+                yield previous
+
     def _load_csv(self) -> pd.DataFrame:
         try:
-            df: pd.DataFrame = pd.read_csv(
-                self.csv_file,
-                sep=',',
-                dtype=str,
-                encoding='utf-8',
-                usecols=list(COLUMN_ALIASES.keys()),
-            )
-            return df
+            with open_source(self.csv_file) as source:
+                if self.engine == 'pyarrow':
+                    return read_csv_arrow(source, COLUMN_TYPES)
+                df: pd.DataFrame = pd.read_csv(source, **self._read_csv_options())
+                return df
         except FileNotFoundError:
             raise ValueError(f'File not found in the path: {self.csv_file}')
         except Exception as e:
             raise ValueError(f'Error on read csv file: {e}')
 
+    def _load_csv_chunks(self, chunksize: int, start: int) -> Iterator[pd.DataFrame]:
+        try:
+            if self.engine == 'pyarrow':
+                with open_source(self.csv_file) as source:
+                    yield from iter_csv_arrow(source, COLUMN_TYPES, chunksize, start)
+                return
+            yield from iter_csv_chunks(self.csv_file, chunksize, start, **self._read_csv_options())
+        except FileNotFoundError:
+            raise ValueError(f'File not found in the path: {self.csv_file}')
+        except Exception as e:
+            raise ValueError(f'Error on read csv file: {e}')
+
+    def _read_csv_options(self) -> dict:
+        return {
+            'sep': ',',
+            'dtype': text_dtype(),
+            'encoding': 'utf-8',
+            'usecols': list(COLUMN_ALIASES.keys()),
+        }
+
     def _remove_totals_row(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Remove last row if "order_number" column == "totais"
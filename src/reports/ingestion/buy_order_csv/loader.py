@@ -1,30 +1,142 @@
+from collections import defaultdict
+from collections.abc import Sequence
+from typing import Any, Dict, Optional
+
+import numpy as np
 import pandas as pd
 from django.db import transaction
 
 from core.ingestion.base_loader import BaseLoader
+from core.ingestion.model_builder import ModelBuilder, python_values
+from core.ingestion.postgres_copy import CopyWriter, LoaderBackend, default_backend
+from core.ingestion.sharding import link_rows
+from buy_order.models import BuyOrder, PaymentType, Status
 from buy_order.repositories.buy_order_repository import BuyOrderRepository, BuyOrderDataType
+from buy_order.repositories.daily_sales_rollup_repository import (
+    DailySalesRollupRepository,
+    SalesDelta,
+)
 from buy_order.repositories.payment_type_repository import PaymentTypeRepository
 from buy_order.repositories.status_repository import StatusRepository
-from customer.repositories.customer_repository import CustomerRepository, CustomerDataType
+from customer.models import Customer, CustomerGroup
+from customer.repositories.customer_repository import (
+    CustomerRepository,
+    CustomerDataType,
+    CustomerUpdateFields,
+)
 from customer.repositories.customer_group_repository import CustomerGroupRepository
+from utils.dataframe_utils import DataFrameUtils as dfu
+from utils.monetary import centavos_to_decimal
+
+CUSTOMER_ROW_FIELDS: list[CustomerUpdateFields] = [
+    'first_name',
+    'last_name',
+    'email',
+    'cpf',
+    'phone',
+    'last_order',
+    'customer_group',
+]
+BUY_ORDER_COPY_FIELDS = [
+    'order_number',
+    'customer',
+    'payment_type',
+    'status',
+    'order_id',
+    'order_date',
+    'sold_quantity',
+    'discount_amount',
+    'shipping_amount',
+    'total_amount',
+]
+CUSTOMER_BUILDER = ModelBuilder(Customer, CUSTOMER_ROW_FIELDS)
+BUY_ORDER_BUILDER = ModelBuilder(BuyOrder, BUY_ORDER_COPY_FIELDS)
 
 
 class BuyOrderCsvLoader(BaseLoader):
-    def __init__(self, df: pd.DataFrame) -> None:
+    """
+    Loads transformed buy order rows into the database.
+
+    The default bulk mode works set-based over slices of `chunk_size` rows: every
+    referenced customer, status, payment type and customer group is resolved in a
+    handful of batched queries, missing lookup rows are created in bulk and orders are
+    upserted on `order_number`, so the query count per slice does not grow with its
+    row count. `bulk=False` keeps the original row-by-row path.
+
+    The bulk mode persists through the ORM or, with the 'copy' backend (opt-in on
+    PostgreSQL), through COPY into staging tables merged with INSERT ... ON CONFLICT
+    (see `core.ingestion.postgres_copy`).
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        bulk: bool = True,
+        chunk_size: int = 5000,
+        backend: Optional[LoaderBackend] = None,
+    ) -> None:
         self.df = df
+        self.bulk = bulk
+        self.chunk_size = chunk_size
+        self.backend = backend or default_backend()
         self.buy_order_repo = BuyOrderRepository()
         self.customer_repo = CustomerRepository()
         self.customer_group_repo = CustomerGroupRepository()
         self.payment_type_repo = PaymentTypeRepository()
         self.status_repo = StatusRepository()
+        self.rollup_repo = DailySalesRollupRepository()
+        self.sales_delta = SalesDelta()
+        self.customer_groups: Dict[str, CustomerGroup] = {}
+        self.statuses: Dict[str, Status] = {}
+        self.payment_types: Dict[str, PaymentType] = {}
 
     def load(self) -> None:
         with transaction.atomic():
-            for _, row in self.df.iterrows():
+            self._load_rows()
+            self.finish()
+
+    def load_chunk(self, df: pd.DataFrame) -> None:
+        """Chunks of a streamed run only collect their sales rollup change, see `finish`"""
+        self.df = df
+        with transaction.atomic():
+            self._load_rows()
+
+    def finish(self) -> None:
+        """
+        Applies the change to the daily sales rollup collected since the last call.
+        Deferred to the end of a run, so the rollup rows stay locked only briefly.
+        """
+        self.rollup_repo.apply(self.sales_delta)
+        self.sales_delta.clear()
+
+    def savepoint(self) -> tuple:
+        return (
+            self.sales_delta.copy(),
+            dict(self.customer_groups),
+            dict(self.statuses),
+            dict(self.payment_types),
+        )
+
+    def rollback_to(self, state: tuple) -> None:
+        self.sales_delta, self.customer_groups, self.statuses, self.payment_types = state
+
+    def _load_rows(self) -> None:
+        if not self.bulk:
+            for row in dfu.replace_nulls_with_none(self.df).itertuples(index=False):
                 self._upsert_customer(row)
                 self._upsert_buy_order(row)
+            return
 
-    def _upsert_customer(self, row: pd.Series) -> None:
+        if len(self.df) > self.chunk_size:
+            # Every stored customer of the chunk is locked in one pk-ordered pass, as
+            # locks taken slice by slice could cross those of a shard running alongside
+            self.customer_repo.find_by_emails_or_cpfs(
+                self.df['email'].dropna(), self.df['cpf'].dropna(), for_update=True
+            )
+        for start in range(0, len(self.df), self.chunk_size):
+            self._bulk_load(self.df.iloc[start : start + self.chunk_size])
+
+    def _upsert_customer(self, row: Any) -> None:
         group = self.customer_group_repo.get_or_create(row.customer_group)
         customer = self.customer_repo.find_by_email_or_cpf(row.email, row.cpf)
 
@@ -42,22 +154,36 @@ class BuyOrderCsvLoader(BaseLoader):
             self.customer_repo.create(customer_data)
             return
 
-        elif not customer.last_order or customer.last_order < row['order_date']:
+        elif not customer.last_order or customer.last_order < row.order_date:
+            # An email or cpf another customer holds (shared by a household, mistyped)
+            # stays with that customer
+            holders = self.customer_repo.find_by_emails_or_cpfs(
+                [row.email] if row.email else [], [row.cpf] if row.cpf else []
+            )
+            for holder in holders:
+                if holder.pk != customer.pk and holder.email.lower() == row.email:
+                    customer_data['email'] = customer.email
+                if holder.pk != customer.pk and holder.cpf and holder.cpf == row.cpf:
+                    customer_data['cpf'] = customer.cpf
             self.customer_repo.update(customer, customer_data)
 
-    def _upsert_buy_order(self, row: pd.Series) -> None:
+    def _upsert_buy_order(self, row: Any) -> None:
         buy_order = self.buy_order_repo.find_by_order_number(row.order_number)
-        status = self.status_repo.get_or_create(row.status)
+        status = self.status_repo.get_or_create(row.status) if row.status else None
 
-        if buy_order:
+        if buy_order and status:
+            if buy_order.status_id != status.pk:
+                self.sales_delta.move(buy_order, status.pk)
             buy_order.status = status
             buy_order.save()
             return
 
         customer = self.customer_repo.find_by_email_or_cpf(email=row.email)
-        payment_type = self.payment_type_repo.get_or_create(row.payment_type)
+        payment_type = (
+            self.payment_type_repo.get_or_create(row.payment_type) if row.payment_type else None
+        )
 
-        if not customer or not status or not payment_type:
+        if buy_order or not customer or not status or not payment_type:
             return
 
         buy_order_data: BuyOrderDataType = {
@@ -68,9 +194,246 @@ class BuyOrderCsvLoader(BaseLoader):
             'order_id': row.order_id,
             'order_date': row.order_date,
             'sold_quantity': row.sold_quantity,
-            'discount_amount': row.discount_amount,
-            'shipping_amount': row.shipping_amount,
-            'total_amount': row.total_amount,
+            'discount_amount': centavos_to_decimal(row.discount_amount),
+            'shipping_amount': centavos_to_decimal(row.shipping_amount),
+            'total_amount': centavos_to_decimal(row.total_amount),
         }
 
-        self.buy_order_repo.create(buy_order_data)
+        self.sales_delta.add(self.buy_order_repo.create(buy_order_data))
+
+    def _bulk_load(self, df: pd.DataFrame) -> None:
+        self.preload_lookups(df)
+        customers = self._bulk_upsert_customers(df)
+        self._bulk_upsert_buy_orders(df, customers)
+
+    def preload_lookups(self, df: pd.DataFrame) -> None:
+        """
+        Resolves lookup names not seen in previous slices, creating the missing ones
+        """
+        lookups = [
+            ('customer_group', self.customer_groups, self.customer_group_repo),
+            ('status', self.statuses, self.status_repo),
+            ('payment_type', self.payment_types, self.payment_type_repo),
+        ]
+        for column, cache, repo in lookups:
+            missing = {name for name in df[column].dropna().unique() if name not in cache}
+            if missing:
+                cache.update(repo.get_or_create_many(missing))
+
+    def _bulk_upsert_customers(self, df: pd.DataFrame) -> list[Customer]:
+        """
+        Resolves the customer of every row and writes each one once, with the data of
+        its latest order in the slice (the first row among equal dates), as the
+        row-by-row upsert ends up storing. Stored customers whose latest order is not
+        newer than `last_order` are left alone, and the others are updated on the
+        fields that actually changed only. Returns the customer resolved for each row.
+        """
+        # Locked in pk order: a shard running in parallel may match the same stored
+        # customer through another e-mail or cpf
+        existing = self.customer_repo.find_by_emails_or_cpfs(
+            df['email'].dropna(), df['cpf'].dropna(), for_update=True
+        )
+        owners = self._customer_owners(df, existing)
+        # As integers, so a customer whose dates are all missing (NaT, the lowest one)
+        # still gets a row, which then fails in the database like the row-by-row path
+        order_dates = pd.Series(pd.DatetimeIndex(df['order_date']).asi8)
+        latest = order_dates.groupby(owners, sort=False).idxmax()
+
+        rows = df.iloc[latest.to_numpy()]
+        rows = rows.assign(
+            last_order=rows['order_date'],
+            customer_group=_lookup_pks(rows['customer_group'], self.customer_groups),
+        )
+        rows = self._keep_held_keys(rows, latest.index.to_numpy(), existing)
+        is_new = latest.index.to_numpy() < 0
+        new_customers = CUSTOMER_BUILDER.instances(rows[is_new])
+        customers = dict(zip(latest.index[is_new].tolist(), new_customers))
+
+        stored = {customer.pk: customer for customer in existing}
+        changed_customers: list[Customer] = []
+        changed_fields: set[str] = set()
+        last_order = CUSTOMER_ROW_FIELDS.index('last_order')
+        stored_rows = CUSTOMER_BUILDER.rows(rows[~is_new])
+        for owner, values in zip(latest.index[~is_new].tolist(), stored_rows):
+            customer = customers[owner] = stored[owner]
+            if not customer.last_order or customer.last_order < values[last_order]:
+                fields = _assign_changed(customer, CUSTOMER_BUILDER.attnames, values)
+                if fields:
+                    changed_customers.append(customer)
+                    changed_fields.update(fields)
+
+        if self.backend == 'copy':
+            self._copy_customers(new_customers, changed_customers)
+        else:
+            self.customer_repo.bulk_create(new_customers, ignore_conflicts=False)
+            if changed_customers:
+                self.customer_repo.bulk_update_changed(
+                    changed_customers,
+                    [field for field in CUSTOMER_ROW_FIELDS if field in changed_fields],
+                )
+
+        return [customers[owner] for owner in owners.tolist()]
+
+    def _customer_owners(self, df: pd.DataFrame, existing: list[Customer]) -> np.ndarray:
+        """
+        Labels each row with its customer: the pk of the stored one matching its email
+        or cpf (the lowest pk when they point to different customers, like
+        `find_by_email_or_cpf`). Rows matching none join the stored customer of the
+        rows they are linked to through an email or cpf (the lowest pk again), as the
+        row-by-row upsert finds it by the keys an earlier row gave it; the others get
+        a negative label shared by their linked rows, as they make one new customer.
+        """
+        # Stored emails may differ in case from the lower-cased ones of the report; the
+        # customers come in pk order, so the oldest one wins emails differing only in case
+        email_pks: dict[str, int] = {}
+        for customer in existing:
+            email_pks.setdefault(customer.email.lower(), customer.pk)
+        cpf_pks = {customer.cpf: customer.pk for customer in existing if customer.cpf}
+        owners = np.fmin(
+            df['email'].map(email_pks).to_numpy(dtype=float),
+            df['cpf'].map(cpf_pks).to_numpy(dtype=float),
+        )
+
+        unmatched = np.isnan(owners)
+        if unmatched.any():
+            groups = link_rows(df[['email', 'cpf']].reset_index(drop=True))
+            stored_owners = pd.Series(owners).groupby(groups).transform('min').to_numpy()
+            owners[unmatched] = stored_owners[unmatched]
+            new = np.isnan(owners)
+            owners[new] = -1 - groups[new]
+        return owners.astype(np.int64)
+
+    def _keep_held_keys(
+        self, rows: pd.DataFrame, owners: np.ndarray, existing: list[Customer]
+    ) -> pd.DataFrame:
+        """
+        A stored customer's latest row may carry an email or cpf another customer
+        holds (shared by a household, mistyped): the customer keeps its own value
+        then, as `_upsert_customer` does. A key nobody holds yet goes to the oldest
+        of the stored customers claiming it. New customers never share keys, as
+        linked rows make one customer.
+        """
+        stored = {customer.pk: customer for customer in existing}
+        kept = {}
+        for key in ('email', 'cpf'):
+            holders: dict[str, int] = {}
+            for customer in existing:
+                value = customer.email.lower() if key == 'email' else customer.cpf
+                if value:
+                    holders.setdefault(value, customer.pk)
+
+            values = rows[key].reset_index(drop=True)
+            claimed = values.notna().to_numpy() & (owners >= 0)
+            first_claimant = (
+                pd.Series(np.where(claimed, owners, np.nan)).groupby(values).transform('min')
+            )
+            holder = values.map(holders).astype(float).fillna(first_claimant).to_numpy()
+            taken = claimed & (holder != owners)
+            if taken.any():
+                values[taken] = [getattr(stored[owner], key) for owner in owners[taken]]
+                kept[key] = values.set_axis(rows.index)
+        return rows.assign(**kept)
+
+    def _copy_customers(self, new: list[Customer], changed: list[Customer]) -> None:
+        """
+        Ids for the new customers are reserved up front, so inserts and updates go
+        through one upsert on the primary key and orders can reference them.
+        """
+        writer = CopyWriter(Customer)
+        for customer, pk in zip(new, writer.allocate_ids(len(new))):
+            customer.pk = pk
+            customer._state.adding = False
+        writer.upsert(
+            writer.frame([*new, *changed], ['id', *CUSTOMER_ROW_FIELDS]),
+            unique_fields=['id'],
+            update_fields=CUSTOMER_ROW_FIELDS,
+        )
+
+    def _bulk_upsert_buy_orders(self, df: pd.DataFrame, customers: list[Customer]) -> None:
+        """
+        Builds one order per `order_number`: new ones are inserted in bulk and stored
+        ones whose status changed are updated per status. Repeated order numbers keep
+        the last row's status and, for new orders, the data of the first row with a
+        payment type, which is what the row-by-row path ends up storing: stored orders
+        get their status whatever the payment type.
+        """
+        orders = df.assign(
+            customer=[customer.pk for customer in customers],
+            status=_lookup_pks(df['status'], self.statuses),
+            payment_type=_lookup_pks(df['payment_type'], self.payment_types),
+        )
+        orders = orders[orders['status'].notna()]
+        if orders.empty:
+            return
+
+        last_status = orders.groupby('order_number', sort=False, dropna=False)['status']
+        orders = orders.assign(status=last_status.transform('last'))
+        orders = (
+            orders.sort_values('payment_type', key=lambda values: values.isna(), kind='stable')
+            .drop_duplicates('order_number')
+            .sort_index()
+        )
+        amounts = {
+            column: [centavos_to_decimal(value) for value in python_values(orders[column])]
+            for column in ['discount_amount', 'shipping_amount', 'total_amount']
+        }
+        buy_orders = {
+            buy_order.order_number: buy_order
+            for buy_order in BUY_ORDER_BUILDER.instances(orders, **amounts)
+        }
+
+        stored = self.buy_order_repo.find_by_order_numbers(buy_orders.keys())
+        new_orders: list[BuyOrder] = []
+        moved: list[BuyOrder] = []
+        for order_number, buy_order in buy_orders.items():
+            current = stored.get(order_number)
+            if current is None:
+                if buy_order.payment_type_id is not None:
+                    self.sales_delta.add(buy_order)
+                    new_orders.append(buy_order)
+            elif current.status_id != buy_order.status_id:
+                self.sales_delta.move(current, buy_order.status_id)
+                moved.append(current)
+
+        if self.backend == 'copy':
+            # Stored orders go through the same upsert, which only updates their
+            # status; the inserted values still have to be valid
+            for current in moved:
+                buy_order = buy_orders[current.order_number]
+                if buy_order.payment_type_id is None:
+                    buy_order.payment_type_id = current.payment_type_id
+            orders = [*new_orders, *(buy_orders[current.order_number] for current in moved)]
+            if orders:
+                writer = CopyWriter(BuyOrder)
+                writer.upsert(
+                    writer.frame(orders, BUY_ORDER_COPY_FIELDS),
+                    unique_fields=['order_number'],
+                    update_fields=['status'],
+                )
+            return
+
+        # Stored orders only change status: one UPDATE per status rather than
+        # upserting every order of the slice again
+        order_pks_by_status: dict[int, list[int]] = defaultdict(list)
+        for current in moved:
+            order_pks_by_status[current.status_id].append(current.pk)
+        self.buy_order_repo.update_statuses(order_pks_by_status)
+        if new_orders:
+            self.buy_order_repo.bulk_create(new_orders)
+
+
+def _lookup_pks(names: pd.Series, cache: Dict[str, Any]) -> pd.Series:
+    """The pk of the cached lookup row named in each row, NA for names not cached"""
+    return names.map({name: row.pk for name, row in cache.items()}).astype('Int64')
+
+
+def _assign_changed(customer: Customer, attnames: Sequence[str], values: tuple) -> list[str]:
+    """Sets `values` on the `attnames` of `customer`, returning the fields that changed"""
+    changed = []
+    for attname, value in zip(attnames, values):
+        # Relations are set by id, so no related row gets fetched
+        current = getattr(customer, attname)
+        if current != value and not (pd.isna(current) and pd.isna(value)):
+            setattr(customer, attname, value)
+            changed.append(Customer._meta.get_field(attname).name)
+    return changed
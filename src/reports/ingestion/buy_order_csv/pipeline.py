@@ -1,21 +1,72 @@
+from collections.abc import Iterator, Sequence
+from typing import Any, Optional
+
 import pandas as pd
+from django.conf import settings
 
 from core.ingestion.base_pipeline import BasePipeline
-from core.typings.file_types import CsvSource
+from core.ingestion.checkpoints import Checkpoint
+from core.ingestion.profiling import StageCollector
+from core.ingestion.rejects import RejectWriter
+from core.typings.file_types import CsvEngine, CsvSource
 from reports.ingestion.buy_order_csv.extractor import BuyOrderCsvExtractor
 from reports.ingestion.buy_order_csv.loader import BuyOrderCsvLoader
 from reports.ingestion.buy_order_csv.transformer import BuyOrderCsvTransformer
+from reports.ingestion.buy_order_csv.validator import BuyOrderValidator
 
 
 class BuyOrderCsvPipeline(BasePipeline):
+    shard_key_columns = ('email', 'cpf', 'order_number')
+    shard_lookup_columns = ('customer_group', 'status', 'payment_type')
+    first_row_line = 2  # after the header
+
+    def __init__(
+        self,
+        chunksize: Optional[int] = None,
+        engine: Optional[CsvEngine] = None,
+        collectors: Optional[Sequence[StageCollector]] = None,
+        rejects: Optional[RejectWriter] = None,
+        checkpoint: Optional[Checkpoint] = None,
+    ) -> None:
+        super().__init__(chunksize, collectors, rejects, checkpoint)
+        self.engine: CsvEngine = engine or settings.REPORT_INGESTION_CSV_ENGINE
+        self.loader: Optional[BuyOrderCsvLoader] = None
+
     def _extract(self, source: CsvSource) -> pd.DataFrame:
-        extractor = BuyOrderCsvExtractor(source)
+        extractor = BuyOrderCsvExtractor(source, self.engine)
         return extractor.extract()
 
+    def _extract_chunks(
+        self, source: CsvSource, chunksize: int, start: int = 0
+    ) -> Iterator[pd.DataFrame]:
+        extractor = BuyOrderCsvExtractor(source, self.engine)
+        return extractor.extract_chunks(chunksize, start)
+
     def _transform(self, df: pd.DataFrame) -> pd.DataFrame:
         transformer = BuyOrderCsvTransformer(df)
         return transformer.transform()
 
+    def _validator(self) -> BuyOrderValidator:
+        return BuyOrderValidator(
+            lambda df: BuyOrderCsvTransformer(df, errors='coerce').transform()
+        )
+
     def _load(self, df: pd.DataFrame) -> None:
-        loader = BuyOrderCsvLoader(df)
-        loader.load()
+        if self.loader is None:
+            self.loader = BuyOrderCsvLoader(df)
+        self.loader.load_chunk(df)
+
+    def _savepoint(self) -> tuple[Optional[BuyOrderCsvLoader], Any]:
+        return self.loader, self.loader.savepoint() if self.loader else None
+
+    def _rollback_to(self, state: tuple[Optional[BuyOrderCsvLoader], Any]) -> None:
+        self.loader, loader_state = state
+        if self.loader is not None:
+            self.loader.rollback_to(loader_state)
+
+    def _finish_load(self) -> None:
+        if self.loader is not None:
+            self.loader.finish()
+
+    def _prepare_shards(self, lookups: pd.DataFrame) -> None:
+        BuyOrderCsvLoader(lookups).preload_lookups(lookups)
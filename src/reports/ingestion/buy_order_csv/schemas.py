@@ -15,3 +15,10 @@ COLUMN_ALIASES = {
     'Número CPF/CNPJ': 'cpf',
     'Shipping Telephone': 'phone',
 }
+
+# Arrow type of every column read by the pyarrow engine; headers left out are pruned
+# at parse time. Text that the transformer still cleans (amounts, dates) stays string.
+COLUMN_TYPES = {column: 'string' for column in COLUMN_ALIASES} | {
+    'ID do Pedido': 'int64',
+    'Qtd. Vendida': 'int64',
+}
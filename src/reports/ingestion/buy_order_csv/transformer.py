@@ -1,3 +1,5 @@
+from typing import Literal
+
 import pandas as pd
 
 from core.ingestion.base_transformer import BaseTransformer
@@ -5,8 +7,13 @@ from utils.dataframe_utils import DataFrameUtils as dfu
 
 
 class BuyOrderCsvTransformer(BaseTransformer):
-    def __init__(self, df: pd.DataFrame):
+    # Blank optional amounts mean no shipping or discount, not a bad row
+    OPTIONAL_AMOUNTS = ['shipping_amount', 'discount_amount']
+
+    def __init__(self, df: pd.DataFrame, errors: Literal['raise', 'coerce'] = 'raise'):
+        """`errors='coerce'` turns unparseable amounts into nulls instead of raising"""
         self.df = df
+        self.errors: Literal['raise', 'coerce'] = errors
 
     def transform(self) -> pd.DataFrame:
         self.df = self._lower_case_columns(self.df)
@@ -14,7 +21,7 @@ class BuyOrderCsvTransformer(BaseTransformer):
         self.df = self._convert_date_columns(self.df)
         self.df = self._keep_only_digits_columns(self.df)
         self.df = self._replace_columns_values(self.df)
-        self.df = dfu.replace_nulls_with_none(self.df)
+        self.df = self._categorize_columns(self.df)
         return self.df
 
     def _lower_case_columns(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -23,7 +30,9 @@ class BuyOrderCsvTransformer(BaseTransformer):
 
     def _clean_currency_columns(self, df: pd.DataFrame) -> pd.DataFrame:
         columns = ['shipping_amount', 'discount_amount', 'total_amount']
-        return dfu.clean_currency_columns(df, columns, symbol='R$')
+        return dfu.clean_currency_columns(
+            df, columns, symbol='R$', errors=self.errors, blank_as_zero=self.OPTIONAL_AMOUNTS
+        )
 
     def _convert_date_columns(self, df: pd.DataFrame) -> pd.DataFrame:
         columns = ['order_date']
@@ -45,3 +54,7 @@ class BuyOrderCsvTransformer(BaseTransformer):
             }
         }
         return dfu.replace_values(df, mapping, contains=True)
+
+    def _categorize_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        columns = ['customer_group', 'status', 'payment_type']
+        return dfu.to_categories(df, columns)
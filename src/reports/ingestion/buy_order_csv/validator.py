@@ -0,0 +1,60 @@
+import pandas as pd
+
+from buy_order.models import BuyOrder, PaymentType, Status
+from core.ingestion.base_validator import BaseValidator
+from customer.models import Customer, CustomerGroup
+
+CPF_LENGTHS = (11, 14)  # CPF or CNPJ digits
+
+
+class BuyOrderValidator(BaseValidator):
+    """
+    Checks of a transformed buy order report (CSV or typed). Rows without a status
+    or payment type would be skipped by the loader, so they are reported too; an
+    `order_number` may repeat (status updates) but only with the same `order_id`.
+    """
+
+    required_columns = [
+        'order_number',
+        'order_id',
+        'order_date',
+        'status',
+        'payment_type',
+        'sold_quantity',
+        'shipping_amount',
+        'discount_amount',
+        'total_amount',
+        'first_name',
+        'last_name',
+        'email',
+        'customer_group',
+    ]
+    parsed_columns = {
+        'order_date': 'date',
+        'shipping_amount': 'currency',
+        'discount_amount': 'currency',
+        'total_amount': 'currency',
+    }
+    integer_columns = ['order_id', 'sold_quantity']
+    model_fields = {
+        'order_id': (BuyOrder, 'order_id'),
+        'sold_quantity': (BuyOrder, 'sold_quantity'),
+        'shipping_amount': (BuyOrder, 'shipping_amount'),
+        'discount_amount': (BuyOrder, 'discount_amount'),
+        'total_amount': (BuyOrder, 'total_amount'),
+        'status': (Status, 'name'),
+        'payment_type': (PaymentType, 'name'),
+        'first_name': (Customer, 'first_name'),
+        'last_name': (Customer, 'last_name'),
+        'email': (Customer, 'email'),
+        'cpf': (Customer, 'cpf'),
+        'phone': (Customer, 'phone'),
+        'customer_group': (CustomerGroup, 'name'),
+    }
+    consistent_keys = [('order_number', 'order_id'), ('order_id', 'order_number')]
+
+    def check_chunk(self, df: pd.DataFrame) -> None:
+        self.email_check(df)
+        if 'cpf' in df.columns:
+            cpfs = df['cpf'].dropna().astype(str)
+            self.add('invalid_cpf', 'cpf', ~cpfs.str.len().isin(CPF_LENGTHS))
@@ -0,0 +1,12 @@
+from core.ingestion.typed_formats import TypedExtractor
+from reports.ingestion.buy_order_csv.schemas import COLUMN_ALIASES
+
+from .schemas import DIGIT_LENGTHS, TEXT_COLUMNS
+
+
+class BuyOrderTypedExtractor(TypedExtractor):
+    """Buy order report as Parquet or NDJSON, see `core.ingestion.typed_formats`"""
+
+    column_aliases = COLUMN_ALIASES
+    text_columns = TEXT_COLUMNS
+    digit_lengths = DIGIT_LENGTHS
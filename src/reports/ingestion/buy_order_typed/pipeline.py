@@ -0,0 +1,44 @@
+from collections.abc import Iterator
+
+import pandas as pd
+
+from core.typings.file_types import CsvSource, TypedFormat
+from reports.ingestion.buy_order_csv.pipeline import BuyOrderCsvPipeline
+from reports.ingestion.buy_order_csv.validator import BuyOrderValidator
+from reports.ingestion.buy_order_typed.extractor import BuyOrderTypedExtractor
+from reports.ingestion.buy_order_typed.transformer import BuyOrderTypedTransformer
+
+
+class BuyOrderTypedPipeline(BuyOrderCsvPipeline):
+    """Buy order report in a typed format; loaded exactly like the CSV one"""
+
+    file_format: TypedFormat
+
+    def _extract(self, source: CsvSource) -> pd.DataFrame:
+        extractor = BuyOrderTypedExtractor(source, self.file_format)
+        return extractor.extract()
+
+    def _extract_chunks(
+        self, source: CsvSource, chunksize: int, start: int = 0
+    ) -> Iterator[pd.DataFrame]:
+        extractor = BuyOrderTypedExtractor(source, self.file_format)
+        return extractor.extract_chunks(chunksize, start)
+
+    def _transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        transformer = BuyOrderTypedTransformer(df)
+        return transformer.transform()
+
+    def _validator(self) -> BuyOrderValidator:
+        return BuyOrderValidator(
+            lambda df: BuyOrderTypedTransformer(df, errors='coerce').transform()
+        )
+
+
+class BuyOrderParquetPipeline(BuyOrderTypedPipeline):
+    file_format = 'parquet'
+    first_row_line = None
+
+
+class BuyOrderNdjsonPipeline(BuyOrderTypedPipeline):
+    file_format = 'ndjson'
+    first_row_line = 1
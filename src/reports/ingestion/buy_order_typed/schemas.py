@@ -0,0 +1,18 @@
+from reports.ingestion.buy_order_csv.validator import CPF_LENGTHS
+
+# Canonical columns read as str whatever their type in the file; the others keep
+# theirs: integers (order_id, sold_quantity), numeric amounts in reais and dates
+TEXT_COLUMNS = [
+    'order_number',
+    'status',
+    'payment_type',
+    'first_name',
+    'last_name',
+    'email',
+    'customer_group',
+    'cpf',
+    'phone',
+]
+
+# Digit counts the numeric text columns are zero-padded to
+DIGIT_LENGTHS = {'cpf': CPF_LENGTHS}
@@ -0,0 +1,25 @@
+import pandas as pd
+
+from reports.ingestion.buy_order_csv.transformer import BuyOrderCsvTransformer
+from utils.dataframe_utils import DataFrameUtils as dfu
+from utils.datetime_utils import SAO_PAULO_TZ_NAME
+
+
+class BuyOrderTypedTransformer(BuyOrderCsvTransformer):
+    """
+    Same normalization as the CSV transformer, minus the string parsing that typed
+    formats make unnecessary: amounts are numbers in reais and dates are timestamps
+    or ISO 8601 strings (naive ones are local times).
+    """
+
+    def _clean_currency_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        columns = ['shipping_amount', 'discount_amount', 'total_amount']
+        return dfu.currency_units_to_centavos(
+            df, columns, errors=self.errors, blank_as_zero=self.OPTIONAL_AMOUNTS
+        )
+
+    def _convert_date_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        columns = ['order_date']
+        df = dfu.convert_to_datetime(df, columns, 'ISO8601')
+        df = dfu.convert_dataframe_datetimes_to_aware(df, columns)
+        return dfu.convert_to_timezone(df, columns, SAO_PAULO_TZ_NAME)
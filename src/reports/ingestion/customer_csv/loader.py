@@ -1,16 +1,42 @@
+from typing import Optional
+
 import pandas as pd
 from django.db import transaction
 
 from core.ingestion.base_loader import BaseLoader
-from customer.repositories.customer_repository import CustomerRepository, CustomerDataType
+from core.ingestion.model_builder import ModelBuilder
+from core.ingestion.postgres_copy import CopyWriter, LoaderBackend, default_backend
+from customer.repositories.customer_repository import CustomerRepository
 from customer.repositories.customer_group_repository import CustomerGroupRepository
 
 from customer.models import Customer
 
 
+CUSTOMER_COPY_FIELDS = [
+    'first_name',
+    'last_name',
+    'email',
+    'phone',
+    'postal_code',
+    'customer_since',
+    'state',
+    'country',
+    'external_id',
+]
+CUSTOMER_BUILDER = ModelBuilder(Customer, [*CUSTOMER_COPY_FIELDS, 'customer_group'])
+CUSTOMER_UPDATE_BUILDER = ModelBuilder(Customer, ['email', 'customer_since', 'external_id'])
+
+
 class CustomerCsvLoader(BaseLoader):
-    def __init__(self, df: pd.DataFrame) -> None:
+    """
+    Creates new customers and refreshes `customer_since`/`external_id` of the stored
+    ones, matched by email. With the 'copy' backend (opt-in on PostgreSQL) rows are
+    written through COPY staging tables instead of the ORM.
+    """
+
+    def __init__(self, df: pd.DataFrame, backend: Optional[LoaderBackend] = None) -> None:
         self.df = df
+        self.backend = backend or default_backend()
         self.customer_repo = CustomerRepository()
         self.customer_group_repo = CustomerGroupRepository()
         self.customers_by_email = {}
@@ -21,58 +47,80 @@ class CustomerCsvLoader(BaseLoader):
             self._preload_customers()
             self._preload_customer_groups()
 
-            new_customers = []
-            updated_customers = []
+            if self.backend == 'copy':
+                self._copy_customers()
+                return
 
-            for _, row in self.df.iterrows():
-                customer = self.customers_by_email.get(row['email'])
-
-                if customer:
-                    self._update_customer(customer, row)
-                    updated_customers.append(customer)
-                else:
-                    new_customer = self._build_customer(row)
-                    new_customers.append(new_customer)
+            stored = self.df['email'].isin(self.customers_by_email.keys())
+            # A stored customer takes the values of its last row
+            updated_customers = []
+            updated = self.df.loc[stored].drop_duplicates('email', keep='last')
+            for email, customer_since, external_id in CUSTOMER_UPDATE_BUILDER.rows(updated):
+                customer = self.customers_by_email[email]
+                customer.customer_since = customer_since
+                customer.external_id = external_id
+                updated_customers.append(customer)
+
+            # Only the first row of a new email would be inserted anyway (ignore_conflicts)
+            new = self.df.loc[~stored].drop_duplicates('email', keep='first')
+            new_customers = CUSTOMER_BUILDER.instances(
+                new, customer_group=self._customer_group_ids(new)
+            )
 
             self.customer_repo.bulk_create(new_customers, ignore_conflicts=True)
 
             self.customer_repo.bulk_update(updated_customers, ['customer_since', 'external_id'])
 
+    def savepoint(self) -> dict:
+        return dict(self.customer_groups)
+
+    def rollback_to(self, state: dict) -> None:
+        self.customer_groups = state
+
+    def _copy_customers(self) -> None:
+        """
+        Same outcome as the ORM path: a stored customer takes the values of its last
+        row, and only the first row of a new email is inserted (ignore_conflicts).
+        """
+        writer = CopyWriter(Customer)
+        stored = self.df['email'].isin(self.customers_by_email.keys())
+
+        updated = self.df.loc[stored, ['email', 'customer_since', 'external_id']]
+        updated = updated.drop_duplicates('email', keep='last')
+        # Matched on the email as stored
+        updated['email'] = updated['email'].map(lambda email: self.customers_by_email[email].email)
+        writer.update(updated, 'email', ['customer_since', 'external_id'])
+
+        new = self.df.loc[~stored].drop_duplicates('email', keep='first')
+        rows = new[CUSTOMER_COPY_FIELDS].assign(customer_group_id=self._customer_group_ids(new))
+        writer.upsert(rows, unique_fields=None)
+
     def _preload_customers(self):
-        emails = self.df['email'].unique().tolist()
+        """
+        Stored customers by normalized email, matching the rows (lowercased by the
+        transformer) whatever the case they were stored with
+        """
+        emails = self.df['email'].dropna().unique().tolist()
         self.customers_by_email = {
-            c.email: c
-            for c in Customer.objects.filter(email__in=emails).only(
-                'id', 'email', 'external_id', 'customer_since'
-            )
+            c.email_normalized: c for c in self.customer_repo.find_by_emails_or_cpfs(emails, [])
         }
 
     def _preload_customer_groups(self):
-        names = self.df['customer_group'].unique().tolist()
+        """Only queries the groups not already cached by a previous chunk"""
+        names = [
+            n for n in self.df['customer_group'].dropna().unique() if n not in self.customer_groups
+        ]
+        if not names:
+            return
         groups = self.customer_group_repo.filter_by_names(names)
-        self.customer_groups = {g.name: g for g in groups}
-
-    def _build_customer(self, row: pd.Series) -> Customer:
-        customer_group = self.customer_groups.get(row['customer_group'])
-        if not customer_group:
-            customer_group = self.customer_group_repo.get_or_create(row['customer_group'])
-            self.customer_groups[customer_group.name] = customer_group
-
-        customer: CustomerDataType = {
-            'first_name': row['first_name'],
-            'last_name': row['last_name'],
-            'email': row['email'],
-            'phone': row['phone'],
-            'postal_code': row['postal_code'],
-            'customer_since': row['customer_since'],
-            'state': row['state'],
-            'country': row['country'],
-            'customer_group': customer_group,
-            'external_id': row['external_id'],
-        }
-
-        return self.customer_repo.build(customer)
-
-    def _update_customer(self, customer: Customer, row: pd.Series) -> None:
-        customer.external_id = row['external_id']
-        customer.customer_since = row['customer_since']
+        self.customer_groups.update({g.name: g for g in groups})
+
+    def _customer_group_ids(self, df: pd.DataFrame) -> pd.Series:
+        """Pk of each row's customer group, creating the groups not stored yet"""
+        groups = self.customer_group_repo.get_or_create_many(
+            n for n in df['customer_group'].dropna().unique() if n not in self.customer_groups
+        )
+        self.customer_groups.update(groups)
+        return df['customer_group'].map(
+            lambda name: self.customer_groups[name].pk, na_action='ignore'
+        )
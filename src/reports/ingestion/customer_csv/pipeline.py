@@ -1,21 +1,67 @@
+from collections.abc import Iterator, Sequence
+from typing import Any, Optional
+
 import pandas as pd
+from django.conf import settings
 
 from core.ingestion.base_pipeline import BasePipeline
-from core.typings.file_types import CsvSource
+from core.ingestion.checkpoints import Checkpoint
+from core.ingestion.profiling import StageCollector
+from core.ingestion.rejects import RejectWriter
+from core.typings.file_types import CsvEngine, CsvSource
+from customer.repositories.customer_group_repository import CustomerGroupRepository
 from reports.ingestion.customer_csv.extractor import CustomerCsvExtractor
 from reports.ingestion.customer_csv.loader import CustomerCsvLoader
 from reports.ingestion.customer_csv.transformer import CustomerCsvTransformer
+from reports.ingestion.customer_csv.validator import CustomerValidator
 
 
 class CustomerCsvPipeline(BasePipeline):
+    shard_key_columns = ('email', 'external_id')
+    shard_lookup_columns = ('customer_group',)
+    first_row_line = 2  # after the header
+
+    def __init__(
+        self,
+        chunksize: Optional[int] = None,
+        engine: Optional[CsvEngine] = None,
+        collectors: Optional[Sequence[StageCollector]] = None,
+        rejects: Optional[RejectWriter] = None,
+        checkpoint: Optional[Checkpoint] = None,
+    ) -> None:
+        super().__init__(chunksize, collectors, rejects, checkpoint)
+        self.engine: CsvEngine = engine or settings.REPORT_INGESTION_CSV_ENGINE
+        self.loader: Optional[CustomerCsvLoader] = None
+
     def _extract(self, source: CsvSource) -> pd.DataFrame:
-        extractor = CustomerCsvExtractor(source)
+        extractor = CustomerCsvExtractor(source, self.engine)
         return extractor.extract()
 
+    def _extract_chunks(
+        self, source: CsvSource, chunksize: int, start: int = 0
+    ) -> Iterator[pd.DataFrame]:
+        extractor = CustomerCsvExtractor(source, self.engine)
+        return extractor.extract_chunks(chunksize, start)
+
     def _transform(self, df: pd.DataFrame) -> pd.DataFrame:
         transformer = CustomerCsvTransformer(df)
         return transformer.transform()
 
+    def _validator(self) -> CustomerValidator:
+        return CustomerValidator(lambda df: CustomerCsvTransformer(df).transform())
+
     def _load(self, df: pd.DataFrame) -> None:
-        loader = CustomerCsvLoader(df)
-        loader.load()
+        if self.loader is None:
+            self.loader = CustomerCsvLoader(df)
+        self.loader.load_chunk(df)
+
+    def _savepoint(self) -> tuple[Optional[CustomerCsvLoader], Any]:
+        return self.loader, self.loader.savepoint() if self.loader else None
+
+    def _rollback_to(self, state: tuple[Optional[CustomerCsvLoader], Any]) -> None:
+        self.loader, loader_state = state
+        if self.loader is not None:
+            self.loader.rollback_to(loader_state)
+
+    def _prepare_shards(self, lookups: pd.DataFrame) -> None:
+        CustomerGroupRepository().get_or_create_many(lookups['customer_group'].dropna().unique())
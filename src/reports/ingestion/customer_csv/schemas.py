@@ -1,5 +1,4 @@
 COLUMN_ALIASES = {
-    'Créditos / Vale Presentes': 'currency',
     'ID': 'external_id',
     'Nome': 'name',
     'E-mail': 'email',
@@ -10,3 +9,7 @@ COLUMN_ALIASES = {
     'Estado': 'state',
     'Cliente Desde': 'customer_since',
 }
+
+# Arrow type of every column read by the pyarrow engine; headers left out are pruned
+# at parse time.
+COLUMN_TYPES = {column: 'string' for column in COLUMN_ALIASES}
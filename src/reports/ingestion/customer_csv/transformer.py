@@ -13,7 +13,7 @@ class CustomerCsvTransformer(BaseTransformer):
         self.df = self._lower_case_columns(self.df)
         self.df = self._convert_date_columns(self.df)
         self.df = self._keep_only_digits_columns(self.df)
-        self.df = dfu.replace_nulls_with_none(self.df)
+        self.df = self._categorize_columns(self.df)
         return self.df
 
     def _split_columns(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -33,3 +33,7 @@ class CustomerCsvTransformer(BaseTransformer):
     def _keep_only_digits_columns(self, df: pd.DataFrame) -> pd.DataFrame:
         columns = ['phone', 'postal_code']
         return dfu.keep_only_digits(df, columns)
+
+    def _categorize_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        columns = ['customer_group', 'state', 'country']
+        return dfu.to_categories(df, columns)
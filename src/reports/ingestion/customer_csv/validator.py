@@ -0,0 +1,29 @@
+import pandas as pd
+
+from core.ingestion.base_validator import BaseValidator
+from customer.models import Customer, CustomerGroup
+
+
+class CustomerValidator(BaseValidator):
+    """
+    Checks of a transformed customer report (CSV or typed). A name without a
+    surname leaves `last_name` empty, which the database rejects; an `external_id`
+    repeated with another email would be dropped by the loader as a conflict.
+    """
+
+    required_columns = ['email', 'first_name', 'last_name', 'customer_group']
+    parsed_columns = {'customer_since': 'date'}
+    model_fields = {
+        'first_name': (Customer, 'first_name'),
+        'last_name': (Customer, 'last_name'),
+        'email': (Customer, 'email'),
+        'phone': (Customer, 'phone'),
+        'postal_code': (Customer, 'postal_code'),
+        'state': (Customer, 'state'),
+        'country': (Customer, 'country'),
+        'customer_group': (CustomerGroup, 'name'),
+    }
+    consistent_keys = [('external_id', 'email')]
+
+    def check_chunk(self, df: pd.DataFrame) -> None:
+        self.email_check(df)
@@ -0,0 +1,11 @@
+from core.ingestion.typed_formats import TypedExtractor
+from reports.ingestion.customer_csv.schemas import COLUMN_ALIASES
+
+from .schemas import TEXT_COLUMNS
+
+
+class CustomerTypedExtractor(TypedExtractor):
+    """Customer report as Parquet or NDJSON, see `core.ingestion.typed_formats`"""
+
+    column_aliases = COLUMN_ALIASES
+    text_columns = TEXT_COLUMNS
@@ -0,0 +1,42 @@
+from collections.abc import Iterator
+
+import pandas as pd
+
+from core.typings.file_types import CsvSource, TypedFormat
+from reports.ingestion.customer_csv.pipeline import CustomerCsvPipeline
+from reports.ingestion.customer_csv.validator import CustomerValidator
+from reports.ingestion.customer_typed.extractor import CustomerTypedExtractor
+from reports.ingestion.customer_typed.transformer import CustomerTypedTransformer
+
+
+class CustomerTypedPipeline(CustomerCsvPipeline):
+    """Customer report in a typed format; loaded exactly like the CSV one"""
+
+    file_format: TypedFormat
+
+    def _extract(self, source: CsvSource) -> pd.DataFrame:
+        extractor = CustomerTypedExtractor(source, self.file_format)
+        return extractor.extract()
+
+    def _extract_chunks(
+        self, source: CsvSource, chunksize: int, start: int = 0
+    ) -> Iterator[pd.DataFrame]:
+        extractor = CustomerTypedExtractor(source, self.file_format)
+        return extractor.extract_chunks(chunksize, start)
+
+    def _transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        transformer = CustomerTypedTransformer(df)
+        return transformer.transform()
+
+    def _validator(self) -> CustomerValidator:
+        return CustomerValidator(lambda df: CustomerTypedTransformer(df).transform())
+
+
+class CustomerParquetPipeline(CustomerTypedPipeline):
+    file_format = 'parquet'
+    first_row_line = None
+
+
+class CustomerNdjsonPipeline(CustomerTypedPipeline):
+    file_format = 'ndjson'
+    first_row_line = 1
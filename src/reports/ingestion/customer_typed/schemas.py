@@ -0,0 +1,12 @@
+# Canonical columns read as str whatever their type in the file; customer_since
+# keeps its (timestamp or ISO 8601 string) type
+TEXT_COLUMNS = [
+    'external_id',
+    'name',
+    'email',
+    'customer_group',
+    'phone',
+    'postal_code',
+    'country',
+    'state',
+]
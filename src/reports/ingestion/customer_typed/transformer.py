@@ -0,0 +1,18 @@
+import pandas as pd
+
+from reports.ingestion.customer_csv.transformer import CustomerCsvTransformer
+from utils.dataframe_utils import DataFrameUtils as dfu
+from utils.datetime_utils import SAO_PAULO_TZ_NAME
+
+
+class CustomerTypedTransformer(CustomerCsvTransformer):
+    """
+    Same normalization as the CSV transformer, except that dates are timestamps or
+    ISO 8601 strings (naive ones are local times) rather than '%d/%m/%Y' text
+    """
+
+    def _convert_date_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        columns = ['customer_since']
+        df = dfu.convert_to_datetime(df, columns, 'ISO8601')
+        df = dfu.convert_dataframe_datetimes_to_aware(df, columns)
+        return dfu.convert_to_timezone(df, columns, SAO_PAULO_TZ_NAME)
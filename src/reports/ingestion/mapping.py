@@ -1,15 +1,31 @@
 from typing import TypedDict
 
 from reports.ingestion.buy_order_csv.pipeline import BuyOrderCsvPipeline
+from reports.ingestion.buy_order_typed.pipeline import (
+    BuyOrderNdjsonPipeline,
+    BuyOrderParquetPipeline,
+)
 from reports.ingestion.customer_csv.pipeline import CustomerCsvPipeline
+from reports.ingestion.customer_typed.pipeline import (
+    CustomerNdjsonPipeline,
+    CustomerParquetPipeline,
+)
 
 
 class IngestionMappingType(TypedDict):
     buy_orders_csv: type[BuyOrderCsvPipeline]
+    buy_orders_parquet: type[BuyOrderParquetPipeline]
+    buy_orders_ndjson: type[BuyOrderNdjsonPipeline]
     customers_csv: type[CustomerCsvPipeline]
+    customers_parquet: type[CustomerParquetPipeline]
+    customers_ndjson: type[CustomerNdjsonPipeline]
 
 
 REPORT_MAP: IngestionMappingType = {
     'buy_orders_csv': BuyOrderCsvPipeline,
+    'buy_orders_parquet': BuyOrderParquetPipeline,
+    'buy_orders_ndjson': BuyOrderNdjsonPipeline,
     'customers_csv': CustomerCsvPipeline,
+    'customers_parquet': CustomerParquetPipeline,
+    'customers_ndjson': CustomerNdjsonPipeline,
 }
@@ -0,0 +1,181 @@
+"""
+Import job progress, written from the pipeline's profiling hooks.
+
+Progress is only considered at the end of a load pass (once per chunk) and written
+at most once every `REPORT_IMPORT_PROGRESS_INTERVAL` seconds, so tracking costs a
+single UPDATE per interval no matter how many rows a chunk holds.
+
+A streaming run holds one transaction open until it finishes, so progress goes to
+the job's `ImportJobHeartbeat` instead, written through `REPORT_IMPORT_PROGRESS_DATABASE`:
+a connection of its own that commits each write at once, visible while the run goes
+on. A checkpointed import (`ImportJobCheckpoint`) commits chunk by chunk instead and
+writes its progress on the job with each chunk.
+
+The lease of a running job is renewed through the heartbeat too, by
+`ImportJobLeaseCollector`, whether or not the import is streamed or checkpointed.
+"""
+
+import time
+from typing import Any, Dict, Optional, cast
+
+from django.conf import settings
+
+from core.ingestion.checkpoints import Checkpoint
+from core.ingestion.profiling import PipelineReport, StageCollector, StageMetrics
+from reports.models import ImportJob
+from reports.repositories.import_job_repository import ImportJobProgress, ImportJobRepository
+
+
+def job_progress(stages: Dict[str, StageMetrics], chunks: int) -> ImportJobProgress:
+    """Maps a pipeline's stage metrics to the progress fields of its import job"""
+    # Chunks that failed are loaded by the quarantine stage, all but its rejected rows
+    quarantine = stages.get('quarantine', {})
+    rows_rejected = quarantine.get('rows_out', 0)
+    return {
+        'rows_read': stages.get('extract', {}).get('rows_out', 0),
+        'rows_loaded': (
+            stages.get('load', {}).get('rows_in', 0) + quarantine.get('rows_in', 0) - rows_rejected
+        ),
+        'rows_rejected': rows_rejected,
+        'chunks_processed': chunks,
+        'stage_timings': {
+            stage: round(metrics.get('wall_seconds', 0.0), 3) for stage, metrics in stages.items()
+        },
+    }
+
+
+class ImportJobProgressCollector(StageCollector):
+    """
+    Throttled progress writes for `job_id` while its pipeline runs. With `incremental`
+    the counters are added to the job's instead of replacing them, which is how the
+    shards of one job report (stage timings are then left to the final write).
+    """
+
+    def __init__(
+        self, job_id: int, interval: Optional[float] = None, incremental: bool = False
+    ) -> None:
+        self.job_id = job_id
+        self.interval = settings.REPORT_IMPORT_PROGRESS_INTERVAL if interval is None else interval
+        self.incremental = incremental
+        self.repository = ImportJobRepository()
+        self.writes = 0
+
+    def run_started(self, pipeline: Any) -> None:
+        self._stages: Dict[str, StageMetrics] = {}
+        self._chunks = 0
+        self._written = job_progress({}, 0)
+        self._last_write = time.monotonic()
+
+    def stage_finished(self, stage: str, metrics: StageMetrics) -> None:
+        self._stages[stage] = metrics
+        # A chunk ends with its load, or with its quarantine when the load failed
+        if stage not in {'load', 'quarantine'}:
+            return
+
+        self._chunks += 1
+        if time.monotonic() - self._last_write >= self.interval:
+            self._write(job_progress(self._stages, self._chunks))
+            self._last_write = time.monotonic()
+            self.writes += 1
+
+    def _write(self, progress: ImportJobProgress) -> None:
+        if not self.incremental:
+            self.repository.update_progress(self.job_id, progress)
+        else:
+            self.repository.add_progress(
+                self.job_id,
+                rows_read=progress['rows_read'] - self._written['rows_read'],
+                rows_loaded=progress['rows_loaded'] - self._written['rows_loaded'],
+                rows_rejected=progress['rows_rejected'] - self._written['rows_rejected'],
+                chunks=progress['chunks_processed'] - self._written['chunks_processed'],
+            )
+        self._written = progress
+
+
+class ImportJobLeaseCollector(StageCollector):
+    """
+    Renews the lease of the run holding `lease_token` as its pipeline runs, once a
+    stage finishes and `renew_after` seconds (a third of the lease by default) went by
+    since the last renewal. A run whose lease expired and was taken over gets
+    `LeaseLostError` instead, failing it before it writes any further.
+
+    Written through the job's heartbeat, like progress, so a renewal is visible to
+    other workers before a single-transaction import commits.
+    """
+
+    def __init__(
+        self,
+        job_id: int,
+        lease_token: str,
+        lease_seconds: Optional[float] = None,
+        renew_after: Optional[float] = None,
+    ) -> None:
+        self.job_id = job_id
+        self.lease_token = lease_token
+        self.lease_seconds = (
+            settings.REPORT_IMPORT_LEASE_SECONDS if lease_seconds is None else lease_seconds
+        )
+        self.renew_after = self.lease_seconds / 3 if renew_after is None else renew_after
+        self.repository = ImportJobRepository()
+        self.renewals = 0
+
+    def run_started(self, pipeline: Any) -> None:
+        # The lease was just taken (or renewed by the run this one resumes)
+        self._last_renewal = time.monotonic()
+
+    def stage_finished(self, stage: str, metrics: StageMetrics) -> None:
+        if time.monotonic() - self._last_renewal < self.renew_after:
+            return
+
+        self.repository.renew_lease(self.job_id, self.lease_token, self.lease_seconds)
+        self._last_renewal = time.monotonic()
+        self.renewals += 1
+
+
+class ImportJobCheckpoint(Checkpoint):
+    """
+    Keeps the committed position of `job_id` on the job, with its progress. A resumed
+    run counts on from the progress of the chunks committed before it.
+
+    Each save renews the lease of the run holding `lease_token`; a run whose lease
+    expired and was taken over gets `LeaseLostError` instead, so its chunk rolls back.
+    """
+
+    def __init__(self, job_id: int, lease_token: str) -> None:
+        self.job_id = job_id
+        self.lease_token = lease_token
+        # Written in each chunk's transaction, so on the alias the pipeline loads through
+        self.repository = ImportJobRepository()
+        self._committed = job_progress({}, 0)
+
+    def load(self) -> int:
+        job = cast(ImportJob, self.repository.find_by_id(self.job_id))
+        if job.committed_rows:
+            self._committed = {
+                'rows_read': job.rows_read,
+                'rows_loaded': job.rows_loaded,
+                'rows_rejected': job.rows_rejected,
+                'chunks_processed': job.chunks_processed,
+                'stage_timings': job.stage_timings,
+            }
+        return job.committed_rows
+
+    def save(self, rows: int, report: PipelineReport) -> None:
+        self.repository.renew_lease(
+            self.job_id, self.lease_token, settings.REPORT_IMPORT_LEASE_SECONDS
+        )
+        self.repository.save_checkpoint(self.job_id, rows, self.progress(report))
+
+    def progress(self, report: PipelineReport) -> ImportJobProgress:
+        """Progress of the whole import: the committed runs' and this one's so far"""
+        run = job_progress(report['stages'], report['chunks'])
+        timings = dict(self._committed['stage_timings'])
+        for stage, seconds in run['stage_timings'].items():
+            timings[stage] = round(timings.get(stage, 0.0) + seconds, 3)
+        return {
+            'rows_read': self._committed['rows_read'] + run['rows_read'],
+            'rows_loaded': self._committed['rows_loaded'] + run['rows_loaded'],
+            'rows_rejected': self._committed['rows_rejected'] + run['rows_rejected'],
+            'chunks_processed': self._committed['chunks_processed'] + run['chunks_processed'],
+            'stage_timings': timings,
+        }
@@ -1,9 +1,26 @@
 import pytest
 from pathlib import Path
 from django.conf import settings
+from django.core.cache import cache
+
+from core.lookup_cache import clear_lookup_caches
 
 
 @pytest.fixture
 def data_tests_folder() -> Path:
     """Returns data tests folder path"""
     return Path(settings.BASE_DIR) / 'reports' / 'ingestion' / 'tests' / 'fixtures'
+
+
+@pytest.fixture(autouse=True)
+def _clear_lookup_caches():
+    """Cached lookup rows must not outlive the test transaction that created them"""
+    yield
+    clear_lookup_caches()
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def _rejects_dir(settings, tmp_path: Path):
+    """Quarantined rows go to the test's own directory"""
+    settings.REPORT_INGESTION_REJECTS_DIR = tmp_path / 'rejects'
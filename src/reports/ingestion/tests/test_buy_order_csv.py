@@ -1,17 +1,25 @@
 from decimal import Decimal
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import pytest
+from django.db import connection, transaction
 from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
 from pandas.api.types import is_datetime64_any_dtype
 
-from buy_order.models import BuyOrder
-from customer.models import Customer
+from buy_order.models import BuyOrder, DailySalesRollup
+from buy_order.repositories.buy_order_repository import BuyOrderRepository
+from customer.models import Customer, CustomerGroup
+from core.ingestion.profiling import StageCollector
 from reports.ingestion.buy_order_csv.extractor import BuyOrderCsvExtractor
 from reports.ingestion.buy_order_csv.loader import BuyOrderCsvLoader
+from reports.ingestion.buy_order_csv.pipeline import BuyOrderCsvPipeline
 from reports.ingestion.buy_order_csv.schemas import COLUMN_ALIASES
 from reports.ingestion.buy_order_csv.transformer import BuyOrderCsvTransformer
+from utils.dataframe_utils import DataFrameUtils as dfu, text_dtype
+from utils.monetary import InvalidCurrencyError
 
 
 @pytest.fixture
@@ -29,14 +37,22 @@ def transformed_buy_orders_df(raw_buy_orders_df: pd.DataFrame) -> pd.DataFrame:
     return transformer.transform()
 
 
-@pytest.fixture
+@pytest.fixture(params=[True, False], ids=['bulk', 'row'])
 @pytest.mark.django_db
-def loaded_buy_orders(transformed_buy_orders_df: pd.DataFrame) -> None:
-    """Loads the transformed DataFrame into the database."""
-    loader = BuyOrderCsvLoader(transformed_buy_orders_df)
+def loaded_buy_orders(request, transformed_buy_orders_df: pd.DataFrame) -> None:
+    """Loads the transformed DataFrame into the database, once per loader mode."""
+    loader = BuyOrderCsvLoader(transformed_buy_orders_df, bulk=request.param)
     loader.load()
 
 
+def _count_load_queries(df: pd.DataFrame) -> int:
+    """Loads the DataFrame in bulk mode, rolls it back and returns the query count."""
+    with CaptureQueriesContext(connection) as queries, transaction.atomic():
+        BuyOrderCsvLoader(df).load()
+        transaction.set_rollback(True)
+    return len(queries.captured_queries)
+
+
 def test_extract(raw_buy_orders_df):
     df = raw_buy_orders_df
 
@@ -47,6 +63,67 @@ def test_extract(raw_buy_orders_df):
     assert 'totais' not in df['order_number'].str.lower().unique()
 
 
+@pytest.mark.parametrize('chunksize', [4, 10, 11])
+def test_extract_chunks(data_tests_folder, raw_buy_orders_df, chunksize):
+    extractor = BuyOrderCsvExtractor(csv_file=data_tests_folder / 'buy_orders.csv')
+    chunks = list(extractor.extract_chunks(chunksize))
+
+    assert all(0 < len(chunk) <= chunksize for chunk in chunks)
+    pd.testing.assert_frame_equal(pd.concat(chunks), raw_buy_orders_df)
+
+
+def test_extract_with_pyarrow_engine(data_tests_folder, raw_buy_orders_df):
+    pytest.importorskip('pyarrow')
+    extractor = BuyOrderCsvExtractor(data_tests_folder / 'buy_orders.csv', engine='pyarrow')
+    df = extractor.extract()
+
+    assert df['order_id'].dtype == 'int64[pyarrow]'
+    assert df['order_number'].dtype == 'string[pyarrow]'
+    assert df['order_id'].tolist() == raw_buy_orders_df['order_id'].astype(int).tolist()
+    text_columns = df.columns.drop(['order_id', 'sold_quantity'])
+    # Both engines read text as Arrow-backed strings
+    text = df[text_columns].astype(text_dtype())
+    pd.testing.assert_frame_equal(text, raw_buy_orders_df[text_columns])
+
+
+def test_transform_reports_invalid_currency_rows(raw_buy_orders_df):
+    df = raw_buy_orders_df.copy()
+    df.loc[[2, 5], 'total_amount'] = ['R$ abc', None]
+
+    with pytest.raises(InvalidCurrencyError) as exc_info:
+        BuyOrderCsvTransformer(df).transform()
+
+    assert exc_info.value.invalid_rows == {'total_amount': [2, 5]}
+
+
+def test_transform_reads_blank_optional_amounts_as_zero(raw_buy_orders_df):
+    df = raw_buy_orders_df.copy()
+    df.loc[[1, 4], 'shipping_amount'] = [None, '  ']
+    df.loc[[3], 'discount_amount'] = ['']
+    df.loc[[6], 'discount_amount'] = ['R$ abc']
+
+    with pytest.raises(InvalidCurrencyError) as exc_info:
+        BuyOrderCsvTransformer(df.copy()).transform()
+    df.loc[6, 'discount_amount'] = None
+    transformed = BuyOrderCsvTransformer(df).transform()
+
+    assert exc_info.value.invalid_rows == {'discount_amount': [6]}
+    assert transformed.loc[[1, 4], 'shipping_amount'].tolist() == [0, 0]
+    assert transformed.loc[[3, 6], 'discount_amount'].tolist() == [0, 0]
+
+
+def test_transform_localizes_dst_edges(raw_buy_orders_df):
+    df = raw_buy_orders_df.copy()
+    # 2018-11-04 00:30 was skipped by DST start, 2019-02-16 23:30 happened twice at DST end
+    df.loc[[0, 1], 'order_date'] = ['04/11/2018 00:30:00', '16/02/2019 23:30:00']
+
+    df = BuyOrderCsvTransformer(df).transform()
+
+    assert str(df['order_date'].dtype) == 'datetime64[ns, America/Sao_Paulo]'
+    assert df.loc[0, 'order_date'] == pd.Timestamp('2018-11-04 03:00', tz='UTC')
+    assert df.loc[1, 'order_date'] == pd.Timestamp('2019-02-17 01:30', tz='UTC')
+
+
 def test_transform(transformed_buy_orders_df):
     df = transformed_buy_orders_df
 
@@ -57,11 +134,11 @@ def test_transform(transformed_buy_orders_df):
             f"Column '{column}' contains non-lowercase values."
         )
 
-    columns_to_check_decimal = ['shipping_amount', 'discount_amount', 'total_amount']
-    for column in columns_to_check_decimal:
-        assert all(isinstance(x, Decimal) for x in df[column].dropna()), (
-            f"Column '{column}' does not contain only Decimal objects."
-        )
+    columns_to_check_centavos = ['shipping_amount', 'discount_amount', 'total_amount']
+    for column in columns_to_check_centavos:
+        assert df[column].dtype == np.int64, f"Column '{column}' is not int64 centavos."
+    total_centavos = 33793
+    assert df.loc[df['order_number'] == '100000004', 'total_amount'].item() == total_centavos
 
     columns_to_check_date = ['order_date']
     for column in columns_to_check_date:
@@ -78,6 +155,51 @@ def test_transform(transformed_buy_orders_df):
     assert actual_payment_types.issubset(expected_payment_types)
 
 
+def test_transform_normalizes_payment_types(raw_buy_orders_df):
+    df = raw_buy_orders_df.iloc[:6].copy()
+    df['payment_type'] = [
+        'Cartão Visa',
+        'PIX',
+        None,
+        'Saldo necessário (boleto)',
+        'Boleto ou cartão',
+        'Dinheiro',
+    ]
+
+    df = BuyOrderCsvTransformer(df).transform()
+
+    # The first key of the mapping contained in a value wins, wherever it sits
+    assert dfu.replace_nulls_with_none(df)['payment_type'].tolist() == [
+        'cartão de crédito',
+        'pix',
+        None,
+        'boleto bancário',
+        'cartão de crédito',
+        'dinheiro',
+    ]
+
+
+def test_transform_keeps_arrow_strings_and_categories(transformed_buy_orders_df):
+    df = transformed_buy_orders_df
+
+    for column in ['order_number', 'email', 'cpf', 'phone']:
+        assert df[column].dtype == text_dtype()
+    for column in ['customer_group', 'status', 'payment_type']:
+        assert isinstance(df[column].dtype, pd.CategoricalDtype)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('bulk', [True, False], ids=['bulk', 'row'])
+def test_nulls_are_loaded_as_null(raw_buy_orders_df, bulk):
+    df = raw_buy_orders_df.copy()
+    df['phone'] = None
+
+    BuyOrderCsvLoader(BuyOrderCsvTransformer(df).transform(), bulk=bulk).load()
+
+    assert Customer.objects.exists()
+    assert not Customer.objects.filter(phone__isnull=False).exists()
+
+
 @pytest.mark.django_db
 def test_load_data(loaded_buy_orders):
     total_buy_orders = 10
@@ -141,3 +263,248 @@ def test_buy_order_status_update(loaded_buy_orders):
     buy_order = BuyOrder.objects.get(order_number=order_number)
 
     assert buy_order.status.name == 'enviado'
+
+
+@pytest.mark.django_db
+def test_bulk_load_query_count_is_constant(transformed_buy_orders_df):
+    df = transformed_buy_orders_df
+    copies = []
+    for copy in range(5):
+        copy_df = df.copy()
+        copy_df['order_number'] += f'-{copy}'
+        copy_df['order_id'] += str(copy)
+        copies.append(copy_df)
+    larger_df = pd.concat(copies, ignore_index=True)
+
+    assert _count_load_queries(larger_df) == _count_load_queries(df)
+
+
+@pytest.mark.django_db
+def test_bulk_load_updates_each_customer_once(transformed_buy_orders_df):
+    df = transformed_buy_orders_df
+    BuyOrderCsvLoader(df).load()
+    loaded_at = dict(Customer.objects.values_list('pk', 'updated_at'))
+    later_df = df.copy()
+    later_df['order_date'] += pd.Timedelta(days=1)
+
+    with CaptureQueriesContext(connection) as queries:
+        BuyOrderCsvLoader(later_df).load()
+
+    customer_table = Customer._meta.db_table
+    writes = [
+        query['sql']
+        for query in queries.captured_queries
+        if query['sql'].startswith((
+            f'UPDATE "{customer_table}"',
+            f'INSERT INTO "{customer_table}"',
+        ))
+    ]
+    assert len(writes) == 1
+    # An upsert on the pk; every customer keeps the data of its latest order, so only
+    # `last_order` moves
+    updated = writes[0].split(' DO UPDATE SET ')[1]
+    assert writes[0].startswith('INSERT')
+    assert '"last_order" = EXCLUDED."last_order"' in updated
+    assert '"first_name"' not in updated
+    last_orders = set(Customer.objects.values_list('last_order', flat=True))
+    assert last_orders <= set(later_df['order_date'])
+    # Refreshed like `save()` does, though the upsert skips auto_now
+    assert all(
+        updated_at > loaded_at[pk]
+        for pk, updated_at in Customer.objects.values_list('pk', 'updated_at')
+    )
+
+
+@pytest.mark.django_db
+def test_bulk_load_updates_only_the_orders_whose_status_changed(transformed_buy_orders_df):
+    df = transformed_buy_orders_df
+    BuyOrderCsvLoader(df).load()
+    loaded_at = dict(BuyOrder.objects.values_list('order_number', 'updated_at'))
+    later_df = df.copy()
+    later_df['status'] = later_df['status'].cat.add_categories('estornado')
+    later_df.loc[[1, 4], 'status'] = 'estornado'
+
+    with CaptureQueriesContext(connection) as queries:
+        BuyOrderCsvLoader(later_df).load()
+
+    order_table = BuyOrder._meta.db_table
+    writes = [
+        query['sql']
+        for query in queries.captured_queries
+        if query['sql'].startswith((f'UPDATE "{order_table}"', f'INSERT INTO "{order_table}"'))
+    ]
+    assert len(writes) == 1
+    assert writes[0].startswith(f'UPDATE "{order_table}" SET "status_id"')
+    refunded = BuyOrder.objects.filter(status__name='estornado')
+    assert set(refunded.values_list('order_number', flat=True)) == set(
+        later_df.loc[[1, 4], 'order_number']
+    )
+    assert all(
+        updated_at > loaded_at[order_number]
+        for order_number, updated_at in refunded.values_list('order_number', 'updated_at')
+    )
+
+
+@pytest.mark.django_db
+def test_order_lookup_is_batched_to_the_parameter_limit(
+    transformed_buy_orders_df, monkeypatch: pytest.MonkeyPatch
+):
+    BuyOrderCsvLoader(transformed_buy_orders_df).load()
+    order_numbers = list(BuyOrder.objects.values_list('order_number', flat=True))
+    monkeypatch.setattr(connection.features, 'max_query_params', 3)
+
+    with CaptureQueriesContext(connection) as queries:
+        stored = BuyOrderRepository().find_by_order_numbers([*order_numbers, 'missing'])
+
+    assert stored.keys() == set(order_numbers)
+    assert len(queries) == len(range(0, len(order_numbers) + 1, 3))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('bulk', [True, False], ids=['bulk', 'row'])
+def test_stored_orders_take_their_status_without_a_payment_type(transformed_buy_orders_df, bulk):
+    BuyOrderCsvLoader(transformed_buy_orders_df.iloc[:1].copy(), bulk=bulk).load()
+    stored = BuyOrder.objects.get()
+    # A status update of the stored order and a new order, both without a payment type
+    df = transformed_buy_orders_df.iloc[:2].copy()
+    df['order_number'] = [stored.order_number, '999999999']
+    df['status'] = 'entregue'
+    df['payment_type'] = None
+
+    BuyOrderCsvLoader(df, bulk=bulk).load()
+
+    order = BuyOrder.objects.get()
+    assert order.status.name == 'entregue'
+    assert order.payment_type_id == stored.payment_type_id
+    rollup = DailySalesRollup.objects.filter(order_count__gt=0)
+    assert list(rollup.values_list('status__name', 'order_count')) == [('entregue', 1)]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('bulk', [True, False], ids=['bulk', 'row'])
+def test_new_keys_link_rows_to_a_stored_customer(transformed_buy_orders_df, bulk):
+    stored = Customer.objects.create(
+        first_name='ana',
+        last_name='silva',
+        email='a@x.com',
+        customer_group=CustomerGroup.objects.create(name='varejo'),
+    )
+    # The first row gives the stored customer a cpf the second row, new email, carries
+    df = transformed_buy_orders_df.iloc[:2].copy()
+    df['email'] = ['a@x.com', 'b@x.com']
+    df['cpf'] = '72514712365'
+    df['order_date'] = df['order_date'].iloc[0] + pd.to_timedelta([0, 1], unit='D')
+
+    BuyOrderCsvLoader(df, bulk=bulk).load()
+
+    customer = Customer.objects.get()
+    assert customer.pk == stored.pk
+    assert customer.email == 'b@x.com'
+    assert customer.cpf == '72514712365'
+    assert set(BuyOrder.objects.values_list('customer', flat=True)) == {stored.pk}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('bulk', [True, False], ids=['bulk', 'row'])
+def test_keys_held_by_another_customer_stay_with_it(transformed_buy_orders_df, bulk):
+    group = CustomerGroup.objects.create(name='varejo')
+    ana, bia = [
+        Customer.objects.create(
+            first_name=name,
+            last_name='silva',
+            email=f'{name}@x.com',
+            cpf=cpf,
+            customer_group=group,
+        )
+        for name, cpf in [('ana', '11111111111'), ('bia', '22222222222')]
+    ]
+    # Ana's order carries Bia's cpf
+    df = transformed_buy_orders_df.iloc[:1].copy()
+    df['email'] = 'ana@x.com'
+    df['cpf'] = '22222222222'
+
+    BuyOrderCsvLoader(df, bulk=bulk).load()
+
+    ana.refresh_from_db()
+    bia.refresh_from_db()
+    assert (ana.cpf, bia.cpf) == ('11111111111', '22222222222')
+    assert ana.last_order == df['order_date'].iloc[0]
+    assert set(BuyOrder.objects.values_list('customer', flat=True)) == {ana.pk}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('bulk', [True, False], ids=['bulk', 'row'])
+def test_email_case_variants_load_into_the_oldest_customer(transformed_buy_orders_df, bulk):
+    group = CustomerGroup.objects.create(name='varejo')
+    oldest, newest = [
+        Customer.objects.create(
+            first_name='ana', last_name='silva', email=email, customer_group=group
+        )
+        for email in ['Ana@X.com', 'ANA@x.com']
+    ]
+    df = transformed_buy_orders_df.iloc[:1].copy()
+    df['email'] = 'ana@x.com'
+    df['cpf'] = None
+
+    BuyOrderCsvLoader(df, bulk=bulk).load()
+
+    assert set(BuyOrder.objects.values_list('customer', flat=True)) == {oldest.pk}
+    assert not newest.buy_orders.exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ('engine', 'chunksize'), [('c', 4), ('c', 10), ('pyarrow', None), ('pyarrow', 4)]
+)
+def test_pipeline_run(data_tests_folder, engine, chunksize):
+    if engine == 'pyarrow':
+        pytest.importorskip('pyarrow')
+    pipeline = BuyOrderCsvPipeline(chunksize=chunksize, engine=engine)
+    pipeline.run(data_tests_folder / 'buy_orders.csv')
+
+    total_buy_orders = 10
+    total_customers = 4
+    assert Customer.objects.count() == total_customers
+    assert BuyOrder.objects.count() == total_buy_orders
+    assert BuyOrder.objects.get(order_number='100000010').status.name == 'enviado'
+    assert Customer.objects.get(cpf='82312314727').first_name == 'bruna'
+
+
+class _RecordingCollector(StageCollector):
+    def run_started(self, pipeline):
+        self.events = ['run_started']
+
+    def stage_started(self, stage):
+        self.events.append(f'{stage}_started')
+
+    def stage_finished(self, stage, metrics):
+        metrics['custom'] = metrics.get('custom', 0) + 1
+
+    def run_finished(self, report):
+        self.events.append('run_finished')
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('chunksize', [None, 4])
+def test_pipeline_run_report(data_tests_folder, chunksize):
+    collector = _RecordingCollector()
+    pipeline = BuyOrderCsvPipeline(chunksize=chunksize, collectors=[collector])
+    report = pipeline.run(data_tests_folder / 'buy_orders.csv')
+
+    total_rows = 11
+    chunks = 1 if chunksize is None else 3
+    extract, transform, load = (report['stages'][s] for s in ('extract', 'transform', 'load'))
+    assert report['pipeline'] == 'BuyOrderCsvPipeline'
+    assert report['rows'] == total_rows
+    assert report['chunks'] == chunks
+    assert extract['rows_out'] == transform['rows_in'] == transform['rows_out'] == total_rows
+    assert load['rows_in'] == total_rows
+    assert transform['calls'] == load['calls'] == chunks
+    assert transform['queries'] == 0
+    assert load['queries'] > 0
+    assert transform['memory_bytes'] > 0
+    assert load['wall_seconds'] >= load['query_seconds'] >= 0
+    assert {'cpu_seconds', 'peak_rss_delta_kb'} <= load.keys()
+    assert load['custom'] == chunks
+    assert collector.events[0] == 'run_started'
+    assert collector.events[-1] == 'run_finished'
@@ -0,0 +1,406 @@
+import gzip
+import itertools
+import threading
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from celery.exceptions import Retry
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from buy_order.models import BuyOrder, DailySalesRollup
+from reports.ingestion.buy_order_csv.extractor import BuyOrderCsvExtractor
+from reports.ingestion.buy_order_csv.pipeline import BuyOrderCsvPipeline
+from reports.ingestion import progress
+from reports.ingestion.buy_order_typed.extractor import BuyOrderTypedExtractor
+from reports.models import ImportJob, ImportJobHeartbeat
+from reports.repositories.import_job_repository import ImportJobRepository
+from reports.tasks import process_report_task
+
+TOTAL_ROWS = 11
+CHUNKSIZE = 4
+
+
+def _expire_lease(job: ImportJob) -> None:
+    """The lost run's lease runs out, as it is no longer renewed"""
+    ImportJob.objects.filter(pk=job.pk).update(leased_until=timezone.now())
+    ImportJobHeartbeat.objects.filter(job_id=job.pk).update(leased_until=timezone.now())
+
+
+def _crash_at_row(monkeypatch: pytest.MonkeyPatch, row: int) -> None:
+    """The worker dies (no `Exception`, nothing handles it) loading `row`, once"""
+    load = BuyOrderCsvPipeline._load
+    crashed = []
+
+    def _load(self, df: pd.DataFrame) -> None:
+        if not crashed and row in df.index:
+            crashed.append(row)
+            raise SystemExit('worker lost')
+        load(self, df)
+
+    monkeypatch.setattr(BuyOrderCsvPipeline, '_load', _load)
+
+
+def _fail_at_row(monkeypatch: pytest.MonkeyPatch, row: int) -> None:
+    """Loading `row` fails, once, with an error rows are not quarantined for"""
+    load = BuyOrderCsvPipeline._load
+    failed = []
+
+    def _load(self, df: pd.DataFrame) -> None:
+        if not failed and row in df.index:
+            failed.append(row)
+            raise RuntimeError('connection lost')
+        load(self, df)
+
+    monkeypatch.setattr(BuyOrderCsvPipeline, '_load', _load)
+
+
+def _retry(job: ImportJob):
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user('operador'))
+    return client.post(reverse('v1:api-import-job-retry', kwargs={'pk': job.pk}))
+
+
+@pytest.mark.parametrize('engine', ['c', 'pyarrow'])
+@pytest.mark.parametrize('suffix', ['.csv', '.csv.gz'])
+def test_csv_chunks_resume_at_a_row(data_tests_folder: Path, tmp_path: Path, engine, suffix):
+    if engine == 'pyarrow':
+        pytest.importorskip('pyarrow')
+    content = (data_tests_folder / 'buy_orders.csv').read_bytes()
+    source = tmp_path / f'buy_orders{suffix}'
+    source.write_bytes(gzip.compress(content) if suffix.endswith('.gz') else content)
+    extractor = BuyOrderCsvExtractor(source, engine)
+    start = 5
+
+    resumed = pd.concat(extractor.extract_chunks(CHUNKSIZE, start))
+
+    pd.testing.assert_frame_equal(resumed, extractor.extract().iloc[start:])
+
+
+@pytest.mark.parametrize('file_format', ['parquet', 'ndjson'])
+def test_typed_chunks_resume_at_a_row(data_tests_folder: Path, tmp_path: Path, file_format):
+    if file_format == 'parquet':
+        pytest.importorskip('pyarrow')
+    df = BuyOrderCsvExtractor(data_tests_folder / 'buy_orders.csv').extract()
+    source = tmp_path / f'buy_orders.{file_format}'
+    if file_format == 'parquet':
+        # Row groups of 3 rows: resuming at row 5 skips the first group unread
+        df.to_parquet(source, index=False, row_group_size=3)
+    else:
+        df.to_json(source, orient='records', lines=True)
+    extractor = BuyOrderTypedExtractor(source, file_format)
+    start = 5
+
+    resumed = pd.concat(extractor.extract_chunks(CHUNKSIZE, start))
+
+    pd.testing.assert_frame_equal(resumed, extractor.extract().iloc[start:])
+
+
+@pytest.mark.django_db
+@override_settings(REPORT_INGESTION_CHUNKSIZE=CHUNKSIZE, REPORT_INGESTION_CHECKPOINTS=True)
+def test_lost_worker_resumes_after_the_last_committed_chunk(
+    data_tests_folder: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    csv_text = (data_tests_folder / 'buy_orders.csv').read_text(encoding='utf-8')
+    csv_path = tmp_path / 'buy_orders.csv'
+    csv_path.write_text(csv_text, encoding='utf-8')
+    job = ImportJob.objects.create(report_type='buy_orders_csv')
+    _crash_at_row(monkeypatch, 8)
+
+    with pytest.raises(SystemExit):
+        process_report_task('buy_orders_csv', str(csv_path), job.pk)
+
+    job.refresh_from_db()
+    committed_rows = 8
+    assert job.state == ImportJob.State.RUNNING
+    assert job.committed_rows == job.rows_loaded == committed_rows
+    assert csv_path.exists()
+
+    # Redelivered: the first two chunks are not parsed, let alone loaded, again
+    _expire_lease(job)
+    result = process_report_task('buy_orders_csv', str(csv_path), job.pk)
+
+    job.refresh_from_db()
+    total_buy_orders = 10
+    assert result['profile']['rows'] == TOTAL_ROWS - committed_rows
+    assert job.state == ImportJob.State.SUCCEEDED
+    assert job.rows_read == job.rows_loaded == job.committed_rows == TOTAL_ROWS
+    assert job.chunks_processed == len(range(0, TOTAL_ROWS, CHUNKSIZE))
+    assert BuyOrder.objects.count() == total_buy_orders
+    rollup_orders = sum(DailySalesRollup.objects.values_list('order_count', flat=True))
+    assert rollup_orders == total_buy_orders
+    assert not csv_path.exists()
+
+    # A late duplicate delivery finds the job finished
+    assert process_report_task('buy_orders_csv', str(csv_path), job.pk)['job_id'] == job.pk
+
+
+@pytest.mark.django_db
+@override_settings(REPORT_INGESTION_CHUNKSIZE=CHUNKSIZE, REPORT_INGESTION_CHECKPOINTS=True)
+def test_resumed_import_keeps_each_reject_once(
+    data_tests_folder: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    df = pd.read_csv(data_tests_folder / 'buy_orders.csv', dtype=str, keep_default_na=False)
+    # Row 0 is committed before the crash, row 9 is in the chunk it rolls back
+    df.loc[[0, 9], 'Total da Venda'] = 'R$ abc'
+    csv_path = tmp_path / 'buy_orders.csv'
+    df.to_csv(csv_path, index=False)
+    job = ImportJob.objects.create(report_type='buy_orders_csv')
+    _crash_at_row(monkeypatch, 8)
+
+    with pytest.raises(SystemExit):
+        process_report_task('buy_orders_csv', str(csv_path), job.pk)
+    _expire_lease(job)
+    process_report_task('buy_orders_csv', str(csv_path), job.pk)
+
+    job.refresh_from_db()
+    rejected_rows = 2
+    assert job.rows_rejected == rejected_rows
+    assert job.rows_loaded == TOTAL_ROWS - rejected_rows
+    rejected = pd.read_csv(job.rejects_file, dtype=str)
+    assert rejected['row'].tolist() == ['0', '9']
+
+
+@pytest.mark.django_db
+@override_settings(REPORT_INGESTION_CHUNKSIZE=CHUNKSIZE, REPORT_INGESTION_CHECKPOINTS=True)
+def test_redelivery_waits_for_the_running_lease(
+    data_tests_folder: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    csv_path = tmp_path / 'buy_orders.csv'
+    csv_path.write_bytes((data_tests_folder / 'buy_orders.csv').read_bytes())
+    job = ImportJob.objects.create(report_type='buy_orders_csv')
+    _crash_at_row(monkeypatch, 8)
+    with pytest.raises(SystemExit):
+        process_report_task('buy_orders_csv', str(csv_path), job.pk)
+
+    # Delivered again while the first run may still be loading (e.g. consumer timeout)
+    with pytest.raises(Retry):
+        process_report_task('buy_orders_csv', str(csv_path), job.pk)
+
+    job.refresh_from_db()
+    assert job.attempts == 1
+    assert job.committed_rows == CHUNKSIZE * 2
+
+
+@pytest.mark.django_db
+@override_settings(REPORT_INGESTION_CHUNKSIZE=CHUNKSIZE, REPORT_INGESTION_CHECKPOINTS=True)
+def test_stale_run_cannot_commit_after_a_takeover(
+    data_tests_folder: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    csv_path = tmp_path / 'buy_orders.csv'
+    csv_path.write_bytes((data_tests_folder / 'buy_orders.csv').read_bytes())
+    job = ImportJob.objects.create(report_type='buy_orders_csv')
+    load = BuyOrderCsvPipeline._load
+
+    def _load(self, df: pd.DataFrame) -> None:
+        if 0 in df.index:
+            # The run stalls past its lease and another run takes the job over
+            _expire_lease(job)
+            assert ImportJobRepository().mark_running(job.pk, 60, 3)
+        load(self, df)
+
+    monkeypatch.setattr(BuyOrderCsvPipeline, '_load', _load)
+
+    result = process_report_task('buy_orders_csv', str(csv_path), job.pk)
+
+    job.refresh_from_db()
+    assert 'taken over' in result['message']
+    assert job.state == ImportJob.State.RUNNING
+    assert job.committed_rows == 0
+    assert not BuyOrder.objects.exists()
+    assert csv_path.exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('chunksize', [None, CHUNKSIZE])
+@override_settings(REPORT_INGESTION_CHECKPOINTS=False, REPORT_IMPORT_LEASE_SECONDS=60)
+def test_runs_without_checkpoints_renew_their_lease(
+    data_tests_folder: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, chunksize
+):
+    csv_path = tmp_path / 'buy_orders.csv'
+    csv_path.write_bytes((data_tests_folder / 'buy_orders.csv').read_bytes())
+    job = ImportJob.objects.create(report_type='buy_orders_csv')
+    renew_lease = ImportJobRepository.renew_lease
+    renewals = []
+
+    def _renew_lease(self, job_id: int, lease_token: str, lease_seconds: float) -> None:
+        renewals.append((job_id, lease_seconds))
+        renew_lease(self, job_id, lease_token, lease_seconds)
+
+    monkeypatch.setattr(ImportJobRepository, 'renew_lease', _renew_lease)
+    # Every stage takes half the lease
+    monkeypatch.setattr(progress.time, 'monotonic', itertools.count(step=30).__next__)
+
+    with override_settings(REPORT_INGESTION_CHUNKSIZE=chunksize):
+        process_report_task('buy_orders_csv', str(csv_path), job.pk)
+
+    job.refresh_from_db()
+    assert job.state == ImportJob.State.SUCCEEDED
+    assert renewals
+    assert set(renewals) == {(job.pk, 60)}
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'progress'])
+@override_settings(
+    REPORT_IMPORT_PROGRESS_DATABASE='progress',
+    REPORT_INGESTION_CHUNKSIZE=CHUNKSIZE,
+    REPORT_INGESTION_CHECKPOINTS=False,
+    REPORT_IMPORT_LEASE_SECONDS=60,
+)
+def test_lease_renewals_are_seen_by_other_workers_while_the_import_runs(
+    data_tests_folder: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    csv_path = tmp_path / 'buy_orders.csv'
+    csv_path.write_bytes((data_tests_folder / 'buy_orders.csv').read_bytes())
+    job = ImportJob.objects.create(report_type='buy_orders_csv')
+    load = BuyOrderCsvPipeline._load
+    seen = []
+
+    def _other_worker() -> None:
+        # A thread of its own gets connections of its own, as another worker would
+        try:
+            repository = ImportJobRepository()
+            running = repository.find_by_id(job.pk)
+            seen.append((running.leased_until, repository.lease_expiry(running)))
+            seen.append(repository.mark_running(job.pk, 60, 3))
+        finally:
+            connections.close_all()
+
+    def _load(self, df: pd.DataFrame) -> None:
+        if CHUNKSIZE * 2 in df.index:
+            worker = threading.Thread(target=_other_worker)
+            worker.start()
+            worker.join()
+        load(self, df)
+
+    monkeypatch.setattr(BuyOrderCsvPipeline, '_load', _load)
+    # Every stage takes half the lease
+    monkeypatch.setattr(progress.time, 'monotonic', itertools.count(step=30).__next__)
+
+    process_report_task('buy_orders_csv', str(csv_path), job.pk)
+
+    (claimed_until, renewed_until), takeover = seen
+    job.refresh_from_db()
+    assert renewed_until > claimed_until
+    assert takeover is None
+    assert job.state == ImportJob.State.SUCCEEDED
+    assert job.attempts == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('chunksize', [None, CHUNKSIZE])
+@override_settings(REPORT_INGESTION_CHECKPOINTS=False, REPORT_IMPORT_LEASE_SECONDS=0)
+def test_stale_run_without_checkpoints_rolls_back_after_a_takeover(
+    data_tests_folder: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, chunksize
+):
+    csv_path = tmp_path / 'buy_orders.csv'
+    csv_path.write_bytes((data_tests_folder / 'buy_orders.csv').read_bytes())
+    job = ImportJob.objects.create(report_type='buy_orders_csv')
+    load = BuyOrderCsvPipeline._load
+
+    def _load(self, df: pd.DataFrame) -> None:
+        if 0 in df.index:
+            # The run stalls past its lease and another run takes the job over
+            assert ImportJobRepository().mark_running(job.pk, 60, 3)
+        load(self, df)
+
+    monkeypatch.setattr(BuyOrderCsvPipeline, '_load', _load)
+
+    with override_settings(REPORT_INGESTION_CHUNKSIZE=chunksize):
+        result = process_report_task('buy_orders_csv', str(csv_path), job.pk)
+
+    job.refresh_from_db()
+    assert 'taken over' in result['message']
+    assert job.state == ImportJob.State.RUNNING
+    assert not BuyOrder.objects.exists()
+
+
+@pytest.mark.django_db
+@override_settings(REPORT_INGESTION_CHUNKSIZE=CHUNKSIZE, REPORT_IMPORT_MAX_ATTEMPTS=2)
+def test_job_killing_its_workers_fails_after_max_attempts(
+    data_tests_folder: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    csv_path = tmp_path / 'buy_orders.csv'
+    csv_path.write_bytes((data_tests_folder / 'buy_orders.csv').read_bytes())
+    job = ImportJob.objects.create(report_type='buy_orders_csv')
+
+    def _load(self, df: pd.DataFrame) -> None:
+        raise SystemExit('out of memory')
+
+    monkeypatch.setattr(BuyOrderCsvPipeline, '_load', _load)
+    for _ in range(2):
+        with pytest.raises(SystemExit):
+            process_report_task('buy_orders_csv', str(csv_path), job.pk)
+        _expire_lease(job)
+
+    result = process_report_task('buy_orders_csv', str(csv_path), job.pk)
+
+    job.refresh_from_db()
+    assert 'abandoned' in result['message']
+    assert job.state == ImportJob.State.FAILED
+    assert job.errors[0]['type'] == 'WorkerLostError'
+    assert not csv_path.exists()
+
+
+@pytest.mark.django_db
+@override_settings(REPORT_INGESTION_CHUNKSIZE=CHUNKSIZE, REPORT_INGESTION_CHECKPOINTS=True)
+def test_failed_import_keeps_its_committed_chunks_resumable(
+    data_tests_folder: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    df = pd.read_csv(data_tests_folder / 'buy_orders.csv', dtype=str, keep_default_na=False)
+    # Row 0 is committed before the failure, row 9 is in the chunk it rolls back
+    df.loc[[0, 9], 'Total da Venda'] = 'R$ abc'
+    csv_path = tmp_path / 'buy_orders.csv'
+    df.to_csv(csv_path, index=False)
+    job = ImportJob.objects.create(report_type='buy_orders_csv', source_file=str(csv_path))
+    _fail_at_row(monkeypatch, 8)
+
+    with pytest.raises(ValueError, match='connection lost'):
+        process_report_task('buy_orders_csv', str(csv_path), job.pk)
+
+    job.refresh_from_db()
+    committed_rows = 8
+    assert job.state == ImportJob.State.FAILED
+    assert job.committed_rows == committed_rows
+    assert job.rows_rejected == 1
+    assert pd.read_csv(job.rejects_file, dtype=str)['row'].tolist() == ['0']
+    # Kept for the runs resuming the job, under a name not guessed from its id
+    assert Path(job.rejects_file).stem.startswith(f'job-{job.pk}-')
+    assert csv_path.exists()
+
+    response = _retry(job)
+
+    job.refresh_from_db()
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert job.state == ImportJob.State.SUCCEEDED
+    assert job.errors == []
+    assert job.committed_rows == job.rows_read == TOTAL_ROWS
+    assert job.profile['rows'] == TOTAL_ROWS - committed_rows
+    assert pd.read_csv(job.rejects_file, dtype=str)['row'].tolist() == ['0', '9']
+    assert not csv_path.exists()
+
+
+@pytest.mark.django_db
+@override_settings(REPORT_INGESTION_CHUNKSIZE=CHUNKSIZE, REPORT_INGESTION_CHECKPOINTS=True)
+def test_failed_import_without_committed_chunks_is_not_resumable(
+    data_tests_folder: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    csv_path = tmp_path / 'buy_orders.csv'
+    csv_path.write_bytes((data_tests_folder / 'buy_orders.csv').read_bytes())
+    job = ImportJob.objects.create(report_type='buy_orders_csv', source_file=str(csv_path))
+    _fail_at_row(monkeypatch, 0)
+
+    with pytest.raises(ValueError, match='connection lost'):
+        process_report_task('buy_orders_csv', str(csv_path), job.pk)
+
+    job.refresh_from_db()
+    assert job.state == ImportJob.State.FAILED
+    assert job.committed_rows == 0
+    assert not csv_path.exists()
+    assert _retry(job).status_code == status.HTTP_409_CONFLICT
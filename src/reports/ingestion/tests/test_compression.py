@@ -0,0 +1,106 @@
+import gzip
+import zipfile
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from buy_order.models import BuyOrder
+from core.ingestion.compression import detect_compression
+from reports.ingestion.buy_order_csv.extractor import BuyOrderCsvExtractor
+from reports.ingestion.customer_csv.extractor import CustomerCsvExtractor
+
+
+def _gzip(data: bytes, path: Path) -> Path:
+    path = path.with_suffix('.csv.gz')
+    path.write_bytes(gzip.compress(data))
+    return path
+
+
+def _zstd(data: bytes, path: Path) -> Path:
+    zstandard = pytest.importorskip('zstandard')
+    path = path.with_suffix('.csv.zst')
+    path.write_bytes(zstandard.ZstdCompressor().compress(data))
+    return path
+
+
+def _zip(data: bytes, path: Path) -> Path:
+    path = path.with_suffix('.zip')
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('report.csv', data)
+    return path
+
+
+@pytest.mark.parametrize('compress', [_gzip, _zstd, _zip])
+@pytest.mark.parametrize('engine', ['c', 'pyarrow'])
+@pytest.mark.parametrize(
+    'extractor_class',
+    [BuyOrderCsvExtractor, CustomerCsvExtractor],
+    ids=['buy_orders', 'customers'],
+)
+def test_compressed_reports_match_plain_ones(
+    data_tests_folder: Path, tmp_path: Path, compress, engine, extractor_class
+):
+    file_name = 'buy_orders.csv' if extractor_class is BuyOrderCsvExtractor else 'customers.csv'
+    plain = data_tests_folder / file_name
+    compressed = compress(plain.read_bytes(), tmp_path / 'report')
+
+    expected = extractor_class(plain, engine=engine).extract()
+
+    pd.testing.assert_frame_equal(extractor_class(compressed, engine=engine).extract(), expected)
+    chunks = list(extractor_class(compressed, engine=engine).extract_chunks(4))
+    pd.testing.assert_frame_equal(pd.concat(chunks), expected)
+
+
+def test_compression_is_told_by_content(data_tests_folder: Path, tmp_path: Path):
+    renamed = tmp_path / 'upload.tmp'
+    renamed.write_bytes(gzip.compress(b'a,b\n1,2\n'))
+
+    assert detect_compression(renamed) == 'gzip'
+    assert detect_compression(data_tests_folder / 'buy_orders.csv') is None
+
+
+def test_buffer_compression_is_told_from_its_position():
+    header = b'a,b\n'
+    buffer = BytesIO(header + gzip.compress(b'a,b\n1,2\n'))
+
+    assert detect_compression(buffer) is None
+    buffer.seek(len(header))
+    assert detect_compression(buffer) == 'gzip'
+    assert buffer.tell() == len(header)
+    # The peeked buffer is released, so the stream can still grow
+    buffer.seek(0, 2)
+    buffer.write(b'\n')
+
+
+def test_zip_with_several_files_is_rejected(tmp_path: Path):
+    path = tmp_path / 'reports.zip'
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('a.csv', 'a\n')
+        archive.writestr('b.csv', 'b\n')
+
+    with pytest.raises(ValueError, match='exactly one file, found 2'):
+        BuyOrderCsvExtractor(path).extract()
+
+
+@pytest.mark.django_db
+def test_upload_gzipped_report(data_tests_folder: Path):
+    report_file = SimpleUploadedFile(
+        'buy_orders.csv.gz',
+        gzip.compress((data_tests_folder / 'buy_orders.csv').read_bytes()),
+        content_type='application/gzip',
+    )
+
+    response = APIClient().post(
+        '/api/v1/reports/upload/',
+        {'report_type': 'buy_orders_csv', 'report_file': report_file},
+        format='multipart',
+    )
+
+    total_buy_orders = 10
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert BuyOrder.objects.count() == total_buy_orders
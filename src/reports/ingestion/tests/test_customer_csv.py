@@ -5,9 +5,10 @@ import pandas as pd
 import pytest
 from pandas.api.types import is_datetime64_any_dtype
 
-from customer.models import Customer
+from customer.models import Customer, CustomerGroup
 from reports.ingestion.customer_csv.extractor import CustomerCsvExtractor
 from reports.ingestion.customer_csv.loader import CustomerCsvLoader
+from reports.ingestion.customer_csv.pipeline import CustomerCsvPipeline
 from reports.ingestion.customer_csv.schemas import COLUMN_ALIASES
 from reports.ingestion.customer_csv.transformer import CustomerCsvTransformer
 
@@ -97,3 +98,34 @@ def test_datetime_attributes(loaded_customers):
     customer = Customer.objects.get(email=email)
 
     assert customer.customer_since == datetime(2025, 9, 18, 12, 10, 16, tzinfo=timezone.utc)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(('engine', 'chunksize'), [('c', 2), ('pyarrow', None), ('pyarrow', 2)])
+def test_pipeline_run(data_tests_folder, engine, chunksize):
+    if engine == 'pyarrow':
+        pytest.importorskip('pyarrow')
+    pipeline = CustomerCsvPipeline(chunksize=chunksize, engine=engine)
+    pipeline.run(data_tests_folder / 'customers.csv')
+
+    total_customers = 5
+    assert Customer.objects.count() == total_customers
+    assert Customer.objects.get(email='ricardofilho9741@gmail.com').customer_group.name == 'vip'
+
+
+@pytest.mark.django_db
+def test_load_matches_stored_emails_whatever_their_case(transformed_customers_df):
+    stored = Customer.objects.create(
+        first_name='ricardo',
+        last_name='filho',
+        email='RicardoFilho9741@Gmail.com',
+        customer_group=CustomerGroup.objects.create(name='vip'),
+    )
+
+    CustomerCsvLoader(transformed_customers_df).load()
+
+    total_customers = 5
+    stored.refresh_from_db()
+    assert Customer.objects.count() == total_customers
+    assert stored.external_id == '571905'
+    assert stored.customer_since is not None
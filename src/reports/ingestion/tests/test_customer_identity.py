@@ -0,0 +1,63 @@
+import pytest
+
+from customer.models import Customer, CustomerGroup
+from customer.repositories.customer_repository import CustomerRepository
+
+
+@pytest.fixture
+def customers() -> list[Customer]:
+    group = CustomerGroup.objects.create(name='grupo')
+    return [
+        Customer.objects.create(
+            first_name='ana', last_name='silva', email='Ana@X.com', cpf='111', customer_group=group
+        ),
+        Customer.objects.create(
+            first_name='bia', last_name='souza', email='bia@x.com', cpf='222', customer_group=group
+        ),
+    ]
+
+
+@pytest.mark.django_db
+def test_resolve_identities_match_priority(customers: list[Customer]):
+    ana, bia = customers
+
+    resolved = CustomerRepository().resolve_identities([
+        ('ana@x.com', None),  # email, case-insensitive
+        (None, '222'),  # cpf
+        ('bia@x.com', '111'),  # different customers: the oldest wins
+        ('', ''),  # blanks never match
+        ('outra@x.com', '999'),
+    ])
+
+    assert resolved == [ana, bia, ana, None, None]
+
+
+@pytest.mark.django_db
+def test_resolve_identities_email_case_variants_resolve_to_the_oldest(customers: list[Customer]):
+    ana = customers[0]
+    Customer.objects.create(
+        first_name='ana', last_name='lima', email='ana@x.com', customer_group=ana.customer_group
+    )
+
+    repo = CustomerRepository()
+
+    assert repo.resolve_identities([('ANA@x.com', None)]) == [ana]
+    assert repo.find_by_email_or_cpf(email='ana@X.COM') == ana
+
+
+@pytest.mark.django_db
+def test_resolve_identities_query_count(customers: list[Customer], django_assert_num_queries):
+    pairs = [(f'cliente{i}@x.com', str(1000 + i)) for i in range(500)]
+
+    # One query per key kind, however many pairs
+    with django_assert_num_queries(2):
+        resolved = CustomerRepository().resolve_identities([*pairs, ('bia@x.com', None)])
+
+    assert resolved[-1] == customers[1]
+
+
+@pytest.mark.django_db
+def test_email_lookup_uses_the_normalized_index():
+    plan = Customer.objects.filter(email_normalized__in=['ana@x.com']).explain()
+
+    assert 'email_normalized' in plan
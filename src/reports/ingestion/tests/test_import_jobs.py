@@ -0,0 +1,219 @@
+import hashlib
+import threading
+from pathlib import Path
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connections
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from reports.ingestion.buy_order_csv.pipeline import BuyOrderCsvPipeline
+from reports.ingestion.progress import ImportJobProgressCollector
+from reports.models import ImportJob
+from reports.repositories.import_job_repository import ImportJobRepository
+from reports.tasks import process_report_task
+
+UPLOAD_URL = '/api/v1/reports/upload/'
+
+
+@pytest.fixture
+def client() -> APIClient:
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user('operador'))
+    return client
+
+
+def _upload(csv_bytes: bytes, report_type: str = 'buy_orders_csv', **extra):
+    report_file = SimpleUploadedFile('buy_orders.csv', csv_bytes, content_type='text/csv')
+    return APIClient().post(
+        UPLOAD_URL,
+        {'report_type': report_type, 'report_file': report_file, **extra},
+        format='multipart',
+    )
+
+
+@pytest.mark.django_db
+def test_upload_tracks_import_job(data_tests_folder: Path, client: APIClient):
+    response = _upload((data_tests_folder / 'buy_orders.csv').read_bytes())
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    job_id = response.data['job_id']
+    assert response.data['status_url'].endswith(f'/api/v1/reports/jobs/{job_id}/')
+
+    response = client.get(reverse('v1:api-import-job-detail', kwargs={'pk': job_id}))
+
+    total_rows = 11
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['state'] == ImportJob.State.SUCCEEDED
+    assert response.data['file_name'] == 'buy_orders.csv'
+    assert response.data['rows_read'] == response.data['rows_loaded'] == total_rows
+    assert response.data['chunks_processed'] == 1
+    assert response.data['stage_timings'].keys() == {'extract', 'transform', 'load'}
+    assert response.data['profile']['rows'] == total_rows
+    assert response.data['errors'] == []
+    assert response.data['started_at'] <= response.data['finished_at']
+
+
+@pytest.mark.django_db
+@override_settings(REPORT_INGESTION_REJECTS_DIR=None)
+def test_failed_import_job_keeps_error_summary(data_tests_folder: Path):
+    csv_text = (data_tests_folder / 'buy_orders.csv').read_text(encoding='utf-8')
+    response = _upload(csv_text.replace('"R$99,99"', '"R$ abc"', 1).encode())
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    job = ImportJob.objects.get(pk=response.data['job_id'])
+    assert job.state == ImportJob.State.FAILED
+    assert job.finished_at is not None
+    assert job.errors[0]['type'] == 'InvalidCurrencyError'
+    assert job.errors[0]['invalid_rows'] == {'total_amount': [0]}
+
+
+@pytest.mark.django_db
+def test_reupload_returns_original_job(data_tests_folder: Path):
+    csv_bytes = (data_tests_folder / 'buy_orders.csv').read_bytes()
+    first = _upload(csv_bytes)
+
+    response = _upload(csv_bytes)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['duplicate'] is True
+    assert response.data['job_id'] == first.data['job_id']
+    assert ImportJob.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_forced_reupload_is_processed(data_tests_folder: Path):
+    csv_bytes = (data_tests_folder / 'buy_orders.csv').read_bytes()
+    first = _upload(csv_bytes)
+
+    response = _upload(csv_bytes, force=True)
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert response.data['job_id'] != first.data['job_id']
+    job = ImportJob.objects.get(pk=response.data['job_id'])
+    assert job.state == ImportJob.State.SUCCEEDED
+    assert job.content_hash == ImportJob.objects.get(pk=first.data['job_id']).content_hash
+
+
+@pytest.mark.django_db
+def test_concurrent_upload_of_a_queued_file_returns_its_job(
+    data_tests_folder: Path, monkeypatch: pytest.MonkeyPatch
+):
+    csv_bytes = (data_tests_folder / 'buy_orders.csv').read_bytes()
+    content_hash = hashlib.sha256(csv_bytes).hexdigest()
+    queued = ImportJobRepository().create('buy_orders_csv', 'buy_orders.csv', content_hash)
+    find_by_content_hash = ImportJobRepository.find_by_content_hash
+    lookups = []
+
+    def _find_by_content_hash(self, *args):
+        lookups.append(args)
+        # The first lookup ran before the concurrent upload queued the file
+        return find_by_content_hash(self, *args) if len(lookups) > 1 else None
+
+    monkeypatch.setattr(ImportJobRepository, 'find_by_content_hash', _find_by_content_hash)
+
+    response = _upload(csv_bytes)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['duplicate'] is True
+    assert response.data['job_id'] == queued.pk
+    assert ImportJob.objects.count() == 1
+    # Looked up again once the database refused a second queued job
+    lookups_around_the_insert = 2
+    assert len(lookups) == lookups_around_the_insert
+
+
+@pytest.mark.django_db
+@override_settings(REPORT_INGESTION_REJECTS_DIR=None)
+def test_failed_upload_is_not_deduplicated(data_tests_folder: Path):
+    csv_text = (data_tests_folder / 'buy_orders.csv').read_text(encoding='utf-8')
+    csv_bytes = csv_text.replace('"R$99,99"', '"R$ abc"', 1).encode()
+    first = _upload(csv_bytes)
+
+    response = _upload(csv_bytes)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data['job_id'] != first.data['job_id']
+
+
+@pytest.mark.django_db
+def test_unknown_import_job_returns_404(client: APIClient):
+    response = client.get(reverse('v1:api-import-job-detail', kwargs={'pk': 999}))
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_import_job_requires_authentication():
+    job = ImportJob.objects.create(report_type='buy_orders_csv')
+    response = APIClient().get(reverse('v1:api-import-job-detail', kwargs={'pk': job.pk}))
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(('interval', 'writes'), [(0, 3), (3600, 0)])
+def test_progress_writes_are_throttled(data_tests_folder: Path, interval, writes):
+    repository = ImportJobRepository()
+    job = repository.create('buy_orders_csv', 'buy_orders.csv')
+    repository.mark_running(job.pk, 60, 3)
+    collector = ImportJobProgressCollector(job.pk, interval=interval)
+
+    BuyOrderCsvPipeline(chunksize=4, collectors=[collector]).run(
+        data_tests_folder / 'buy_orders.csv'
+    )
+
+    job.refresh_from_db()
+    progress = repository.progress(job)
+    assert collector.writes == writes
+    assert progress['rows_loaded'] == (11 if writes else 0)
+    assert progress['chunks_processed'] == writes
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'progress'])
+@override_settings(
+    REPORT_IMPORT_PROGRESS_DATABASE='progress',
+    REPORT_IMPORT_PROGRESS_INTERVAL=0,
+    REPORT_INGESTION_CHUNKSIZE=4,
+    REPORT_INGESTION_CHECKPOINTS=False,
+)
+def test_progress_is_seen_from_another_connection_while_the_import_runs(
+    data_tests_folder: Path, tmp_path: Path, client: APIClient, monkeypatch: pytest.MonkeyPatch
+):
+    csv_path = tmp_path / 'buy_orders.csv'
+    csv_path.write_bytes((data_tests_folder / 'buy_orders.csv').read_bytes())
+    job = ImportJob.objects.create(report_type='buy_orders_csv')
+    load = BuyOrderCsvPipeline._load
+    # The third chunk, 4 rows each, loads while the first two are still uncommitted
+    third_chunk, rows_before, total_rows = 8, 8, 11
+    seen = []
+
+    def _status() -> None:
+        # A thread of its own gets connections of its own, as an API worker would
+        try:
+            url = reverse('v1:api-import-job-detail', kwargs={'pk': job.pk})
+            seen.append(client.get(url).data)
+        finally:
+            connections.close_all()
+
+    def _load(self, df) -> None:
+        if third_chunk in df.index:
+            reader = threading.Thread(target=_status)
+            reader.start()
+            reader.join()
+        load(self, df)
+
+    monkeypatch.setattr(BuyOrderCsvPipeline, '_load', _load)
+
+    process_report_task('buy_orders_csv', str(csv_path), job.pk)
+
+    assert seen[0]['state'] == ImportJob.State.RUNNING
+    assert seen[0]['rows_read'] == seen[0]['rows_loaded'] == rows_before
+    assert seen[0]['chunks_processed'] == rows_before // 4
+    job.refresh_from_db()
+    assert job.state == ImportJob.State.SUCCEEDED
+    assert job.rows_loaded == total_rows
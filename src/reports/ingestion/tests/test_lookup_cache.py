@@ -0,0 +1,87 @@
+from pathlib import Path
+
+import pytest
+
+from buy_order.models import Status
+from buy_order.repositories.status_repository import StatusRepository
+from core.lookup_cache import lookup_cache, lookup_cache_stats
+from reports.ingestion.buy_order_csv.pipeline import BuyOrderCsvPipeline
+
+
+@pytest.mark.django_db
+def test_committed_names_are_served_from_memory(
+    django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    repo = StatusRepository()
+    with django_capture_on_commit_callbacks(execute=True):
+        created = repo.get_or_create_many(['novo', 'enviado'])
+
+    with django_assert_num_queries(0):
+        cached = StatusRepository().get_or_create_many(['novo', 'enviado'])
+        status = StatusRepository().get_or_create('novo')
+
+    assert cached == created
+    assert status.pk == Status.objects.get(name='novo').pk
+    stats = lookup_cache_stats()['buy_order.Status']
+    assert (stats['hits'], stats['misses']) == (3, 2)
+
+
+@pytest.mark.django_db
+def test_uncommitted_names_are_not_cached():
+    StatusRepository().get_or_create('novo')
+
+    assert lookup_cache(Status).stats()['size'] == 0
+
+
+@pytest.mark.django_db
+def test_saving_a_lookup_invalidates_the_cache(django_capture_on_commit_callbacks):
+    repo = StatusRepository()
+    with django_capture_on_commit_callbacks(execute=True):
+        status = repo.get_or_create('novo')
+    assert lookup_cache(Status).stats()['size'] == 1
+
+    status.name = 'renomeado'
+    status.save()
+
+    assert repo.get_or_create('novo').pk != status.pk
+    assert lookup_cache(Status).stats()['version'] == 1
+
+
+@pytest.mark.django_db
+def test_conflicting_insert_falls_back_to_existing_rows(monkeypatch):
+    cache = lookup_cache(Status)
+    existing = Status.objects.create(name='novo')
+    # Simulates a worker inserting the row between the read and the insert
+    monkeypatch.setattr(cache.model._default_manager, 'filter', _skipping_first_read())
+
+    statuses = cache.get_many(['novo', 'outro'])
+
+    assert statuses['novo'].pk == existing.pk
+    assert Status.objects.filter(name='outro').exists()
+
+
+def _skipping_first_read():
+    calls = []
+    original = Status._default_manager.filter
+
+    def read(*args, **kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            return Status.objects.none()
+        return original(*args, **kwargs)
+
+    return read
+
+
+@pytest.mark.django_db
+def test_pipeline_reuses_cached_lookups(
+    data_tests_folder: Path, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        BuyOrderCsvPipeline().run(data_tests_folder / 'buy_orders.csv')
+
+    report = BuyOrderCsvPipeline().run(data_tests_folder / 'buy_orders.csv')
+
+    total_rows = 11
+    assert report['rows'] == total_rows
+    assert lookup_cache_stats()['buy_order.Status']['hits'] > 0
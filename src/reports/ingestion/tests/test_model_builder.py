@@ -0,0 +1,121 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+from django.db.models.signals import post_init, pre_init
+
+from core.ingestion.model_builder import ModelBuilder, python_values
+from customer.models import Customer, CustomerGroup
+from reports.models import ImportJob
+from utils.dataframe_utils import DataFrameUtils as dfu, text_dtype
+
+FIELDS = ['first_name', 'last_name', 'email', 'phone', 'last_order', 'customer_group']
+
+
+def _frame() -> pd.DataFrame:
+    df = pd.DataFrame({
+        'first_name': ['Ana', 'Bruno'],
+        'last_name': ['Silva', 'Souza'],
+        'email': ['ana@example.com', 'bruno@example.com'],
+        'phone': ['11999999999', None],
+        'last_order': pd.to_datetime(['2024-01-02 10:00', None], utc=True),
+    })
+    return df.astype({column: text_dtype() for column in FIELDS[:4]})
+
+
+def _values(customer: Customer) -> dict:
+    return {field: getattr(customer, field) for field in ['id', 'cpf', *FIELDS[:-1]]}
+
+
+@pytest.mark.django_db
+def test_instances_match_the_model_constructor():
+    group = CustomerGroup.objects.create(name='Varejo')
+    df = _frame()
+
+    built = ModelBuilder(Customer, FIELDS).instances(df, customer_group=[group.pk] * len(df))
+
+    expected = [
+        Customer(customer_group=group, **row)
+        for row in dfu.replace_nulls_with_none(df).to_dict('records')
+    ]
+    assert [_values(customer) for customer in built] == [_values(c) for c in expected]
+    assert built[1].phone is None
+    assert built[1].last_order is None
+    assert built[0].customer_group == group
+    assert all(customer._state.adding for customer in built)
+
+    Customer.objects.bulk_create(built)
+    assert list(Customer.objects.values_list('email', 'customer_group')) == [
+        ('ana@example.com', group.pk),
+        ('bruno@example.com', group.pk),
+    ]
+
+
+@pytest.mark.django_db
+def test_instances_are_initialized_for_signal_receivers():
+    group = CustomerGroup.objects.create(name='Varejo')
+    builder = ModelBuilder(Customer, FIELDS)
+    initialized = []
+
+    def receiver(instance, **kwargs):
+        initialized.append(instance.email)
+
+    post_init.connect(receiver, sender=Customer)
+    try:
+        builder.instances(_frame(), customer_group=[group.pk, group.pk])
+    finally:
+        post_init.disconnect(receiver, sender=Customer)
+
+    assert initialized == ['ana@example.com', 'bruno@example.com']
+
+
+def test_instances_are_built_from_positional_arguments():
+    calls = []
+
+    def receiver(args, kwargs, **extra):
+        calls.append((args, kwargs))
+
+    pre_init.connect(receiver, sender=Customer)
+    try:
+        built = ModelBuilder(Customer, FIELDS).instances(_frame(), customer_group=[1, 1])
+    finally:
+        pre_init.disconnect(receiver, sender=Customer)
+
+    # No keyword resolution, and the same attributes as the keyword constructor sets
+    assert [kwargs for _, kwargs in calls] == [{}, {}]
+    assert built[0].__dict__.keys() == Customer().__dict__.keys()
+    assert built[0].customer_group_id == 1
+
+
+def test_instances_get_defaults_of_their_own():
+    df = pd.DataFrame({'report_type': ['buy_orders_csv', 'customers_csv']})
+
+    first, second = ModelBuilder(ImportJob, ['report_type']).instances(df)
+
+    assert first.state == second.state == ImportJob.State.PENDING
+    assert first.errors == second.errors == []
+    assert first.errors is not second.errors
+    assert first.stage_timings is not second.stage_timings
+
+
+@pytest.mark.parametrize(
+    'values',
+    [
+        pd.Series(['a', None, 'a'], dtype='category'),
+        pd.Series(['a', None, 'a'], dtype=text_dtype()),
+        np.array(['a', np.nan, 'a'], dtype=object),
+        ['a', None, 'a'],
+    ],
+)
+def test_python_values_turn_nulls_into_none(values):
+    assert python_values(values) == ['a', None, 'a']
+
+
+def test_python_values_of_dates_and_integers():
+    dates = pd.Series(pd.to_datetime(['2024-01-02', None], utc=True))
+    integers = pd.Series([1, None], dtype='Int64')
+
+    assert python_values(dates) == [datetime(2024, 1, 2, tzinfo=timezone.utc), None]
+    assert python_values(integers) == [1, None]
+    assert type(python_values(integers)[0]) is int
@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+from django.db import connection
+
+from buy_order.models import BuyOrder
+from core.ingestion.postgres_copy import CopyWriter, default_backend, to_copy_csv
+from customer.models import Customer
+from reports.ingestion.buy_order_csv.loader import BuyOrderCsvLoader
+from reports.ingestion.customer_csv.loader import CustomerCsvLoader
+
+
+@pytest.mark.parametrize('backend', ['orm', 'copy'])
+def test_loaders_fall_back_to_orm_on_sqlite(settings, backend):
+    settings.REPORT_INGESTION_LOADER_BACKEND = backend
+
+    assert default_backend() == 'orm'
+    assert BuyOrderCsvLoader(pd.DataFrame()).backend == 'orm'
+    assert CustomerCsvLoader(pd.DataFrame()).backend == 'orm'
+
+
+@pytest.mark.parametrize('backend', ['orm', 'copy'])
+def test_copy_backend_is_opt_in_on_postgresql(settings, monkeypatch, backend):
+    settings.REPORT_INGESTION_LOADER_BACKEND = backend
+    monkeypatch.setattr(connection, 'vendor', 'postgresql')
+
+    assert default_backend() == backend
+
+
+def test_upsert_sql_merges_on_conflict():
+    writer = CopyWriter(BuyOrder)
+
+    sql = writer.upsert_sql(
+        'staging', ['order_number', 'customer_id', 'status_id'], ['order_number'], ['status']
+    )
+
+    assert sql == (
+        'INSERT INTO "buy_order_buyorder" ("order_number", "customer_id", "status_id", '
+        '"created_at", "updated_at") SELECT "order_number", "customer_id", "status_id", '
+        'now(), now() FROM "staging" ON CONFLICT ("order_number") DO UPDATE SET '
+        '"status_id" = EXCLUDED."status_id", "updated_at" = now()'
+    )
+
+
+def test_upsert_sql_refuses_to_update_unstaged_fields():
+    writer = CopyWriter(BuyOrder)
+
+    with pytest.raises(ValueError, match='staged columns'):
+        writer.upsert_sql('staging', ['order_number', 'customer_id'], ['order_number'], ['status'])
+
+
+def test_upsert_sql_without_conflict_target_ignores_conflicts():
+    sql = CopyWriter(Customer).upsert_sql('staging', ['email'], None, [])
+
+    assert sql.endswith('FROM "staging" ON CONFLICT DO NOTHING')
+
+
+def test_update_from_sql_joins_on_key():
+    sql = CopyWriter(Customer).update_from_sql('staging', 'email', ['external_id'])
+
+    assert sql == (
+        'UPDATE "customer_customer" SET "external_id" = staging."external_id", '
+        '"updated_at" = now() FROM "staging" AS staging '
+        'WHERE "customer_customer"."email" = staging."email"'
+    )
+
+
+def test_to_copy_csv_keeps_nulls_apart_from_empty_strings():
+    df = pd.DataFrame({'email': ['a@x.com', ''], 'cpf': [None, '123']})
+
+    # With NULL '\N' an unquoted empty field loads as an empty string
+    assert list(to_copy_csv(df)) == ['a@x.com,\\N\n,123\n']
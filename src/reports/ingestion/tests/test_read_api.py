@@ -0,0 +1,173 @@
+import gzip
+import io
+from pathlib import Path
+
+import pandas as pd
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from buy_order.models import BuyOrder
+from customer.models import Customer
+from reports.ingestion.buy_order_csv.pipeline import BuyOrderCsvPipeline
+from reports.ingestion.customer_csv.pipeline import CustomerCsvPipeline
+
+BUY_ORDERS_URL = reverse('buy_order_v1:api-buy-order-list')
+CUSTOMERS_URL = reverse('customer_v1:api-customer-list')
+BUY_ORDERS_EXPORT_URL = reverse('buy_order_v1:api-buy-order-export')
+CUSTOMERS_EXPORT_URL = reverse('customer_v1:api-customer-export')
+
+
+@pytest.fixture
+def client() -> APIClient:
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user('leitor'))
+    return client
+
+
+@pytest.fixture
+def buy_orders(data_tests_folder: Path) -> None:
+    BuyOrderCsvPipeline().run(data_tests_folder / 'buy_orders.csv')
+
+
+def _pages(client: APIClient, url: str) -> list[dict]:
+    pages = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        pages.append(response.data)
+        url = response.data['next']
+    return pages
+
+
+@pytest.mark.django_db
+def test_read_endpoints_require_authentication():
+    assert APIClient().get(BUY_ORDERS_URL).status_code == status.HTTP_401_UNAUTHORIZED
+    assert APIClient().get(CUSTOMERS_URL).status_code == status.HTTP_401_UNAUTHORIZED
+    assert APIClient().get(BUY_ORDERS_EXPORT_URL).status_code == status.HTTP_401_UNAUTHORIZED
+    assert APIClient().get(CUSTOMERS_EXPORT_URL).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('buy_orders')
+def test_buy_orders_are_paged_by_keyset(client: APIClient):
+    pages = _pages(client, f'{BUY_ORDERS_URL}?page_size=3')
+
+    page_sizes = [3, 3, 3, 1]
+    assert [len(page['results']) for page in pages] == page_sizes
+    ids = [order['id'] for page in pages for order in page['results']]
+    expected = BuyOrder.objects.order_by('-order_date', '-id').values_list('id', flat=True)
+    assert ids == list(expected)
+
+    previous = client.get(pages[2]['previous']).data
+    assert previous['results'] == pages[1]['results']
+    assert client.get(previous['previous']).data['results'] == pages[0]['results']
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('buy_orders')
+def test_pages_cost_one_query_without_count(client: APIClient):
+    first = client.get(f'{BUY_ORDERS_URL}?page_size=2').data
+
+    with CaptureQueriesContext(connection) as queries:
+        client.get(first['next'])
+
+    assert len(queries) == 1
+    assert 'COUNT(' not in queries[0]['sql'].upper()
+    assert 'OFFSET' not in queries[0]['sql'].upper()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('buy_orders')
+def test_buy_order_filters(client: APIClient):
+    customer = Customer.objects.get(cpf='82312314727')
+
+    shipped = client.get(BUY_ORDERS_URL, {'status': 'enviado'}).data['results']
+    by_customer = client.get(BUY_ORDERS_URL, {'customer': customer.pk}).data['results']
+    in_range = client.get(
+        BUY_ORDERS_URL,
+        {'order_date_after': '2025-09-02T00:00:00-03:00', 'order_date_before': '2025-09-04'},
+    ).data['results']
+
+    assert {order['status'] for order in shipped} == {'enviado'}
+    assert {order['customer']['id'] for order in by_customer} == {customer.pk}
+    assert in_range
+    assert all('2025-09-02' <= order['order_date'][:10] < '2025-09-04' for order in in_range)
+
+
+@pytest.mark.django_db
+def test_customers_are_paged_and_filtered(client: APIClient, data_tests_folder: Path):
+    CustomerCsvPipeline().run(data_tests_folder / 'customers.csv')
+
+    pages = _pages(client, f'{CUSTOMERS_URL}?page_size=2')
+    found = client.get(CUSTOMERS_URL, {'email': 'RicardoFilho9741@gmail.com'}).data['results']
+
+    assert sum(len(page['results']) for page in pages) == Customer.objects.count()
+    assert [customer['external_id'] for customer in found] == ['571905']
+    assert found[0]['customer_group'] == 'vip'
+
+
+@pytest.mark.django_db
+def test_invalid_cursor_returns_404(client: APIClient):
+    response = client.get(BUY_ORDERS_URL, {'cursor': 'not-a-cursor'})
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def _download(client: APIClient, url: str, params: dict) -> bytes:
+    response = client.get(url, params)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.streaming
+    return b''.join(response.streaming_content)
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('buy_orders')
+@pytest.mark.parametrize('compressed', [False, True], ids=['plain', 'gzip'])
+def test_buy_orders_export_csv(client: APIClient, compressed: bool):
+    content = _download(client, BUY_ORDERS_EXPORT_URL, {'status': 'enviado', 'gzip': compressed})
+
+    df = pd.read_csv(io.BytesIO(gzip.decompress(content) if compressed else content))
+    expected = BuyOrder.objects.filter(status__name='enviado').order_by('pk')
+    assert df['id'].tolist() == list(expected.values_list('id', flat=True))
+    assert set(df['status']) == {'enviado'}
+    assert df['customer_email'].tolist() == [order.customer.email for order in expected]
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('buy_orders')
+def test_buy_orders_export_parquet_writes_row_groups(
+    client: APIClient, monkeypatch: pytest.MonkeyPatch
+):
+    pq = pytest.importorskip('pyarrow.parquet')
+    monkeypatch.setattr('buy_order.api.v1.views.BuyOrderExportView.chunk_size', 4)
+
+    content = _download(client, BUY_ORDERS_EXPORT_URL, {'file_format': 'parquet'})
+
+    parquet = pq.ParquetFile(io.BytesIO(content))
+    row_groups = 3
+    assert parquet.metadata.num_row_groups == row_groups
+    table = parquet.read()
+    assert table.column('id').to_pylist() == list(
+        BuyOrder.objects.order_by('pk').values_list('id', flat=True)
+    )
+    assert str(table.schema.field('total_amount').type) == 'decimal128(10, 2)'
+    assert str(table.schema.field('order_date').type) == 'timestamp[us, tz=UTC]'
+
+
+@pytest.mark.django_db
+def test_customers_export_applies_filters(client: APIClient, data_tests_folder: Path):
+    CustomerCsvPipeline().run(data_tests_folder / 'customers.csv')
+
+    content = _download(client, CUSTOMERS_EXPORT_URL, {'customer_group': 'vip'})
+    empty = _download(client, CUSTOMERS_EXPORT_URL, {'email': 'nobody@example.com'})
+
+    df = pd.read_csv(io.BytesIO(content), dtype={'external_id': str, 'cpf': str})
+    assert len(df) == Customer.objects.filter(customer_group__name='vip').count()
+    assert set(df['customer_group']) == {'vip'}
+    assert empty.decode().strip() == ','.join(pd.read_csv(io.BytesIO(content)).columns)
@@ -0,0 +1,173 @@
+import io
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from buy_order.models import BuyOrder, DailySalesRollup
+from core import settings as project_settings
+from core.ingestion.rejects import RejectWriter, TooManyRejectsError
+from customer.models import Customer
+from reports.ingestion.buy_order_csv.loader import BuyOrderCsvLoader
+from reports.ingestion.buy_order_csv.pipeline import BuyOrderCsvPipeline
+from reports.models import ImportJob
+
+UPLOAD_URL = '/api/v1/reports/upload/'
+TOTAL_ROWS = 11
+# Rows 0 and 6 of the fixture are broken by the tests
+REJECTED_ROWS = 2
+
+
+@pytest.fixture
+def client() -> APIClient:
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user('operador'))
+    return client
+
+
+def _buy_orders(data_tests_folder: Path, changes: dict[int, dict[str, str]]) -> pd.DataFrame:
+    """The fixture with `changes` ({row: {header: value}}) applied"""
+    df = pd.read_csv(data_tests_folder / 'buy_orders.csv', dtype=str, keep_default_na=False)
+    for row, values in changes.items():
+        for header, value in values.items():
+            df.loc[row, header] = value
+    return df
+
+
+def _csv(df: pd.DataFrame) -> bytes:
+    return df.to_csv(index=False).encode()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('chunksize', [None, 4])
+def test_failing_rows_are_quarantined(data_tests_folder: Path, tmp_path: Path, chunksize):
+    df = _buy_orders(
+        data_tests_folder,
+        {0: {'Total da Venda': 'R$ abc'}, 6: {'Comprado Em': '31/02/2025 10:00:00'}},
+    )
+    rejects = RejectWriter(tmp_path / 'rejects.csv')
+
+    report = BuyOrderCsvPipeline(chunksize=chunksize, rejects=rejects).run(io.BytesIO(_csv(df)))
+
+    loaded_orders = 8  # 10 order numbers, 2 of them rejected
+    assert BuyOrder.objects.count() == loaded_orders
+    assert not BuyOrder.objects.filter(order_number__in=['100000001', '100000007']).exists()
+    assert report['stages']['quarantine']['rows_out'] == rejects.count == REJECTED_ROWS
+
+    rejected = pd.read_csv(rejects.path, dtype=str)
+    assert rejected['row'].tolist() == ['0', '6']
+    assert rejected['line'].tolist() == ['2', '8']
+    assert rejected.loc[0, 'reason'].startswith('InvalidCurrencyError: ')
+    assert rejected['reason'].notna().all()
+    assert rejected['order_number'].tolist() == ['100000001', '100000007']
+    assert rejected.loc[0, 'total_amount'] == 'R$ abc'
+
+
+@pytest.mark.django_db
+def test_rolled_back_rows_leave_no_cached_state(data_tests_folder: Path, tmp_path: Path):
+    # Row 2 fails in the database (no e-mail) after creating the 'Devolvido' status,
+    # which row 5, in another chunk, uses as well
+    df = _buy_orders(
+        data_tests_folder,
+        {2: {'Email': '', 'Status': 'Devolvido'}, 5: {'Status': 'Devolvido'}},
+    )
+    rejects = RejectWriter(tmp_path / 'rejects.csv')
+
+    BuyOrderCsvPipeline(chunksize=4, rejects=rejects).run(io.BytesIO(_csv(df)))
+
+    assert rejects.count == 1
+    assert not BuyOrder.objects.filter(order_number='100000003').exists()
+    assert BuyOrder.objects.get(order_number='100000006').status.name == 'devolvido'
+    # The rolled back order was never counted in the rollup
+    rollup_orders = sum(DailySalesRollup.objects.values_list('order_count', flat=True))
+    assert rollup_orders == BuyOrder.objects.count()
+
+
+@pytest.mark.django_db
+def test_loader_bugs_fail_the_run_instead_of_rejecting_rows(
+    data_tests_folder: Path, tmp_path: Path, monkeypatch
+):
+    def broken_load(self, df):
+        raise KeyError('customer_group')
+
+    monkeypatch.setattr(BuyOrderCsvLoader, 'load_chunk', broken_load)
+    rejects = RejectWriter(tmp_path / 'rejects.csv')
+
+    with pytest.raises(KeyError, match='customer_group'):
+        BuyOrderCsvPipeline(chunksize=4, rejects=rejects).run(data_tests_folder / 'buy_orders.csv')
+
+    assert rejects.count == 0
+    assert not rejects.path.exists()
+
+
+@pytest.mark.django_db
+def test_too_many_rejects_fail_the_run(data_tests_folder: Path, tmp_path: Path):
+    df = _buy_orders(
+        data_tests_folder,
+        {0: {'Total da Venda': 'R$ abc'}, 6: {'Total da Venda': 'R$ abc'}},
+    )
+    rejects = RejectWriter(tmp_path / 'rejects.csv', max_rows=1)
+
+    with pytest.raises(TooManyRejectsError):
+        BuyOrderCsvPipeline(chunksize=4, rejects=rejects).run(io.BytesIO(_csv(df)))
+
+    assert not BuyOrder.objects.exists()
+    assert not Customer.objects.exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('shard_rows', [None, 3])
+def test_import_job_keeps_its_rejects(data_tests_folder: Path, client: APIClient, shard_rows):
+    df = _buy_orders(
+        data_tests_folder,
+        {0: {'Total da Venda': 'R$ abc'}, 6: {'Total da Venda': 'R$ abc'}},
+    )
+    report_file = SimpleUploadedFile('buy_orders.csv', _csv(df), content_type='text/csv')
+
+    with override_settings(REPORT_INGESTION_SHARD_ROWS=shard_rows):
+        response = APIClient().post(
+            UPLOAD_URL,
+            {'report_type': 'buy_orders_csv', 'report_file': report_file},
+            format='multipart',
+        )
+
+    job = ImportJob.objects.get(pk=response.data['job_id'])
+    assert job.state == ImportJob.State.SUCCEEDED
+    assert job.rows_read == TOTAL_ROWS
+    assert job.rows_rejected == REJECTED_ROWS
+    assert job.rows_loaded == TOTAL_ROWS - job.rows_rejected
+
+    detail = client.get(response.data['status_url'])
+    download = client.get(detail.data['rejects_url'])
+
+    assert download.status_code == status.HTTP_200_OK
+    rejected = pd.read_csv(io.BytesIO(b''.join(download.streaming_content)), dtype=str)
+    assert sorted(rejected['line'].tolist()) == ['2', '8']
+
+
+@pytest.mark.django_db
+def test_import_job_without_rejects(client: APIClient):
+    job = ImportJob.objects.create(report_type='buy_orders_csv')
+    url = f'/api/v1/reports/jobs/{job.pk}/'
+
+    assert client.get(url).data['rejects_url'] is None
+    assert client.get(f'{url}rejects/').status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_rejects_require_authentication():
+    job = ImportJob.objects.create(report_type='buy_orders_csv', rejects_file='rejects.csv')
+    url = f'/api/v1/reports/jobs/{job.pk}/rejects/'
+
+    assert APIClient().get(url).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_rejects_are_kept_out_of_media():
+    rejects_dir = Path(project_settings.REPORT_INGESTION_REJECTS_DIR)
+
+    assert not rejects_dir.is_relative_to(project_settings.MEDIA_ROOT)
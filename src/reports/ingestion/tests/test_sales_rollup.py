@@ -0,0 +1,161 @@
+from datetime import date
+from decimal import Decimal
+from importlib import import_module
+from itertools import product
+from pathlib import Path
+
+import pytest
+from django.apps import apps as django_apps
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from buy_order.models import DailySalesRollup, PaymentType, Status
+from buy_order.repositories.daily_sales_rollup_repository import (
+    DailySalesRollupRepository,
+    SalesDelta,
+)
+from reports.ingestion.buy_order_csv.extractor import BuyOrderCsvExtractor
+from reports.ingestion.buy_order_csv.loader import BuyOrderCsvLoader
+from reports.ingestion.buy_order_csv.pipeline import BuyOrderCsvPipeline
+from reports.ingestion.buy_order_csv.transformer import BuyOrderCsvTransformer
+
+SALES_URL = reverse('buy_order_v1:api-sales-summary')
+
+
+def _rollup() -> list[tuple]:
+    return list(
+        DailySalesRollup.objects.filter(order_count__gt=0)
+        .order_by('date', 'status_id', 'payment_type_id')
+        .values_list(
+            'date',
+            'status_id',
+            'payment_type_id',
+            'order_count',
+            'items_sold',
+            'total_amount',
+            'shipping_amount',
+            'discount_amount',
+        )
+    )
+
+
+def _assert_matches_rebuild() -> None:
+    incremental = _rollup()
+    DailySalesRollupRepository().rebuild()
+    assert incremental
+    assert incremental == _rollup()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('chunksize', [None, 4])
+def test_ingestion_keeps_rollup_in_sync(data_tests_folder: Path, chunksize):
+    BuyOrderCsvPipeline(chunksize=chunksize).run(data_tests_folder / 'buy_orders.csv')
+
+    _assert_matches_rebuild()
+
+
+@pytest.mark.django_db
+def test_row_by_row_load_keeps_rollup_in_sync(data_tests_folder: Path):
+    df = BuyOrderCsvExtractor(data_tests_folder / 'buy_orders.csv').extract()
+    BuyOrderCsvLoader(BuyOrderCsvTransformer(df).transform(), bulk=False).load()
+
+    _assert_matches_rebuild()
+
+
+@pytest.mark.django_db
+def test_status_change_moves_orders_between_buckets(data_tests_folder: Path, tmp_path: Path):
+    BuyOrderCsvPipeline().run(data_tests_folder / 'buy_orders.csv')
+    csv_path = tmp_path / 'buy_orders.csv'
+    csv_text = (data_tests_folder / 'buy_orders.csv').read_text(encoding='utf-8')
+    csv_path.write_text(csv_text.replace('Cancelado', 'Enviado'), encoding='utf-8')
+
+    BuyOrderCsvPipeline(chunksize=4).run(csv_path)
+
+    assert not DailySalesRollup.objects.filter(status__name='cancelado', order_count__gt=0)
+    _assert_matches_rebuild()
+
+
+@pytest.mark.django_db
+def test_apply_locks_only_the_buckets_it_changes():
+    days = [date(2025, 9, 1), date(2025, 9, 2)]
+    statuses = [Status.objects.create(name=name).pk for name in ['novo', 'enviado']]
+    payment_types = [PaymentType.objects.create(name=name).pk for name in ['pix', 'boleto']]
+    DailySalesRollup.objects.bulk_create([
+        DailySalesRollup(date=day, status_id=status_id, payment_type_id=payment_type_id)
+        for day, status_id, payment_type_id in product(days, statuses, payment_types)
+    ])
+    keys = [(days[0], statuses[0], payment_types[0]), (days[1], statuses[1], payment_types[1])]
+    delta = SalesDelta()
+    for key in keys:
+        delta.buckets[key] = [1, 2, Decimal('10.00'), Decimal(0), Decimal(0)]
+    repo = DailySalesRollupRepository()
+
+    locked = [(row.date, row.status_id, row.payment_type_id) for row in repo._lock(keys)]
+    repo.apply(delta)
+
+    assert locked == keys
+    counted = DailySalesRollup.objects.filter(order_count__gt=0)
+    assert sorted(counted.values_list('date', 'status_id', 'payment_type_id')) == keys
+
+
+@pytest.mark.django_db
+def test_backfill_lets_imports_move_orders_stored_before_the_rollup(
+    data_tests_folder: Path, tmp_path: Path
+):
+    BuyOrderCsvPipeline().run(data_tests_folder / 'buy_orders.csv')
+    # Orders stored before the rollup table existed
+    DailySalesRollup.objects.all().delete()
+    migration = import_module('buy_order.migrations.0005_backfill_daily_sales_rollup')
+    migration.backfill_rollup(django_apps, None)
+    csv_path = tmp_path / 'buy_orders.csv'
+    csv_text = (data_tests_folder / 'buy_orders.csv').read_text(encoding='utf-8')
+    csv_path.write_text(csv_text.replace('Cancelado', 'Enviado'), encoding='utf-8')
+
+    BuyOrderCsvPipeline().run(csv_path)
+
+    assert not DailySalesRollup.objects.filter(status__name='cancelado', order_count__gt=0)
+    _assert_matches_rebuild()
+
+
+@pytest.mark.django_db
+def test_rebuild_command_limits_dates(data_tests_folder: Path, capsys):
+    BuyOrderCsvPipeline().run(data_tests_folder / 'buy_orders.csv')
+    outside = DailySalesRollup.objects.exclude(date='2025-09-02')
+    before = list(outside.values_list('pk', flat=True))
+    DailySalesRollup.objects.filter(date='2025-09-02').update(order_count=99)
+
+    call_command('rebuild_sales_rollup', '--from', '2025-09-02', '--to', '2025-09-02')
+
+    assert 'Rebuilt' in capsys.readouterr().out
+    assert list(outside.values_list('pk', flat=True)) == before
+    _assert_matches_rebuild()
+
+
+@pytest.mark.django_db
+def test_sales_summary_endpoint(data_tests_folder: Path):
+    BuyOrderCsvPipeline().run(data_tests_folder / 'buy_orders.csv')
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user('financeiro'))
+
+    by_date = client.get(SALES_URL).data
+    by_status = client.get(
+        SALES_URL, {'group_by': 'status', 'date_from': '2025-09-01', 'date_to': '2025-09-30'}
+    ).data
+
+    total_orders = 10
+    assert sum(row['order_count'] for row in by_date) == total_orders
+    assert [row['date'] for row in by_date] == sorted(row['date'] for row in by_date)
+    assert {row['status'] for row in by_status} == {'cancelado', 'enviado', 'entregue'}
+    assert sum(row['order_count'] for row in by_status) == total_orders
+    assert 'date' not in by_status[0]
+
+    shipped = client.get(SALES_URL, {'group_by': 'payment_type', 'status': 'enviado'}).data
+    assert sum(row['order_count'] for row in shipped) < total_orders
+
+
+@pytest.mark.django_db
+def test_sales_summary_requires_authentication():
+    assert APIClient().get(SALES_URL).status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,234 @@
+from datetime import timedelta
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from django.db import OperationalError
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from buy_order.models import BuyOrder, PaymentType, Status
+from core.ingestion.sharding import link_rows
+from customer.models import Customer, CustomerGroup
+from reports.ingestion.buy_order_csv.pipeline import BuyOrderCsvPipeline
+from reports.ingestion.customer_csv.pipeline import CustomerCsvPipeline
+from reports import tasks
+from reports.models import ImportJob, ImportJobHeartbeat
+from reports.repositories.import_job_repository import ImportJobRepository
+from reports.tasks import (
+    expire_import_jobs_task,
+    fail_sharded_report_task,
+    process_report_shard_task,
+    process_report_task,
+)
+from utils.monetary import InvalidCurrencyError
+
+
+def test_link_rows_follows_shared_values_transitively():
+    keys = pd.DataFrame({
+        'email': ['a', 'b', 'c', 'a', None, 'e'],
+        'cpf': ['1', '2', '3', '4', '2', None],
+    })
+
+    # 0-3 share 'a'; 1-4 share '2'; 2 and 5 stand alone
+    assert link_rows(keys).tolist() == [0, 1, 2, 0, 1, 5]
+
+
+def test_link_rows_joins_chains():
+    keys = pd.DataFrame({'email': ['a', 'b', 'b', 'c', 'c'], 'cpf': ['3', '1', '2', '2', '3']})
+
+    assert link_rows(keys).tolist() == [0, 0, 0, 0, 0]
+
+
+@pytest.mark.django_db
+def test_plan_shards_keeps_linked_rows_together(data_tests_folder: Path, tmp_path: Path):
+    pipeline = BuyOrderCsvPipeline(chunksize=4)
+    shards = pipeline.plan_shards(data_tests_folder / 'buy_orders.csv', 3, tmp_path)
+
+    frames = [pd.concat(list(shard.chunks())) for shard in shards]
+    assert [len(frame) for frame in frames] == [4, 2, 5]
+    assert sorted(pd.concat(frames).index) == list(range(11))
+
+    emails = [set(frame['email'].str.lower()) for frame in frames]
+    cpfs = [set(frame['cpf']) for frame in frames]
+    for i in range(len(frames)):
+        for j in range(i + 1, len(frames)):
+            assert not emails[i] & emails[j]
+            assert not cpfs[i] & cpfs[j]
+
+    # Lookups are created up front, before any shard runs
+    assert {'cancelado', 'enviado'} <= set(Status.objects.values_list('name', flat=True))
+    assert {'pix', 'boleto bancário', 'cartão de crédito'} <= set(
+        PaymentType.objects.values_list('name', flat=True)
+    )
+    assert {'comum', 'influencer'} <= set(CustomerGroup.objects.values_list('name', flat=True))
+
+
+@pytest.mark.django_db
+def test_sharded_run_matches_single_run(data_tests_folder: Path, tmp_path: Path):
+    pipeline = BuyOrderCsvPipeline(chunksize=4)
+    shards = pipeline.plan_shards(data_tests_folder / 'buy_orders.csv', 3, tmp_path)
+
+    # Shards are disjoint, so the order they run in does not matter
+    reports = [BuyOrderCsvPipeline(chunksize=4).run(shard) for shard in reversed(shards)]
+
+    total_rows = 11
+    total_buy_orders = 10
+    total_customers = 4
+    assert sum(report['rows'] for report in reports) == total_rows
+    assert Customer.objects.count() == total_customers
+    assert BuyOrder.objects.count() == total_buy_orders
+    assert BuyOrder.objects.get(order_number='100000010').status.name == 'enviado'
+    assert Customer.objects.get(cpf='82312314727').first_name == 'bruna'
+
+
+@pytest.mark.django_db
+def test_shard_commits_chunk_by_chunk(data_tests_folder: Path, tmp_path: Path):
+    df = pd.read_csv(data_tests_folder / 'buy_orders.csv', dtype=str, keep_default_na=False)
+    df.loc[9, 'Total da Venda'] = 'R$ abc'
+    csv_path = tmp_path / 'buy_orders.csv'
+    df.to_csv(csv_path, index=False)
+    pipeline = BuyOrderCsvPipeline(chunksize=4)
+    (shard,) = pipeline.plan_shards(csv_path, len(df), tmp_path)
+
+    with pytest.raises(InvalidCurrencyError):
+        BuyOrderCsvPipeline(chunksize=4).run(shard)
+
+    # The two chunks before the failing one stay committed, like a checkpointed run
+    committed_orders = df.loc[:7, 'Pedido #'].nunique()
+    assert BuyOrder.objects.count() == committed_orders
+
+
+@pytest.mark.django_db
+def test_customer_plan_shards(data_tests_folder: Path, tmp_path: Path):
+    shards = CustomerCsvPipeline().plan_shards(data_tests_folder / 'customers.csv', 2, tmp_path)
+
+    for shard in shards:
+        CustomerCsvPipeline().run(shard)
+
+    total_customers = 5
+    assert Customer.objects.count() == total_customers
+
+
+@pytest.mark.django_db
+@override_settings(REPORT_INGESTION_SHARD_ROWS=3, REPORT_INGESTION_CHUNKSIZE=4)
+@override_settings(REPORT_IMPORT_PROGRESS_INTERVAL=0)
+def test_upload_fans_out_into_shards(
+    data_tests_folder: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    progress_writes = []
+    monkeypatch.setattr(
+        ImportJobRepository, 'add_progress', lambda *args, **kwargs: progress_writes.append(args)
+    )
+    with override_settings(REPORT_INGESTION_SHARD_DIR=str(tmp_path)):
+        response = APIClient().post(
+            '/api/v1/reports/upload/',
+            {
+                'report_type': 'buy_orders_csv',
+                'report_file': (data_tests_folder / 'buy_orders.csv').open('rb'),
+            },
+            format='multipart',
+        )
+
+    total_rows = 11
+    total_shards = 3
+    total_buy_orders = 10
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    job = ImportJob.objects.get(pk=response.data['job_id'])
+    assert job.state == ImportJob.State.SUCCEEDED
+    assert job.rows_read == job.rows_loaded == total_rows
+    assert job.profile['shards'] == total_shards
+    assert BuyOrder.objects.count() == total_buy_orders
+    # Shards never lock the job row: their progress is written by the chord callback
+    assert progress_writes == []
+    # Shard files are removed by the chord callback
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.django_db
+@override_settings(REPORT_INGESTION_SHARD_ROWS=3, REPORT_INGESTION_REJECTS_DIR=None)
+def test_failed_shard_fails_the_job(data_tests_folder: Path, tmp_path: Path):
+    csv_text = (data_tests_folder / 'buy_orders.csv').read_text(encoding='utf-8')
+    csv_path = tmp_path / 'buy_orders.csv'
+    csv_path.write_text(csv_text.replace('"R$59,98"', '"R$ abc"', 1), encoding='utf-8')
+    job = ImportJob.objects.create(report_type='buy_orders_csv')
+
+    with pytest.raises(ValueError, match='failed in 1 of 3 shards'):
+        process_report_task('buy_orders_csv', str(csv_path), job.pk)
+
+    job.refresh_from_db()
+    assert job.state == ImportJob.State.FAILED
+    assert job.errors == [
+        {
+            'type': 'InvalidCurrencyError',
+            'message': 'Unparseable currency values (total_amount: rows [2])',
+            'invalid_rows': {'total_amount': [2]},
+            'shard': 0,
+        }
+    ]
+    # The other two shards were committed on their own
+    committed_buy_orders = 6
+    assert BuyOrder.objects.count() == committed_buy_orders
+
+
+def test_lost_shards_are_delivered_again_and_retried():
+    assert process_report_shard_task.acks_late
+    assert process_report_shard_task.reject_on_worker_lost
+    assert OperationalError in process_report_shard_task.autoretry_for
+
+
+@pytest.mark.django_db
+@override_settings(REPORT_INGESTION_SHARD_ROWS=3)
+def test_shards_failing_to_report_fail_the_job(
+    data_tests_folder: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    csv_path = tmp_path / 'buy_orders.csv'
+    csv_path.write_bytes((data_tests_folder / 'buy_orders.csv').read_bytes())
+    job = ImportJob.objects.create(report_type='buy_orders_csv')
+    shard_dir = tmp_path / 'shards'
+    shard_dir.mkdir()
+    callbacks = []
+    # The shards are queued and never come back
+    monkeypatch.setattr(tasks, 'chord', lambda header: callbacks.append)
+
+    with override_settings(REPORT_INGESTION_SHARD_DIR=str(shard_dir)):
+        process_report_task('buy_orders_csv', str(csv_path), job.pk)
+
+    (errback,) = callbacks[0].options['link_error']
+    assert errback.task == fail_sharded_report_task.name
+
+    # Called by the result backend as it records the shard's failure
+    errback(None, OperationalError('shard out of retries'), None)
+
+    job.refresh_from_db()
+    assert job.state == ImportJob.State.FAILED
+    assert job.errors == [{'type': 'OperationalError', 'message': 'shard out of retries'}]
+    assert list(shard_dir.iterdir()) == []
+
+
+@pytest.mark.django_db
+@override_settings(REPORT_IMPORT_LEASE_SECONDS=60)
+def test_jobs_no_run_renews_are_failed():
+    repository = ImportJobRepository()
+    abandoned = ImportJob.objects.create(report_type='buy_orders_csv')
+    renewed = ImportJob.objects.create(report_type='customers_csv')
+    for job in (abandoned, renewed):
+        repository.mark_running(job.pk, 60, 3)
+    # Both leases were taken two leases ago; only one was renewed since
+    two_leases_ago = timezone.now() - timedelta(seconds=120)
+    ImportJob.objects.update(leased_until=two_leases_ago)
+    ImportJobHeartbeat.objects.filter(job_id=abandoned.pk).update(leased_until=two_leases_ago)
+
+    result = expire_import_jobs_task()
+
+    abandoned.refresh_from_db()
+    renewed.refresh_from_db()
+    assert result['job_ids'] == [abandoned.pk]
+    assert abandoned.state == ImportJob.State.FAILED
+    assert abandoned.errors[0]['type'] == 'WorkerLostError'
+    assert renewed.state == ImportJob.State.RUNNING
+    # A shard of it delivered again meanwhile is skipped
+    skipped = process_report_shard_task('buy_orders_csv', [], abandoned.pk)
+    assert skipped['error']['type'] == 'Skipped'
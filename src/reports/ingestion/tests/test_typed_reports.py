@@ -0,0 +1,192 @@
+import gzip
+from decimal import Decimal
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from buy_order.models import BuyOrder
+from customer.models import Customer
+from reports.ingestion.buy_order_csv.extractor import BuyOrderCsvExtractor
+from reports.ingestion.buy_order_csv.pipeline import BuyOrderCsvPipeline
+from reports.ingestion.buy_order_csv.schemas import COLUMN_ALIASES as BUY_ORDER_ALIASES
+from reports.ingestion.buy_order_typed.transformer import BuyOrderTypedTransformer
+from reports.ingestion.customer_csv.extractor import CustomerCsvExtractor
+from reports.ingestion.customer_csv.pipeline import CustomerCsvPipeline
+from reports.ingestion.customer_csv.schemas import COLUMN_ALIASES as CUSTOMER_ALIASES
+from reports.ingestion.mapping import REPORT_MAP
+from utils.monetary import (
+    CENTAVOS_PER_UNIT,
+    InvalidCurrencyError,
+    parse_centavos,
+    units_to_centavos,
+)
+
+AMOUNT_COLUMNS = ['shipping_amount', 'discount_amount', 'total_amount']
+CSV_DATE_FORMAT = '%d/%m/%Y %H:%M:%S'
+# Past 2**53: a float of the whole amount in centavos would round it to ...992
+PAST_FLOAT_PRECISION_CENTAVOS = 9007199254740993
+BUY_ORDER_FIELDS = [
+    'order_number',
+    'order_id',
+    'order_date',
+    'customer__email',
+    'status__name',
+    'payment_type__name',
+    'sold_quantity',
+    'shipping_amount',
+    'discount_amount',
+    'total_amount',
+]
+CUSTOMER_FIELDS = [
+    'external_id',
+    'first_name',
+    'last_name',
+    'email',
+    'cpf',
+    'phone',
+    'customer_group__name',
+    'customer_since',
+    'postal_code',
+    'state',
+    'country',
+    'last_order',
+]
+
+
+def _typed_buy_orders(data_tests_folder: Path) -> pd.DataFrame:
+    """The CSV fixture as upstream would type it: numbers, reais and timestamps"""
+    df = BuyOrderCsvExtractor(data_tests_folder / 'buy_orders.csv').extract()
+    for column in AMOUNT_COLUMNS:
+        df[column] = parse_centavos(df[column]) / CENTAVOS_PER_UNIT
+    for column in ['order_number', 'order_id', 'sold_quantity']:
+        df[column] = df[column].astype(int)
+    df['order_date'] = pd.to_datetime(df['order_date'], format=CSV_DATE_FORMAT)
+    return df
+
+
+def _typed_customers(data_tests_folder: Path) -> pd.DataFrame:
+    df = CustomerCsvExtractor(data_tests_folder / 'customers.csv').extract()
+    df['external_id'] = df['external_id'].astype(int)
+    df['customer_since'] = pd.to_datetime(df['customer_since'], format=CSV_DATE_FORMAT)
+    return df
+
+
+def _write(df: pd.DataFrame, path: Path, aliases: dict[str, str]) -> Path:
+    """Parquet with the canonical names, gzipped NDJSON with the CSV headers"""
+    if path.suffix == '.parquet':
+        df.to_parquet(path, index=False)
+        return path
+
+    headers = {name: header for header, name in aliases.items()}
+    content = df.rename(columns=headers).to_json(orient='records', lines=True, date_format='iso')
+    path.write_bytes(gzip.compress(content.encode()))
+    return path
+
+
+def _snapshot(model, fields: list[str]) -> list[tuple]:
+    return list(model.objects.order_by(fields[0]).values_list(*fields))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ('file_format', 'chunksize'),
+    [('parquet', None), ('parquet', 4), ('ndjson', None), ('ndjson', 4)],
+)
+def test_typed_buy_orders_load_like_csv(data_tests_folder, tmp_path, file_format, chunksize):
+    if file_format == 'parquet':
+        pytest.importorskip('pyarrow')
+    BuyOrderCsvPipeline().run(data_tests_folder / 'buy_orders.csv')
+    orders = _snapshot(BuyOrder, BUY_ORDER_FIELDS)
+    customers = _snapshot(Customer, CUSTOMER_FIELDS)
+    BuyOrder.objects.all().delete()
+    Customer.objects.all().delete()
+
+    source = _write(
+        _typed_buy_orders(data_tests_folder),
+        tmp_path / f'buy_orders.{file_format}',
+        BUY_ORDER_ALIASES,
+    )
+    REPORT_MAP[f'buy_orders_{file_format}'](chunksize=chunksize).run(source)
+
+    assert _snapshot(BuyOrder, BUY_ORDER_FIELDS) == orders
+    assert _snapshot(Customer, CUSTOMER_FIELDS) == customers
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('file_format', ['parquet', 'ndjson'])
+def test_typed_customers_load_like_csv(data_tests_folder, tmp_path, file_format):
+    if file_format == 'parquet':
+        pytest.importorskip('pyarrow')
+    CustomerCsvPipeline().run(data_tests_folder / 'customers.csv')
+    customers = _snapshot(Customer, CUSTOMER_FIELDS)
+    Customer.objects.all().delete()
+
+    source = _write(
+        _typed_customers(data_tests_folder),
+        tmp_path / f'customers.{file_format}',
+        CUSTOMER_ALIASES,
+    )
+    REPORT_MAP[f'customers_{file_format}']().run(source)
+
+    assert _snapshot(Customer, CUSTOMER_FIELDS) == customers
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('file_format', ['parquet', 'ndjson'])
+def test_typed_numeric_cpfs_keep_their_leading_zeros(data_tests_folder, tmp_path, file_format):
+    if file_format == 'parquet':
+        pytest.importorskip('pyarrow')
+    df = _typed_buy_orders(data_tests_folder)
+    cpfs = df['cpf'].str.replace(r'\D', '', regex=True)
+    df['cpf'] = pd.to_numeric(cpfs.replace('72514712365', '01234567890'))
+
+    source = _write(df, tmp_path / f'buy_orders.{file_format}', BUY_ORDER_ALIASES)
+    REPORT_MAP[f'buy_orders_{file_format}']().run(source)
+
+    assert df['cpf'].dtype.kind in 'if'
+    assert Customer.objects.filter(cpf='01234567890').exists()
+    assert not Customer.objects.filter(cpf='1234567890').exists()
+
+
+def test_typed_transformer_keeps_instants_and_reports_missing_amounts(data_tests_folder):
+    df = _typed_buy_orders(data_tests_folder)
+    df['order_date'] = df['order_date'].dt.tz_localize('UTC')
+    df.loc[[1, 3], 'total_amount'] = None
+
+    with pytest.raises(InvalidCurrencyError) as exc_info:
+        BuyOrderTypedTransformer(df.copy()).transform()
+    df['total_amount'] = df['total_amount'].fillna(0)
+    transformed = BuyOrderTypedTransformer(df.copy()).transform()
+
+    assert exc_info.value.invalid_rows == {'total_amount': [1, 3]}
+    assert str(transformed['order_date'].dtype) == 'datetime64[ns, America/Sao_Paulo]'
+    assert transformed['order_date'].tolist() == df['order_date'].tolist()
+
+
+def test_typed_transformer_reads_blank_optional_amounts_as_zero(data_tests_folder):
+    df = _typed_buy_orders(data_tests_folder)
+    df.loc[[0, 2], 'shipping_amount'] = None
+    df.loc[[4], 'discount_amount'] = None
+
+    transformed = BuyOrderTypedTransformer(df).transform()
+
+    assert transformed.loc[[0, 2], 'shipping_amount'].tolist() == [0, 0]
+    assert transformed.loc[4, 'discount_amount'] == 0
+
+
+@pytest.mark.parametrize(
+    'amounts',
+    [
+        pd.Series([90071992547409.93, 0.29, -12.345]),
+        pd.Series([Decimal('90071992547409.93'), Decimal('0.29'), Decimal('-12.345')]),
+        pd.Series(['90071992547409.93', '0.29', '-12.345']),
+    ],
+    ids=['float', 'decimal', 'str'],
+)
+def test_units_to_centavos_keeps_large_amounts_exact(amounts):
+    centavos = units_to_centavos(amounts)
+
+    assert centavos.tolist()[1:] == [29, -1235]
+    if amounts.dtype != float:
+        assert centavos[0] == PAST_FLOAT_PRECISION_CENTAVOS
@@ -0,0 +1,115 @@
+import io
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from buy_order.models import BuyOrder
+from customer.models import Customer
+from reports.ingestion.buy_order_csv.pipeline import BuyOrderCsvPipeline
+from reports.ingestion.buy_order_csv.transformer import BuyOrderCsvTransformer
+from reports.ingestion.buy_order_csv.validator import BuyOrderValidator
+from reports.ingestion.customer_typed.pipeline import CustomerNdjsonPipeline
+from reports.models import ImportJob
+
+UPLOAD_URL = '/api/v1/reports/upload/'
+
+
+def _broken_buy_orders(data_tests_folder: Path) -> bytes:
+    """The fixture with one problem per row 0-5 (data rows, the header not counted)"""
+    df = pd.read_csv(data_tests_folder / 'buy_orders.csv', dtype=str, keep_default_na=False)
+    df.loc[0, 'Total da Venda'] = 'R$ abc'
+    df.loc[1, 'Comprado Em'] = '31/02/2025 10:00:00'
+    df.loc[2, 'Número CPF/CNPJ'] = '123.456'
+    df.loc[3, 'Status'] = ''
+    df.loc[4, 'ID do Pedido'] = df.loc[5, 'ID do Pedido']
+    df.loc[5, 'Email'] = 'not-an-email'
+    return df.to_csv(index=False).encode()
+
+
+def _upload(content: bytes, report_type: str = 'buy_orders_csv'):
+    report_file = SimpleUploadedFile('buy_orders.csv', content, content_type='text/csv')
+    return APIClient().post(
+        UPLOAD_URL,
+        {'report_type': report_type, 'report_file': report_file, 'validate_only': True},
+        format='multipart',
+    )
+
+
+@pytest.mark.django_db
+def test_validate_only_accepts_a_clean_report(data_tests_folder: Path):
+    response = _upload((data_tests_folder / 'buy_orders.csv').read_bytes())
+
+    total_rows = 11
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['valid'] is True
+    assert response.data['rows'] == total_rows
+    assert response.data['issues'] == []
+    assert not ImportJob.objects.exists()
+    assert not BuyOrder.objects.exists()
+    assert not Customer.objects.exists()
+
+
+@pytest.mark.django_db
+def test_validate_only_reports_every_problem(data_tests_folder: Path):
+    response = _upload(_broken_buy_orders(data_tests_folder))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['valid'] is False
+    issues = {
+        (issue['check'], issue['column']): issue['rows'] for issue in response.data['issues']
+    }
+    assert issues == {
+        ('invalid_currency', 'total_amount'): [0],
+        ('invalid_date', 'order_date'): [1],
+        ('invalid_cpf', 'cpf'): [2],
+        ('missing_value', 'status'): [3],
+        ('conflicting_order_id', 'order_id'): [5],
+        ('invalid_email', 'email'): [5],
+    }
+    assert not BuyOrder.objects.exists()
+
+
+@pytest.mark.django_db
+def test_validate_only_unreadable_report(data_tests_folder: Path):
+    df = pd.read_csv(data_tests_folder / 'buy_orders.csv', dtype=str)
+
+    response = _upload(df.drop(columns=['Email']).to_csv(index=False).encode())
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data['valid'] is False
+    assert 'Email' in response.data['error']
+
+
+def test_validation_streams_chunks_and_caps_listed_rows(data_tests_folder: Path):
+    content = _broken_buy_orders(data_tests_folder)
+    copies = 30
+    df = pd.read_csv(io.BytesIO(content), dtype=str, keep_default_na=False)
+    df = pd.concat([df.iloc[:-1]] * copies + [df.iloc[-1:]], ignore_index=True)
+    max_rows = 5
+
+    validator = BuyOrderValidator(
+        lambda chunk: BuyOrderCsvTransformer(chunk, errors='coerce').transform(), max_rows
+    )
+    pipeline = BuyOrderCsvPipeline(chunksize=7)
+    pipeline._validator = lambda: validator
+    report = pipeline.validate(io.StringIO(df.to_csv(index=False)))
+
+    issues = {issue['check']: issue for issue in report['issues']}
+    assert report['rows'] == len(df) - 1
+    assert issues['invalid_currency']['count'] == copies
+    assert len(issues['invalid_currency']['rows']) == max_rows
+    # Conflicts are found across chunks: each copy repeats the order_id shared by 2 orders
+    assert issues['conflicting_order_id']['count'] == copies
+
+
+def test_validation_reports_missing_columns_of_typed_reports():
+    ndjson = b'{"E-mail": "ana@example.com", "Nome": "Ana Silva"}\n'
+
+    report = CustomerNdjsonPipeline().validate(io.BytesIO(ndjson))
+
+    issues = {(issue['check'], issue['column']): issue['count'] for issue in report['issues']}
+    assert issues == {('missing_column', 'customer_group'): 1}
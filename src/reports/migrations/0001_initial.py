@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('report_type', models.CharField(max_length=50)),
+                ('file_name', models.CharField(blank=True, max_length=255)),
+                ('task_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('state', models.CharField(choices=[('pending', 'Pendente'), ('running', 'Em processamento'), ('succeeded', 'Concluída'), ('failed', 'Falhou')], default='pending', max_length=20)),
+                ('rows_read', models.PositiveIntegerField(default=0)),
+                ('rows_loaded', models.PositiveIntegerField(default=0)),
+                ('chunks_processed', models.PositiveIntegerField(default=0)),
+                ('stage_timings', models.JSONField(blank=True, default=dict)),
+                ('profile', models.JSONField(blank=True, null=True)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Importação',
+                'verbose_name_plural': 'Importações',
+            },
+        ),
+    ]
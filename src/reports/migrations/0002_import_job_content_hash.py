@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='importjob',
+            index=models.Index(fields=['report_type', 'content_hash'], name='reports_imp_report__246748_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_import_job_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='rejects_file',
+            field=models.CharField(blank=True, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='rows_rejected',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
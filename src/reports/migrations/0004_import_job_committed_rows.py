@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_import_job_rejects'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='committed_rows',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0005_import_job_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='source_file',
+            field=models.CharField(blank=True, max_length=500),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0006_import_job_source_file'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='importjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('state__in', ['pending', 'running']), models.Q(('content_hash', ''), _negated=True)), fields=('report_type', 'content_hash'), name='unique_active_import_per_content'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0007_import_job_unique_active_content'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJobHeartbeat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.PositiveBigIntegerField(unique=True)),
+                ('rows_read', models.PositiveIntegerField(default=0)),
+                ('rows_loaded', models.PositiveIntegerField(default=0)),
+                ('rows_rejected', models.PositiveIntegerField(default=0)),
+                ('chunks_processed', models.PositiveIntegerField(default=0)),
+                ('stage_timings', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Acompanhamento de importação',
+                'verbose_name_plural': 'Acompanhamentos de importação',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0008_import_job_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjobheartbeat',
+            name='lease_token',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='importjobheartbeat',
+            name='leased_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
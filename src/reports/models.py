@@ -0,0 +1,90 @@
+from django.db import models
+
+
+class ImportJob(models.Model):
+    """
+    One report upload and its processing. Progress fields are settled when the
+    pipeline finishes, or with each chunk a checkpointed import commits; meanwhile a
+    run reports through its `ImportJobHeartbeat`.
+    """
+
+    class State(models.TextChoices):
+        PENDING = 'pending', 'Pendente'
+        RUNNING = 'running', 'Em processamento'
+        SUCCEEDED = 'succeeded', 'Concluída'
+        FAILED = 'failed', 'Falhou'
+
+    report_type = models.CharField(max_length=50)
+    file_name = models.CharField(max_length=255, blank=True)
+    # SHA-256 of the uploaded file, to recognize re-uploads of the same export
+    content_hash = models.CharField(max_length=64, blank=True)
+    task_id = models.CharField(max_length=255, blank=True, null=True)
+    state = models.CharField(max_length=20, choices=State.choices, default=State.PENDING)
+    rows_read = models.PositiveIntegerField(default=0)
+    rows_loaded = models.PositiveIntegerField(default=0)
+    rows_rejected = models.PositiveIntegerField(default=0)
+    chunks_processed = models.PositiveIntegerField(default=0)
+    stage_timings = models.JSONField(default=dict, blank=True)
+    profile = models.JSONField(blank=True, null=True)
+    errors = models.JSONField(default=list, blank=True)
+    # CSV of the rows quarantined by the import (see `core.ingestion.rejects`)
+    rejects_file = models.CharField(max_length=500, blank=True)
+    # Data rows of the source committed so far, where a retried import resumes (see
+    # `core.ingestion.checkpoints`)
+    committed_rows = models.PositiveBigIntegerField(default=0)
+    # Stored upload the job imports, kept when a failed import left chunks committed so
+    # the job can be resumed after them (see `ImportJobRepository.reopen`)
+    source_file = models.CharField(max_length=500, blank=True)
+    # Runs started so far, and the lease of the current one: a redelivered task only
+    # takes the job over once the lease expired (see `ImportJobRepository.mark_running`)
+    attempts = models.PositiveIntegerField(default=0)
+    lease_token = models.CharField(max_length=32, blank=True)
+    leased_until = models.DateTimeField(blank=True, null=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Importação'
+        verbose_name_plural = 'Importações'
+        indexes = [models.Index(fields=['report_type', 'content_hash'])]
+        constraints = [
+            # One queued or running import per file, even for concurrent uploads of it
+            models.UniqueConstraint(
+                fields=['report_type', 'content_hash'],
+                condition=models.Q(state__in=['pending', 'running']) & ~models.Q(content_hash=''),
+                name='unique_active_import_per_content',
+            )
+        ]
+
+    def __str__(self):
+        return f'Import Job {self.pk} ({self.report_type}, {self.state})'
+
+
+class ImportJobHeartbeat(models.Model):
+    """
+    Progress and lease renewals of the run holding an import job, written while it runs
+    (throttled, see `reports.ingestion.progress`) through `REPORT_IMPORT_PROGRESS_DATABASE`
+    (see `core.db_routers`): a connection of its own, committing every write at once, so
+    they are seen before the import's transaction commits.
+    """
+
+    # Not a foreign key: the table may live in another database than the job's
+    job_id = models.PositiveBigIntegerField(unique=True)
+    rows_read = models.PositiveIntegerField(default=0)
+    rows_loaded = models.PositiveIntegerField(default=0)
+    rows_rejected = models.PositiveIntegerField(default=0)
+    chunks_processed = models.PositiveIntegerField(default=0)
+    stage_timings = models.JSONField(default=dict, blank=True)
+    # Lease of the run, as last renewed (see `ImportJobRepository.renew_lease`)
+    lease_token = models.CharField(max_length=32, blank=True)
+    leased_until = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Acompanhamento de importação'
+        verbose_name_plural = 'Acompanhamentos de importação'
+
+    def __str__(self):
+        return f'Heartbeat of Import Job {self.job_id}'
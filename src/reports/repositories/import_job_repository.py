@@ -0,0 +1,293 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Optional, TypedDict
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from reports.models import ImportJob, ImportJobHeartbeat
+
+
+class ImportJobProgress(TypedDict):
+    rows_read: int
+    rows_loaded: int
+    rows_rejected: int
+    chunks_processed: int
+    stage_timings: Dict[str, float]
+
+
+class ImportJobError(TypedDict, total=False):
+    type: str
+    message: str
+    invalid_rows: Dict[str, list]
+    shard: int
+
+
+class LeaseLostError(RuntimeError):
+    """The run's lease on its job expired and another run of the job took it over"""
+
+
+class ImportJobRepository:
+    """
+    Writes go through `update()` on the job row only, so concurrent progress
+    writes from the worker and reads from the API never clobber other fields.
+    `using` selects the database alias of the job rows.
+
+    While a run goes on, its progress and lease renewals go to the job's heartbeat
+    instead, which commits on a connection of its own (see `ImportJobHeartbeat`).
+    """
+
+    def __init__(self, using: str = 'default') -> None:
+        self.using = using
+
+    def create(
+        self, report_type: str, file_name: str, content_hash: str = '', source_file: str = ''
+    ) -> ImportJob:
+        """
+        Raises `IntegrityError` when a job for the same `content_hash` is already queued
+        or running, e.g. created by a concurrent upload of the same file
+        """
+        with transaction.atomic():
+            return ImportJob.objects.create(
+                report_type=report_type,
+                file_name=file_name,
+                content_hash=content_hash,
+                source_file=source_file,
+            )
+
+    def find_by_id(self, job_id: int) -> Optional[ImportJob]:
+        try:
+            return ImportJob.objects.get(pk=job_id)
+        except ImportJob.DoesNotExist:
+            return None
+
+    def find_by_content_hash(self, report_type: str, content_hash: str) -> Optional[ImportJob]:
+        """Latest job for the same file that has not failed: queued, running or done"""
+        return (
+            ImportJob.objects.filter(report_type=report_type, content_hash=content_hash)
+            .exclude(state=ImportJob.State.FAILED)
+            .order_by('-created_at', '-pk')
+            .first()
+        )
+
+    def set_task_id(self, job_id: int, task_id: str) -> None:
+        self._update(job_id, task_id=task_id)
+
+    def mark_running(self, job_id: int, lease_seconds: float, max_attempts: int) -> Optional[str]:
+        """
+        Starts a pending job, or resumes a running one whose lease expired (its worker
+        was lost), keeping its start time, for `lease_seconds`. Returns the token the
+        run's writes are fenced with; None when the job already finished, another run
+        holds a live lease or the job used up its `max_attempts` runs.
+        """
+        now = timezone.now()
+        job = self.find_by_id(job_id)
+        if (
+            job is None
+            or job.attempts >= max_attempts
+            or job.state not in {ImportJob.State.PENDING, ImportJob.State.RUNNING}
+            or (job.state == ImportJob.State.RUNNING and self.lease_expiry(job) > now)
+        ):
+            return None
+
+        token = uuid.uuid4().hex
+        leased_until = now + timedelta(seconds=lease_seconds)
+        # Fenced on the run it takes over, for two deliveries claiming the job at once
+        claimed = (
+            ImportJob.objects.using(self.using)
+            .filter(pk=job_id, state=job.state, attempts=job.attempts)
+            .update(
+                state=ImportJob.State.RUNNING,
+                attempts=F('attempts') + 1,
+                lease_token=token,
+                leased_until=leased_until,
+                started_at=Coalesce('started_at', now),
+                updated_at=now,
+            )
+        )
+        if not claimed:
+            return None
+        # The run reports from scratch, and renews its lease from here on
+        ImportJobHeartbeat.objects.update_or_create(
+            job_id=job_id,
+            defaults={
+                'rows_read': 0,
+                'rows_loaded': 0,
+                'rows_rejected': 0,
+                'chunks_processed': 0,
+                'stage_timings': {},
+                'lease_token': token,
+                'leased_until': leased_until,
+            },
+        )
+        return token
+
+    def is_running(self, job_id: int) -> bool:
+        return (
+            ImportJob.objects.using(self.using)
+            .filter(pk=job_id, state=ImportJob.State.RUNNING)
+            .exists()
+        )
+
+    def find_abandoned(self, grace_seconds: float) -> list[ImportJob]:
+        """
+        Running jobs whose lease, as last renewed, ended over `grace_seconds` ago
+        without another run taking them over
+        """
+        cutoff = timezone.now() - timedelta(seconds=grace_seconds)
+        candidates = ImportJob.objects.using(self.using).filter(
+            state=ImportJob.State.RUNNING, leased_until__lte=cutoff
+        )
+        return [job for job in candidates if self.lease_expiry(job) <= cutoff]
+
+    def lease_expiry(self, job: ImportJob) -> datetime:
+        """End of the lease of the run holding `job`, as last renewed"""
+        heartbeat = ImportJobHeartbeat.objects.filter(job_id=job.pk).first()
+        if (
+            heartbeat is not None
+            and heartbeat.lease_token == job.lease_token
+            and heartbeat.leased_until is not None
+        ):
+            return heartbeat.leased_until
+        return job.leased_until or timezone.now()
+
+    def progress(self, job: ImportJob) -> ImportJobProgress:
+        """
+        Progress of `job`: the one its running run reports through the heartbeat, until
+        the job row holds further (settled, or committed by a checkpoint)
+        """
+        progress: ImportJobProgress = {
+            'rows_read': job.rows_read,
+            'rows_loaded': job.rows_loaded,
+            'rows_rejected': job.rows_rejected,
+            'chunks_processed': job.chunks_processed,
+            'stage_timings': job.stage_timings,
+        }
+        if job.state != ImportJob.State.RUNNING:
+            return progress
+        heartbeat = ImportJobHeartbeat.objects.filter(job_id=job.pk).first()
+        if heartbeat is None or heartbeat.chunks_processed <= job.chunks_processed:
+            return progress
+        return {
+            'rows_read': heartbeat.rows_read,
+            'rows_loaded': heartbeat.rows_loaded,
+            'rows_rejected': heartbeat.rows_rejected,
+            'chunks_processed': heartbeat.chunks_processed,
+            'stage_timings': heartbeat.stage_timings or job.stage_timings,
+        }
+
+    def reopen(self, job_id: int) -> bool:
+        """
+        Queues a failed job again when it committed chunks before failing, so its next
+        run resumes after them; its runs are counted afresh. False for any other job,
+        and while another import of the same file is queued or running.
+        """
+        try:
+            with transaction.atomic(using=self.using):
+                return bool(
+                    ImportJob.objects.using(self.using)
+                    .filter(pk=job_id, state=ImportJob.State.FAILED, committed_rows__gt=0)
+                    .update(
+                        state=ImportJob.State.PENDING,
+                        attempts=0,
+                        errors=[],
+                        lease_token='',
+                        leased_until=None,
+                        finished_at=None,
+                        updated_at=timezone.now(),
+                    )
+                )
+        except IntegrityError:
+            return False
+
+    def renew_lease(self, job_id: int, lease_token: str, lease_seconds: float) -> None:
+        """
+        Extends the lease of the run holding `lease_token`, committed at once through the
+        heartbeat, or raises `LeaseLostError`
+        """
+        now = timezone.now()
+        renewed = ImportJobHeartbeat.objects.filter(job_id=job_id, lease_token=lease_token).update(
+            leased_until=now + timedelta(seconds=lease_seconds), updated_at=now
+        )
+        if not renewed:
+            raise LeaseLostError(f'Import job {job_id} was taken over by another run')
+
+    def update_progress(self, job_id: int, progress: ImportJobProgress) -> None:
+        """Progress of the running run, committed at once through the heartbeat"""
+        self._beat(job_id, **progress)
+
+    def save_checkpoint(
+        self, job_id: int, committed_rows: int, progress: ImportJobProgress
+    ) -> None:
+        """Records the rows committed so far, in the transaction that committed them"""
+        self._update(job_id, committed_rows=committed_rows, **progress)
+
+    def add_progress(
+        self, job_id: int, rows_read: int, rows_loaded: int, rows_rejected: int, chunks: int
+    ) -> None:
+        """Adds to the counters in SQL, for shards of one job reporting concurrently"""
+        self._beat(
+            job_id,
+            rows_read=F('rows_read') + rows_read,
+            rows_loaded=F('rows_loaded') + rows_loaded,
+            rows_rejected=F('rows_rejected') + rows_rejected,
+            chunks_processed=F('chunks_processed') + chunks,
+        )
+
+    def mark_succeeded(
+        self,
+        job_id: int,
+        progress: ImportJobProgress,
+        profile: Optional[dict],
+        rejects_file: str = '',
+    ) -> None:
+        """`rejects_file` is the file of the rows quarantined by the run, if any"""
+        self._update(
+            job_id,
+            **progress,
+            profile=profile,
+            rejects_file=rejects_file,
+            state=ImportJob.State.SUCCEEDED,
+            finished_at=timezone.now(),
+        )
+        ImportJobHeartbeat.objects.filter(job_id=job_id).delete()
+
+    def mark_failed(
+        self,
+        job_id: int,
+        errors: list[ImportJobError],
+        lease_token: Optional[str] = None,
+        rejects_file: str = '',
+    ) -> None:
+        """
+        Fails a pending or running job; an outcome already recorded is kept, and so is
+        a job another run took over from the one holding `lease_token`. `rejects_file`
+        holds the rows quarantined in the chunks committed before the failure, if any.
+        """
+        jobs = ImportJob.objects.using(self.using).filter(
+            pk=job_id, state__in=[ImportJob.State.PENDING, ImportJob.State.RUNNING]
+        )
+        if lease_token is not None:
+            jobs = jobs.filter(lease_token=lease_token)
+        failed = jobs.update(
+            errors=errors,
+            rejects_file=rejects_file,
+            state=ImportJob.State.FAILED,
+            finished_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        if failed:
+            ImportJobHeartbeat.objects.filter(job_id=job_id).delete()
+
+    def _update(self, job_id: int, **fields) -> None:
+        # `update()` skips auto_now, so updated_at is set by hand
+        ImportJob.objects.using(self.using).filter(pk=job_id).update(
+            **fields, updated_at=timezone.now()
+        )
+
+    def _beat(self, job_id: int, **fields) -> None:
+        ImportJobHeartbeat.objects.filter(job_id=job_id).update(
+            **fields, updated_at=timezone.now()
+        )
@@ -1,26 +1,459 @@
-from typing import Literal
+from typing import Literal, Optional
 
-from celery import shared_task
+from celery import Task, chord, shared_task
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
 import os
+import shutil
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from core.ingestion.checkpoints import Checkpoint
+from core.ingestion.profiling import PipelineReport, StageCollector, merge_reports
+from core.ingestion.rejects import RejectWriter, merge_rejects
+from core.ingestion.sharding import ShardSource
 from reports.ingestion.mapping import REPORT_MAP
+from reports.ingestion.progress import (
+    ImportJobCheckpoint,
+    ImportJobLeaseCollector,
+    ImportJobProgressCollector,
+    job_progress,
+)
+from reports.models import ImportJob
+from reports.repositories.import_job_repository import (
+    ImportJobError,
+    ImportJobRepository,
+    LeaseLostError,
+)
+from utils.monetary import InvalidCurrencyError
 import logging
 
 logger = logging.getLogger(__name__)
 
-report_type = Literal['buy_orders_csv', 'customers_csv']
+report_type = Literal[
+    'buy_orders_csv',
+    'buy_orders_parquet',
+    'buy_orders_ndjson',
+    'customers_csv',
+    'customers_parquet',
+    'customers_ndjson',
+]
 
+# Bounds of a job's error summary: message length and row indexes kept per column
+MAX_ERROR_MESSAGE_LENGTH = 1000
+MAX_ERROR_ROWS = 50
+# Retries of a shard failing on a database error, e.g. a dropped connection
+SHARD_MAX_RETRIES = 3
+
+
+# Acknowledged once done, so a task whose worker is killed or restarted is delivered
+# again and resumes from its job's checkpoint, if any, once the lost run's lease expires
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True)
+def process_report_task(
+    self: Task, report_type: report_type, file_path: str, job_id: Optional[int] = None
+):
+    """
+    Celery task to process a report asynchronously. The result, stored by
+    django-celery-results, carries the pipeline's per-stage profile; with `job_id`
+    the matching `ImportJob` tracks the state and progress of the run.
+
+    With `REPORT_INGESTION_SHARD_ROWS` set, reports whose pipeline supports it are
+    split into shards loaded by parallel `process_report_shard_task`s instead, and
+    `finish_sharded_report_task` settles the job once all of them are done.
+
+    With `REPORT_INGESTION_REJECTS_DIR` set, rows failing on their own are quarantined
+    to a rejects file kept on the job instead of failing the whole import.
+
+    With `REPORT_INGESTION_CHECKPOINTS` set, a streamed job commits chunk by chunk and
+    a redelivered task picks up after the last committed chunk. The source file is
+    kept until the job succeeds or fails, and past a failure when chunks stayed
+    committed, for the job to be reopened and resumed after them.
+
+    A run holds its job under a lease (`REPORT_IMPORT_LEASE_SECONDS`): a task delivered
+    again while the lease is live retries once it would have expired, so two workers
+    never load one job at the same time, and a job is failed after
+    `REPORT_IMPORT_MAX_ATTEMPTS` runs instead of being redelivered forever.
+    """
+    job_repo = ImportJobRepository()
+    lease_token = None
+    if job_id is not None:
+        lease_token = job_repo.mark_running(
+            job_id, settings.REPORT_IMPORT_LEASE_SECONDS, settings.REPORT_IMPORT_MAX_ATTEMPTS
+        )
+        if lease_token is None:
+            return _not_started(self, report_type, file_path, job_id)
 
-@shared_task
-def process_report_task(report_type: report_type, file_path: str):
-    """Celery task to process a report asynchronously"""
     try:
-        PipelineClass = REPORT_MAP[report_type]
-        pipeline = PipelineClass()
-        pipeline.run(file_path)
-        return f'Report {report_type} processed successfully from file {file_path}'
+        if settings.REPORT_INGESTION_SHARD_ROWS and REPORT_MAP[report_type].shard_key_columns:
+            result = _fan_out(report_type, file_path, job_id, lease_token)
+        else:
+            result = _process(report_type, file_path, job_id, lease_token)
+    except LeaseLostError:
+        # The job, its source and its rejects now belong to the run that took it over
+        logger.warning('Import job %s was taken over by another run', job_id)
+        return {'message': f'Import job {job_id} was taken over by another run', 'job_id': job_id}
     except Exception as e:
         logger.exception('Report processing failed')
+        _fail(job_id, [_error_summary(e)], file_path, lease_token)
         raise ValueError(f'Report processment failed: {e}')
-    finally:
-        if file_path and os.path.exists(file_path):
-            os.remove(file_path)
+    # Not in a `finally`: a worker shutting down mid-run leaves the file to the retry
+    _remove_source(file_path)
+    return result
+
+
+# Delivered again when its worker is lost, and retried on database errors: a lost
+# shard would otherwise never report to the chord, leaving its job running
+@shared_task(
+    acks_late=True,
+    reject_on_worker_lost=True,
+    autoretry_for=(OperationalError,),
+    retry_backoff=True,
+    max_retries=SHARD_MAX_RETRIES,
+)
+def process_report_shard_task(
+    report_type: report_type,
+    parts: list[str],
+    job_id: Optional[int],
+    lease_token: Optional[str] = None,
+):
+    """
+    Transforms and loads one shard, committing it chunk by chunk. Failures are returned
+    rather than raised so the chord callback still runs and reports every shard.
+    Database errors are raised instead, for the task to be retried; past its retries
+    `fail_sharded_report_task` fails the job.
+
+    Shards renew the lease the job was fanned out under (see `expire_import_jobs_task`).
+    """
+    if job_id is not None and not ImportJobRepository().is_running(job_id):
+        # Delivered again after the job was failed, e.g. abandoned meanwhile
+        logger.warning('Import job %s is no longer running, shard skipped', job_id)
+        return {'error': {'type': 'Skipped', 'message': f'Import job {job_id} is not running'}}
+
+    collectors: list[StageCollector] = []
+    # A progress write on the shard's own connection would lock the heartbeat row for
+    # the rest of the chunk, queueing every other shard behind it: shards only report
+    # progress and renew the lease through a separate alias, and otherwise report in
+    # their chord result
+    if job_id is not None and settings.REPORT_IMPORT_PROGRESS_DATABASE != DEFAULT_DB_ALIAS:
+        collectors.append(ImportJobProgressCollector(job_id, incremental=True))
+        if lease_token is not None:
+            collectors.append(ImportJobLeaseCollector(job_id, lease_token))
+
+    rejects = _reject_writer(job_id)
+    try:
+        profile = _run_pipeline(report_type, ShardSource(parts), collectors, rejects)
+    except Exception as e:
+        logger.exception('Report shard processing failed')
+        if rejects is not None:
+            rejects.discard()
+        if isinstance(e, OperationalError):
+            raise
+        return {'error': _error_summary(e)}
+    return {'profile': profile, 'rejects_file': _rejects_file(rejects)}
+
+
+@shared_task
+def finish_sharded_report_task(
+    results: list[dict],
+    report_type: report_type,
+    job_id: Optional[int],
+    workdir: str,
+    started_at: float,
+):
+    """Chord callback: merges the shard profiles and settles the import job"""
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    errors: list[ImportJobError] = [
+        {**result['error'], 'shard': shard}
+        for shard, result in enumerate(results)
+        if 'error' in result
+    ]
+    profile = merge_reports(
+        [result['profile'] for result in results if 'profile' in result],
+        time.time() - started_at,
+    )
+    shard_rejects = [
+        Path(result['rejects_file']) for result in results if result.get('rejects_file')
+    ]
+
+    job_repo = ImportJobRepository()
+    if errors:
+        for path in shard_rejects:
+            path.unlink(missing_ok=True)
+        if job_id is not None:
+            job_repo.mark_failed(job_id, errors)
+        raise ValueError(
+            f'Report processment failed in {len(errors)} of {len(results)} shards: '
+            + '; '.join(error['message'] for error in errors)
+        )
+
+    rejects_file = ''
+    if shard_rejects:
+        rejects_file = str(_rejects_path(job_id))
+        merge_rejects(shard_rejects, Path(rejects_file))
+    if job_id is not None:
+        job_repo.mark_succeeded(
+            job_id, job_progress(profile['stages'], profile['chunks']), profile, rejects_file
+        )
+    return {
+        'message': f'Report {report_type} processed successfully in {len(results)} shards',
+        'job_id': job_id,
+        'profile': profile,
+        'rejects_file': rejects_file,
+    }
+
+
+@shared_task
+def fail_sharded_report_task(
+    request, exc: Exception, traceback, job_id: Optional[int], workdir: str
+) -> None:
+    """
+    Chord errback: a shard or the callback raised instead of reporting (e.g. a shard
+    ran out of retries), so the job is failed rather than left running
+    """
+    shutil.rmtree(workdir, ignore_errors=True)
+    logger.error('Sharded import of job %s failed: %s', job_id, exc)
+    if job_id is not None:
+        ImportJobRepository().mark_failed(job_id, [_error_summary(exc)])
+
+
+@shared_task
+def expire_import_jobs_task() -> dict:
+    """
+    Fails the running import jobs no run holds any more: their lease ended a whole lease
+    ago (`REPORT_IMPORT_LEASE_SECONDS`) and no redelivered task took them over, e.g.
+    every message of a fanned-out import was lost. Run by celery beat
+    (`CELERY_BEAT_SCHEDULE`).
+    """
+    job_repo = ImportJobRepository()
+    expired = job_repo.find_abandoned(settings.REPORT_IMPORT_LEASE_SECONDS)
+    for job in expired:
+        logger.error('Import job %s stopped renewing its lease, abandoned', job.pk)
+        _fail(
+            job.pk,
+            [
+                {
+                    'type': 'WorkerLostError',
+                    'message': 'The import stopped reporting and was abandoned',
+                }
+            ],
+            job.source_file,
+            job.lease_token,
+        )
+    return {
+        'message': f'{len(expired)} import jobs expired',
+        'job_ids': [job.pk for job in expired],
+    }
+
+
+def _not_started(task: Task, report_type: report_type, file_path: str, job_id: int) -> dict:
+    """
+    Outcome of a delivery that could not take its job: skipped when the job finished,
+    retried while another run holds it, and the job failed once its runs are used up
+    """
+    job_repo = ImportJobRepository()
+    job = job_repo.find_by_id(job_id)
+    if job is None or job.state in {ImportJob.State.SUCCEEDED, ImportJob.State.FAILED}:
+        logger.warning('Import job %s already finished, task skipped', job_id)
+        return {'message': f'Import job {job_id} already finished', 'job_id': job_id}
+
+    now = timezone.now()
+    leased_until = job_repo.lease_expiry(job)
+    if job.attempts < settings.REPORT_IMPORT_MAX_ATTEMPTS or leased_until > now:
+        # Still running elsewhere, e.g. delivered again after the broker's consumer
+        # timeout: checked again once the lease would have expired
+        countdown = max((leased_until - now).total_seconds(), 0) + 1
+        raise task.retry(countdown=countdown, max_retries=None)
+
+    logger.error('Import job %s failed after %s attempts', job_id, job.attempts)
+    _fail(
+        job_id,
+        [
+            {
+                'type': 'WorkerLostError',
+                'message': f'The import was interrupted {job.attempts} times and abandoned',
+            }
+        ],
+        file_path,
+    )
+    return {'message': f'Report {report_type} abandoned', 'job_id': job_id}
+
+
+def _process(
+    report_type: report_type,
+    file_path: str,
+    job_id: Optional[int],
+    lease_token: Optional[str] = None,
+) -> dict:
+    collectors: list[StageCollector] = []
+    checkpoint = None
+    if job_id is not None and lease_token is not None and settings.REPORT_INGESTION_CHECKPOINTS:
+        # Progress is then written with each committed chunk
+        checkpoint = ImportJobCheckpoint(job_id, lease_token)
+    elif job_id is not None:
+        collectors.append(ImportJobProgressCollector(job_id))
+    if job_id is not None and lease_token is not None:
+        # Checkpoints renew it with each chunk they commit, but a run left in one
+        # transaction commits nothing until it ends
+        collectors.append(ImportJobLeaseCollector(job_id, lease_token))
+
+    # A resumed run appends to the rejects of the run it picks up from
+    rejects = _reject_writer(job_id, resumable=checkpoint is not None)
+    try:
+        profile = _run_pipeline(report_type, file_path, collectors, rejects, checkpoint)
+    except LeaseLostError:
+        raise
+    except Exception:
+        # The job failed: the rows quarantined so far were not the only ones left out.
+        # A checkpointed run keeps those of the chunks it committed (see `_fail`)
+        if rejects is not None and checkpoint is None:
+            rejects.discard()
+        raise
+
+    rejects_file = _rejects_file(rejects)
+    if job_id is not None:
+        progress = (
+            checkpoint.progress(profile)
+            if checkpoint is not None
+            else job_progress(profile['stages'], profile['chunks'])
+        )
+        ImportJobRepository().mark_succeeded(job_id, progress, profile, rejects_file)
+    return {
+        'message': f'Report {report_type} processed successfully from file {file_path}',
+        'job_id': job_id,
+        'profile': profile,
+        'rejects_file': rejects_file,
+    }
+
+
+def _fail(
+    job_id: Optional[int],
+    errors: list[ImportJobError],
+    file_path: str,
+    lease_token: Optional[str] = None,
+) -> None:
+    """
+    Fails the job and removes its source. Chunks a checkpointed import committed before
+    failing stay loaded, though: their rejects and the source are kept then, so the job
+    can be reopened (`ImportJobRepository.reopen`) and resumed after them.
+    """
+    committed_rows = 0
+    if job_id is not None:
+        job_repo = ImportJobRepository()
+        job = job_repo.find_by_id(job_id)
+        if job is not None and lease_token is not None and job.lease_token != lease_token:
+            # Taken over meanwhile: the source and the rejects belong to the new run
+            return
+        committed_rows = job.committed_rows if job is not None else 0
+        rejects = _reject_writer(job_id, resumable=True)
+        if rejects is not None:
+            # Those of the chunk that failed were rolled back with it
+            rejects.resume(committed_rows)
+        job_repo.mark_failed(job_id, errors, lease_token, _rejects_file(rejects))
+    if not committed_rows:
+        _remove_source(file_path)
+
+
+def _fan_out(
+    report_type: report_type,
+    file_path: str,
+    job_id: Optional[int],
+    lease_token: Optional[str] = None,
+) -> dict:
+    """
+    Splits the report into shards and starts one task per shard, with the lookup rows
+    all of them need already created. Shards are committed independently, and renew
+    the job's lease under `lease_token` as they run.
+    """
+    started_at = time.time()
+    workdir = Path(
+        tempfile.mkdtemp(prefix='report-shards-', dir=settings.REPORT_INGESTION_SHARD_DIR)
+    )
+    try:
+        pipeline = REPORT_MAP[report_type](chunksize=settings.REPORT_INGESTION_CHUNKSIZE)
+        shards = pipeline.plan_shards(file_path, settings.REPORT_INGESTION_SHARD_ROWS, workdir)
+    except Exception:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
+
+    callback = finish_sharded_report_task.s(report_type, job_id, str(workdir), started_at)
+    callback.link_error(fail_sharded_report_task.s(job_id, str(workdir)))
+    header = [
+        process_report_shard_task.s(report_type, shard.parts, job_id, lease_token)
+        for shard in shards
+    ]
+    if header:
+        chord(header)(callback)
+    else:
+        callback.delay([])
+
+    return {
+        'message': f'Report {report_type} split into {len(shards)} shards from file {file_path}',
+        'job_id': job_id,
+        'shards': len(shards),
+    }
+
+
+def _run_pipeline(
+    report_type: report_type,
+    source: str | ShardSource,
+    collectors: list[StageCollector],
+    rejects: Optional[RejectWriter] = None,
+    checkpoint: Optional[Checkpoint] = None,
+) -> PipelineReport:
+    PipelineClass = REPORT_MAP[report_type]
+    pipeline = PipelineClass(
+        chunksize=settings.REPORT_INGESTION_CHUNKSIZE,
+        collectors=collectors,
+        rejects=rejects,
+        checkpoint=checkpoint,
+    )
+    return pipeline.run(source)
+
+
+def _rejects_path(job_id: Optional[int], resumable: bool = False) -> Path:
+    """
+    A unique file per run, or the job's own when its runs resume one another, named
+    so it cannot be guessed from the job id
+    """
+    if job_id is None:
+        name = f'report-{uuid.uuid4().hex}'
+    elif not resumable:
+        name = f'job-{job_id}-{uuid.uuid4().hex}'
+    else:
+        # Derived from the secret key, so every run of the job finds it again
+        token = salted_hmac('reports.rejects', str(job_id)).hexdigest()
+        name = f'job-{job_id}-{token}'
+    return Path(settings.REPORT_INGESTION_REJECTS_DIR) / f'{name}.csv'
+
+
+def _reject_writer(job_id: Optional[int], resumable: bool = False) -> Optional[RejectWriter]:
+    """Quarantine for one run, unless imports are all-or-nothing"""
+    if settings.REPORT_INGESTION_REJECTS_DIR is None:
+        return None
+    return RejectWriter(_rejects_path(job_id, resumable), settings.REPORT_INGESTION_MAX_REJECTS)
+
+
+def _remove_source(file_path: str) -> None:
+    if file_path and os.path.exists(file_path):
+        os.remove(file_path)
+
+
+def _rejects_file(rejects: Optional[RejectWriter]) -> str:
+    """Path of the rejects written by a run, '' when it rejected nothing"""
+    return str(rejects.path) if rejects is not None and rejects.count else ''
+
+
+def _error_summary(exc: Exception) -> ImportJobError:
+    summary: ImportJobError = {
+        'type': type(exc).__name__,
+        'message': str(exc)[:MAX_ERROR_MESSAGE_LENGTH],
+    }
+    if isinstance(exc, InvalidCurrencyError):
+        summary['invalid_rows'] = {
+            column: rows[:MAX_ERROR_ROWS] for column, rows in exc.invalid_rows.items()
+        }
+    return summary
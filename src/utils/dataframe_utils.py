@@ -1,9 +1,20 @@
-from typing import Any, Dict, List, Tuple
+import re
+from functools import lru_cache
+from importlib.util import find_spec
+from typing import Any, Dict, List, Literal, Optional, Sequence, Tuple, cast
 
+import numpy as np
 import pandas as pd
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_numeric_dtype
 
-from utils.datetime_utils import local_to_aware
-from utils.monetary import to_decimal
+from utils.datetime_utils import AmbiguousPolicy, NonexistentPolicy, localize_series
+from utils.monetary import InvalidCurrencyError, parse_centavos, units_to_centavos
+
+
+@lru_cache(maxsize=1)
+def text_dtype() -> pd.StringDtype:
+    """Arrow-backed strings when pyarrow is installed, pandas' own strings otherwise"""
+    return pd.StringDtype('pyarrow' if find_spec('pyarrow') else 'python')
 
 
 class DataFrameUtils:
@@ -11,37 +22,89 @@ class DataFrameUtils:
 
     @staticmethod
     def clean_currency_columns(
-        df: pd.DataFrame, columns: List[str], symbol: str = 'R$'
+        df: pd.DataFrame,
+        columns: List[str],
+        symbol: str = 'R$',
+        errors: Literal['raise', 'coerce'] = 'raise',
+        blank_as_zero: Sequence[str] = (),
     ) -> pd.DataFrame:
-        """Converts string-formatted monetary columns to `Decimal` objects.
+        """Converts string-formatted monetary columns to integer centavos.
 
-        This method is designed to clean currency strings in a typical
-        Brazilian format (e.g., "R$ 1.234,56"). It strips the currency
-        symbol, removes thousand separators, and replaces the decimal comma
-        with a period before converting the value to a high-precision Decimal.
+        This method is designed to parse currency strings in a typical
+        Brazilian format (e.g., "R$ 1.234,56") straight into int64 centavos
+        (123456) with a single vectorized regex pass per column. Decimals are
+        only meant to be built at the ORM boundary, see
+        `utils.monetary.centavos_to_decimal`.
 
         Args:
             df (pd.DataFrame): The input DataFrame to process.
             columns (List[str]): A list of column names to convert.
             symbol (str, optional): The currency symbol to strip.
             Defaults to 'R$'.
+            errors (str, optional): 'raise' raises `InvalidCurrencyError` with
+            the unparseable row indexes of every column; 'coerce' keeps them as
+            <NA>. Defaults to 'raise'.
+
+            blank_as_zero (Sequence[str], optional): optional columns whose
+            blank cells are read as 0 instead of unparseable. Defaults to ().
+
+        Returns:
+            pd.DataFrame: The DataFrame with specified columns converted to
+            int64 centavos.
+        """
+        invalid_rows: Dict[str, list] = {}
+        for col in columns:
+            if col not in df.columns:
+                continue
+
+            try:
+                df[col] = parse_centavos(df[col], symbol, errors, col in blank_as_zero)
+            except InvalidCurrencyError as e:
+                invalid_rows.update(e.invalid_rows)
+
+        if invalid_rows:
+            raise InvalidCurrencyError(invalid_rows)
+
+        return df
+
+    @staticmethod
+    def currency_units_to_centavos(
+        df: pd.DataFrame,
+        columns: List[str],
+        errors: Literal['raise', 'coerce'] = 'raise',
+        blank_as_zero: Sequence[str] = (),
+    ) -> pd.DataFrame:
+        """Converts numeric monetary columns in currency units to integer centavos.
+
+        Counterpart of `clean_currency_columns` for typed sources (Parquet, JSON),
+        whose amounts are already numbers such as 1234.56.
+
+        Args:
+            df (pd.DataFrame): The input DataFrame to process.
+            columns (List[str]): A list of column names to convert.
+            errors (str, optional): 'raise' raises `InvalidCurrencyError` with
+            the null or non-numeric row indexes of every column; 'coerce' keeps
+            them as <NA>. Defaults to 'raise'.
+
+            blank_as_zero (Sequence[str], optional): optional columns whose
+            blank cells are read as 0 instead of unparseable. Defaults to ().
 
         Returns:
             pd.DataFrame: The DataFrame with specified columns converted to
-            the `Decimal` data type.
+            int64 centavos.
         """
+        invalid_rows: Dict[str, list] = {}
         for col in columns:
             if col not in df.columns:
                 continue
 
-            cleaned_series = (
-                df[col]
-                .str.replace(symbol, '', regex=False)
-                .str.strip()
-                .str.replace('.', '', regex=False)
-                .str.replace(',', '.', regex=False)
-            )
-            df[col] = cleaned_series.map(to_decimal)
+            try:
+                df[col] = units_to_centavos(df[col], errors, col in blank_as_zero)
+            except InvalidCurrencyError as e:
+                invalid_rows.update(e.invalid_rows)
+
+        if invalid_rows:
+            raise InvalidCurrencyError(invalid_rows)
 
         return df
 
@@ -56,7 +119,10 @@ class DataFrameUtils:
         - Exact match: Replaces a cell's value only if it exactly matches a
           key in the mapping dictionary.
         - Substring match: Replaces a cell's entire value if it contains a
-          key from the mapping dictionary as a substring.
+          key from the mapping dictionary as a substring. When it contains
+          several, the first key in mapping order wins. The keys are compiled
+          into a single regex and matched once per distinct value of the column,
+          and the replacements are broadcast back through the value codes.
 
         Args:
             df (pd.DataFrame): The input DataFrame to process.
@@ -71,13 +137,25 @@ class DataFrameUtils:
             columns.
         """
         for col, mapping in columns_mapping.items():
-            if col not in df.columns:
+            if col not in df.columns or not mapping:
                 continue
 
             if contains:
-                for find_val, replace_val in mapping.items():
-                    mask = df[col].str.contains(find_val, na=False, regex=False)
-                    df.loc[mask, col] = replace_val
+                codes, uniques = pd.factorize(df[col])
+                pattern = _first_key_pattern(tuple(mapping))
+                replacements = list(mapping.values())
+                # Per distinct value: index of the first key it contains, -1 for none
+                hits = np.full(len(uniques) + 1, -1)
+                for code, value in enumerate(uniques):
+                    match = pattern.match(value) if isinstance(value, str) else None
+                    if match:
+                        hits[code] = cast(int, match.lastindex) - 1
+                # Nulls are coded -1, which picks the trailing "no match"
+                row_hits = hits[codes]
+                matched = row_hits >= 0
+                if matched.any():
+                    targets = np.array(replacements, dtype=object)
+                    df.loc[matched, col] = targets[row_hits[matched]]
             else:
                 df[col] = df[col].replace(mapping)
 
@@ -124,16 +202,57 @@ class DataFrameUtils:
             columns (List[str]): A list of column names to clean.
 
         Returns:
-            pd.DataFrame: The DataFrame with the specified columns containing
-            only digits.
+            pd.DataFrame: The DataFrame with the specified columns as text
+            columns (see `text_dtype`) containing only digits, or null.
         """
         for col in columns:
             if col not in df.columns:
                 continue
 
-            df[col] = df[col].astype(str)
-            df[col] = df[col].str.replace(r'\D', '', regex=True)
-            df[col] = df[col].replace('', None)
+            digits = df[col].astype(text_dtype()).str.replace(r'\D', '', regex=True)
+            df[col] = digits.mask(digits.eq('').fillna(False))
+
+        return df
+
+    @staticmethod
+    def values_to_text(
+        df: pd.DataFrame,
+        columns: List[str],
+        digit_lengths: Optional[Dict[str, Sequence[int]]] = None,
+    ) -> pd.DataFrame:
+        """Converts columns of any type to text columns (see `text_dtype`).
+
+        Typed sources may hold identifiers such as CPFs or order numbers as
+        numbers, possibly as floats when the column has nulls; integral values
+        are rendered without a decimal part (5.0 -> '5'). Numbers lose their
+        leading zeros, so those of the `digit_lengths` columns are zero-padded
+        to the shortest of their lengths that fits them (1234567890 -> '01234567890'
+        for CPFs); longer values are left for validation.
+
+        Args:
+            df (pd.DataFrame): The input DataFrame to process.
+            columns (List[str]): A list of column names to convert.
+            digit_lengths (Dict[str, Sequence[int]], optional): Valid digit counts
+                of numeric identifier columns, to zero-pad.
+
+        Returns:
+            pd.DataFrame: The DataFrame with the specified columns as text.
+        """
+        for col in columns:
+            if col not in df.columns:
+                continue
+
+            values = df[col]
+            if not is_numeric_dtype(values) or is_bool_dtype(values):
+                df[col] = values.astype(text_dtype())
+                continue
+
+            text = values.astype('Int64').astype(text_dtype())
+            padded = text
+            lengths = text.str.len()
+            for length in sorted((digit_lengths or {}).get(col, ()), reverse=True):
+                padded = padded.mask(lengths.le(length).fillna(False), text.str.zfill(length))
+            df[col] = padded
 
         return df
 
@@ -190,27 +309,90 @@ class DataFrameUtils:
 
     @staticmethod
     def convert_dataframe_datetimes_to_aware(
-        df: pd.DataFrame, datetime_columns: list
+        df: pd.DataFrame,
+        datetime_columns: list,
+        ambiguous: AmbiguousPolicy = 'dst',
+        nonexistent: NonexistentPolicy = 'shift_forward',
     ) -> pd.DataFrame:
         """
         Converts data columns in DataFrame to time zone awareness (America/Sao_Paulo).
+
+        Columns are localized in one vectorized `tz_localize` call and stay
+        `datetime64[ns, America/Sao_Paulo]`; see `utils.datetime_utils.localize_series`
+        for the DST `ambiguous` / `nonexistent` policies. Columns not yet parsed
+        are coerced with `pd.to_datetime` first.
         """
         for col in datetime_columns:
             if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce')
-                df[col] = df[col].apply(local_to_aware)
+                if not is_datetime64_any_dtype(df[col]):
+                    df[col] = pd.to_datetime(df[col], errors='coerce')
+                df[col] = localize_series(df[col], ambiguous=ambiguous, nonexistent=nonexistent)
+
+        return df
+
+    @staticmethod
+    def convert_to_timezone(df: pd.DataFrame, columns: List[str], tz: str) -> pd.DataFrame:
+        """Expresses timezone-aware datetime columns in `tz`, keeping the instants.
+
+        Args:
+            df (pd.DataFrame): The input DataFrame to process.
+            columns (List[str]): A list of timezone-aware datetime column names.
+            tz (str): IANA zone name.
+
+        Returns:
+            pd.DataFrame: The DataFrame with the specified columns in `tz`.
+        """
+        for col in columns:
+            if col not in df.columns:
+                continue
+
+            df[col] = df[col].dt.tz_convert(tz)
+
+        return df
+
+    @staticmethod
+    def to_categories(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+        """Stores low-cardinality columns (statuses, groups...) as categoricals.
+
+        Each distinct value is then held once, and the rows as small integer codes.
+
+        Args:
+            df (pd.DataFrame): The input DataFrame to process.
+            columns (List[str]): A list of column names to convert.
+
+        Returns:
+            pd.DataFrame: The DataFrame with the specified columns as categoricals.
+        """
+        for col in columns:
+            if col not in df.columns:
+                continue
+
+            df[col] = df[col].astype('category')
 
         return df
 
     @staticmethod
     def replace_nulls_with_none(df: pd.DataFrame) -> pd.DataFrame:
         """
-        Replaces pandas null-like values (pd.NA, NaT, NaN) with Python None
+        Converts every column to Python objects, with None for null-like values (pd.NA,
+        NaT, NaN), as the ORM expects them. This copies the whole frame into Python
+        objects, so loaders call it last, one slice of rows at a time.
 
         Args:
             df (pd.DataFrame): input dataframe.
 
         Returns:
-            pd.DataFrame: DataFrame with null values converted into None.
+            pd.DataFrame: DataFrame of object columns with null values as None.
         """
-        return df.replace({pd.NA: None, pd.NaT: None, float('nan'): None})
+        return df.astype(object).where(df.notna(), None)
+
+
+@lru_cache(maxsize=32)
+def _first_key_pattern(keys: Tuple[str, ...]) -> re.Pattern:
+    """
+    One regex for "contains any of `keys`" whose matched group is the first key in
+    `keys` order contained in the value, wherever it sits: anchored at the start,
+    each alternative scans the whole value before the next key is tried.
+    """
+    alternatives = '|'.join(f'.*?({re.escape(key)})' for key in keys)
+    return re.compile(alternatives, re.DOTALL)
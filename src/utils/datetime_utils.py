@@ -1,10 +1,20 @@
-from datetime import datetime
-from typing import Union
+from datetime import datetime, timedelta
+from typing import Literal, Union
 
+import numpy as np
+import pandas as pd
 from django.utils.timezone import is_naive, make_aware
 from pytz import timezone
 
-SAO_PAULO = timezone('America/Sao_Paulo')
+SAO_PAULO_TZ_NAME = 'America/Sao_Paulo'
+SAO_PAULO = timezone(SAO_PAULO_TZ_NAME)
+
+# How to read a wall-clock time that happens twice (DST end, e.g. 2019-02-16 23:30):
+# as its daylight-saving or its standard occurrence, as NaT, raise, or infer from order.
+AmbiguousPolicy = Literal['dst', 'standard', 'NaT', 'raise', 'infer']
+# How to read a wall-clock time skipped by DST start (e.g. 2018-11-04 00:30): moved to
+# the closest valid instant after/before the gap, NaT, raise, or shifted by a timedelta.
+NonexistentPolicy = Union[Literal['shift_forward', 'shift_backward', 'NaT', 'raise'], timedelta]
 
 
 def local_to_aware(dt: Union[datetime, None]) -> Union[datetime, None]:
@@ -17,3 +27,36 @@ def local_to_aware(dt: Union[datetime, None]) -> Union[datetime, None]:
     if is_naive(dt):
         return make_aware(dt, timezone=SAO_PAULO)
     return dt
+
+
+def localize_series(
+    series: pd.Series,
+    tz: str = SAO_PAULO_TZ_NAME,
+    ambiguous: AmbiguousPolicy = 'dst',
+    nonexistent: NonexistentPolicy = 'shift_forward',
+) -> pd.Series:
+    """Localizes a whole naive datetime64 series to its zone's actual offsets.
+
+    Localizes naive wall-clock times with `Series.dt.tz_localize`, keeping a native
+    `datetime64[ns, tz]` column instead of an object column of aware datetimes.
+    Series that are already timezone-aware are returned unchanged.
+
+    Args:
+        series (pd.Series): naive datetime64 series (NaT is kept as NaT).
+        tz (str, optional): IANA zone name. Defaults to 'America/Sao_Paulo'.
+        ambiguous (AmbiguousPolicy, optional): policy for repeated wall-clock
+            times. Defaults to 'dst', their daylight-saving reading.
+        nonexistent (NonexistentPolicy, optional): policy for skipped wall-clock
+            times. Defaults to 'shift_forward'.
+
+    Returns:
+        pd.Series: timezone-aware datetime64 series.
+    """
+    if series.dt.tz is not None:
+        return series
+
+    if ambiguous in {'dst', 'standard'}:
+        ambiguous_flags = np.full(len(series), ambiguous == 'dst')
+        return series.dt.tz_localize(tz, ambiguous=ambiguous_flags, nonexistent=nonexistent)
+
+    return series.dt.tz_localize(tz, ambiguous=ambiguous, nonexistent=nonexistent)
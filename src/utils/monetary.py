@@ -1,16 +1,172 @@
-from decimal import Decimal, InvalidOperation
+import re
+from decimal import Decimal
+from typing import Dict, Literal
 
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_float_dtype, is_integer_dtype, is_numeric_dtype
 
-def to_decimal(value: str) -> Decimal:
-    """Converts str to Decimal object
+CENTAVOS_PER_UNIT = 100
+# Amounts written as plain decimals ("-1234.5"), as typed sources hold Decimals or text
+DECIMAL_PATTERN = r'^\s*(?P<sign>[-+])?(?P<units>\d+)(?:\.(?P<fraction>\d*))?\s*$'
+DECIMAL_ROUND_DIGIT = 5
+
+
+class InvalidCurrencyError(ValueError):
+    """Raised when currency cells cannot be parsed; carries the offending row indexes"""
+
+    def __init__(self, invalid_rows: Dict[str, list]) -> None:
+        self.invalid_rows = invalid_rows
+        details = '; '.join(f'{col}: rows {rows}' for col, rows in invalid_rows.items())
+        super().__init__(f'Unparseable currency values ({details})')
+
+
+def centavos_to_decimal(value: int) -> Decimal:
+    """Converts an integer amount of centavos to a two-place Decimal (150 -> 1.50)
+
+    Args:
+        value (int): amount in centavos
+
+    Returns:
+        Decimal: value in currency units, exact to the centavo
+    """
+    return Decimal(int(value)).scaleb(-2)
+
+
+def currency_pattern(symbol: str = 'R$') -> str:
+    """Builds the regex matching a Brazilian formatted amount (e.g., "-R$ 1.234,56")
+
+    The sign may come before or after the symbol, thousand separators are optional
+    and up to two decimal places are accepted.
+    """
+    symbol = re.escape(symbol)
+    return (
+        rf'^\s*(?P<sign>-)?\s*(?:{symbol})?\s*(?P<sign_after>-)?\s*'
+        r'(?P<units>\d{1,3}(?:\.\d{3}){1,5}|\d{1,16})'
+        r'(?:,(?P<cents>\d{1,2}))?\s*$'
+    )
+
+
+def parse_centavos(
+    series: pd.Series,
+    symbol: str = 'R$',
+    errors: Literal['raise', 'coerce'] = 'raise',
+    blank_as_zero: bool = False,
+) -> pd.Series:
+    """Parses Brazilian currency strings into integer centavos in a single regex pass.
+
+    Every cell is matched once by `currency_pattern`; the integer and fraction
+    parts are then combined with vectorized int64 arithmetic, so no per-cell
+    Python Decimal is ever built.
+
+    Args:
+        series (pd.Series): string series such as "R$ 1.234,56".
+        symbol (str, optional): The currency symbol to accept. Defaults to 'R$'.
+        errors (str, optional): 'raise' raises `InvalidCurrencyError` listing
+            the unparseable row indexes; 'coerce' leaves them as <NA> in a
+            nullable Int64 series. Defaults to 'raise'.
+        blank_as_zero (bool, optional): reads null or blank cells as 0 instead of
+            unparseable, for optional amounts. Defaults to False.
+
+    Returns:
+        pd.Series: int64 series of centavos (Int64 when coerced with failures).
+    """
+    # Optional groups that did not match come back as NA or '' depending on the dtype
+    parts = series.str.extract(currency_pattern(symbol)).fillna('')
+    invalid = parts['units'].eq('').to_numpy(dtype=bool)
+    if blank_as_zero:
+        invalid &= ~_blank(series)
+
+    if invalid.any() and errors == 'raise':
+        raise InvalidCurrencyError({str(series.name): series.index[invalid].tolist()})
+
+    units = parts['units'].str.replace('.', '', regex=False).replace('', '0')
+    cents = parts['cents'].str.ljust(2, '0')
+    negative = ((parts['sign'] == '-') | (parts['sign_after'] == '-')).to_numpy(dtype=bool)
+
+    amounts = (
+        units.astype(np.int64).to_numpy() * CENTAVOS_PER_UNIT + cents.astype(np.int64).to_numpy()
+    )
+    values = pd.Series(np.where(negative, -amounts, amounts), index=series.index, dtype=np.int64)
+    if invalid.any():
+        values = values.astype('Int64').mask(invalid)
+    return values.rename(series.name)
+
+
+def units_to_centavos(
+    series: pd.Series,
+    errors: Literal['raise', 'coerce'] = 'raise',
+    blank_as_zero: bool = False,
+) -> pd.Series:
+    """Converts numeric amounts in currency units (12.5, Decimal('12.50')) to centavos.
+
+    Typed report formats carry amounts as numbers, so no string parsing of the
+    Brazilian format is needed. Integers are scaled exactly; floats are split into
+    their integer and fraction parts, so only the fraction is rounded to the
+    nearest centavo; other values (Decimal, str) are split from their decimal text.
+    None of them goes through a float of the whole amount in centavos.
 
     Args:
-        value (str): str value
+        series (pd.Series): int, float, Decimal or numeric str series.
+        errors (str, optional): 'raise' raises `InvalidCurrencyError` listing the
+            null or non-numeric row indexes; 'coerce' leaves them as <NA> in a
+            nullable Int64 series. Defaults to 'raise'.
+        blank_as_zero (bool, optional): reads null or blank cells as 0 instead of
+            invalid, for optional amounts. Defaults to False.
 
     Returns:
-        Decimal: value converted to Decimal object
+        pd.Series: int64 series of centavos (Int64 when coerced with failures).
     """
-    try:
-        return Decimal(value)
-    except (InvalidOperation, TypeError):
-        return Decimal('0.00')
+    if is_bool_dtype(series):
+        centavos, invalid = np.zeros(len(series), dtype=np.int64), np.ones(len(series), bool)
+    elif is_integer_dtype(series):
+        invalid = series.isna().to_numpy(dtype=bool)
+        units = series.to_numpy(dtype=np.int64, na_value=0)
+        centavos = units * CENTAVOS_PER_UNIT
+    elif is_float_dtype(series):
+        amounts = series.to_numpy(dtype=float, na_value=np.nan)
+        invalid = ~np.isfinite(amounts)
+        amounts = np.where(invalid, 0, amounts)
+        units = np.trunc(amounts)
+        fraction = np.rint((amounts - units) * CENTAVOS_PER_UNIT)
+        centavos = units.astype(np.int64) * CENTAVOS_PER_UNIT + fraction.astype(np.int64)
+    else:
+        centavos, invalid = _decimal_text_to_centavos(series)
+
+    if blank_as_zero:
+        blank = _blank(series)
+        centavos = np.where(blank, 0, centavos)
+        invalid &= ~blank
+
+    if invalid.any() and errors == 'raise':
+        raise InvalidCurrencyError({str(series.name): series.index[invalid].tolist()})
+
+    values = pd.Series(centavos, index=series.index, dtype=np.int64)
+    if invalid.any():
+        values = values.astype('Int64').mask(invalid)
+    return values.rename(series.name)
+
+
+def _decimal_text_to_centavos(series: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """Centavos and invalid mask of values written as decimals (12.345 -> 1235)"""
+    text = series.map(lambda value: format(value, 'f') if isinstance(value, Decimal) else value)
+    parts = text.astype('string').str.extract(DECIMAL_PATTERN).fillna('')
+    invalid = parts['units'].eq('').to_numpy(dtype=bool)
+
+    fraction = parts['fraction'].str.ljust(3, '0')
+    units = parts['units'].replace('', '0').astype(np.int64).to_numpy()
+    cents = fraction.str[:2].astype(np.int64).to_numpy()
+    # Rounded half away from zero on the third decimal
+    round_up = fraction.str[2].astype(np.int64).to_numpy() >= DECIMAL_ROUND_DIGIT
+    amounts = units * CENTAVOS_PER_UNIT + cents + round_up
+    negative = parts['sign'].eq('-').to_numpy(dtype=bool)
+    return np.where(negative, -amounts, amounts), invalid
+
+
+def _blank(series: pd.Series) -> np.ndarray:
+    """Null cells, and text cells holding only whitespace"""
+    blank = series.isna().to_numpy(dtype=bool)
+    if not is_numeric_dtype(series):
+        text = series.astype('string').str.strip()
+        blank |= text.eq('').fillna(False).to_numpy(dtype=bool)
+    return blank
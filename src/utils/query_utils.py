@@ -0,0 +1,10 @@
+from collections.abc import Iterator
+
+from django.db import connection
+
+
+def in_batches(values: list) -> Iterator[list]:
+    """Splits IN-list values to fit the database's limit of query parameters"""
+    size = connection.features.max_query_params or len(values) or 1
+    for start in range(0, len(values), size):
+        yield values[start : start + size]